@@ -15,15 +15,26 @@ CREATE TABLE IF NOT EXISTS comments (
   user_agent TEXT,
   like_count INTEGER DEFAULT 0,
   dislike_count INTEGER DEFAULT 0,
+  popular_score DOUBLE PRECISION NOT NULL DEFAULT 0,
   created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- 1.1 已有的表补上热门度列（由 3.2 的触发器维护）
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS popular_score DOUBLE PRECISION NOT NULL DEFAULT 0;
+
 -- 2. 创建索引
 CREATE INDEX IF NOT EXISTS idx_comments_game_id ON comments(game_id);
 CREATE INDEX IF NOT EXISTS idx_comments_parent_id ON comments(parent_id);
 CREATE INDEX IF NOT EXISTS idx_comments_status ON comments(status);
 CREATE INDEX IF NOT EXISTS idx_comments_created_at ON comments(created_at);
+-- 游标分页用的组合索引：按 (game_id, parent_id) 定位后直接按排序列顺序扫描
+CREATE INDEX IF NOT EXISTS idx_comments_game_parent_created ON comments(game_id, parent_id, created_at DESC, id DESC);
+-- 热门排序按预先算好的 popular_score 扫描，取代按 like_count 排序
+DROP INDEX IF EXISTS idx_comments_game_parent_likes;
+CREATE INDEX IF NOT EXISTS idx_comments_game_parent_popular ON comments(game_id, parent_id, popular_score DESC, id DESC);
+-- 按父评论取回复（线程视图和加载更多回复）
+CREATE INDEX IF NOT EXISTS idx_comments_parent_created ON comments(parent_id, created_at, id);
 
 -- 3. 创建更新时间触发器
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -40,6 +51,73 @@ CREATE TRIGGER update_comments_updated_at
     FOR EACH ROW
     EXECUTE FUNCTION update_updated_at_column();
 
+-- 3.1 原子投票计数：一条语句完成自增并返回最新计数，避免先读后写丢失并发投票
+CREATE OR REPLACE FUNCTION increment_comment_vote(p_comment_id BIGINT, p_vote_type TEXT)
+RETURNS TABLE (like_count INTEGER, dislike_count INTEGER, game_id VARCHAR) AS $$
+  UPDATE comments AS c
+  SET like_count = COALESCE(c.like_count, 0) + CASE WHEN p_vote_type = 'like' THEN 1 ELSE 0 END,
+      dislike_count = COALESCE(c.dislike_count, 0) + CASE WHEN p_vote_type = 'dislike' THEN 1 ELSE 0 END
+  WHERE c.id = p_comment_id
+  RETURNING c.like_count, c.dislike_count, c.game_id;
+$$ LANGUAGE sql;
+
+-- 3.2 热门度：以票数为主——好评率取 Wilson 区间下界（95% 置信），乘以总票数得到"有把握的赞数"，
+--     再加上有上限的时间项：每晚发表一年只多 1 个有效赞，只在票数相近时让新评论排前面，
+--     票数明显更多的老评论不会被新评论挤下去。
+--     时间项只取决于 created_at，分数不随时间流逝变化，只在投票时由触发器重算，因此可以建索引
+CREATE OR REPLACE FUNCTION comment_popular_score(p_likes INTEGER, p_dislikes INTEGER, p_created_at TIMESTAMPTZ)
+RETURNS DOUBLE PRECISION AS $$
+  SELECT CASE WHEN v.n = 0 THEN 0
+           ELSE (v.p + 1.9208 / v.n - 1.96 * SQRT((v.p * (1 - v.p) + 0.9604 / v.n) / v.n)) / (1 + 3.8416 / v.n) * v.n
+         END
+    + COALESCE(EXTRACT(EPOCH FROM p_created_at)::DOUBLE PRECISION / 31536000, 0)
+  FROM (
+    SELECT t.n::DOUBLE PRECISION AS n,
+           CASE WHEN t.n = 0 THEN 0 ELSE GREATEST(COALESCE(p_likes, 0), 0)::DOUBLE PRECISION / t.n END AS p
+    FROM (SELECT GREATEST(COALESCE(p_likes, 0), 0) + GREATEST(COALESCE(p_dislikes, 0), 0) AS n) t
+  ) v;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION update_comment_popular_score()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.popular_score = comment_popular_score(NEW.like_count, NEW.dislike_count, NEW.created_at);
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS update_comments_popular_score ON comments;
+CREATE TRIGGER update_comments_popular_score
+    BEFORE INSERT OR UPDATE OF like_count, dislike_count, created_at ON comments
+    FOR EACH ROW
+    EXECUTE FUNCTION update_comment_popular_score();
+
+-- 回填已有评论；重复执行时只更新分数不一致的行
+UPDATE comments
+SET popular_score = comment_popular_score(like_count, dislike_count, created_at)
+WHERE popular_score IS DISTINCT FROM comment_popular_score(like_count, dislike_count, created_at);
+
+-- 3.3 评论线程视图：每条顶级评论带上最早的 3 条回复（json_agg）和回复总数，
+--     一次查询返回嵌套好的一页，剩余回复通过 comment-replies.ajax 按游标加载；回复只带公开字段（不含邮箱和 IP）
+--     只包含已批准（approved）的评论和回复，自动审核为 pending / spam 的评论不会出现在列表里
+DROP VIEW IF EXISTS comment_threads;
+CREATE VIEW comment_threads WITH (security_invoker = true) AS
+SELECT
+  c.*,
+  COALESCE(preview.replies, '[]'::json) AS replies,
+  (SELECT COUNT(*) FROM comments r WHERE r.parent_id = c.id AND r.status = 'approved')::INTEGER AS reply_count
+FROM comments c
+LEFT JOIN LATERAL (
+  SELECT json_agg(r ORDER BY r.created_at, r.id) AS replies
+  FROM (
+    SELECT id, author, content, parent_id, like_count, dislike_count, created_at FROM comments
+    WHERE parent_id = c.id AND status = 'approved'
+    ORDER BY created_at, id
+    LIMIT 3
+  ) r
+) preview ON true
+WHERE c.parent_id = 0 AND c.status = 'approved';
+
 -- 4. 启用 RLS
 ALTER TABLE comments ENABLE ROW LEVEL SECURITY;
 
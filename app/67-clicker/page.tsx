@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "67-clicker-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("67-clicker");
 
 export default function Clicker67Page() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
@@ -0,0 +1,64 @@
+import { subscribeCommentEvents } from '@/lib/comments/events'
+
+export const dynamic = 'force-dynamic'
+
+// 代理和负载均衡器通常会断开长时间没有数据的连接，定期发送注释行保持连接
+const HEARTBEAT_MS = 25000
+
+const encoder = new TextEncoder()
+
+function formatEvent(event) {
+  return `id: ${event.id}\nevent: ${event.type}\ndata: ${JSON.stringify(event.data)}\n\n`
+}
+
+// 评论实时推送（Server-Sent Events）：GET /api/comment-events.ajax?game_id=xxx
+// 事件：comment（新顶级评论）、reply（新回复）、vote（最新投票计数）、reset（补发不完整，需要重新加载）
+export async function GET(request) {
+  const { searchParams } = new URL(request.url)
+  const gameId = searchParams.get('game_id') || 'steal-brainrot'
+  // EventSource 重连时自动带上 Last-Event-ID
+  const lastEventId = request.headers.get('last-event-id')
+
+  let cleanup = null
+  const stream = new ReadableStream({
+    start(controller) {
+      const send = (chunk) => {
+        try {
+          controller.enqueue(encoder.encode(chunk))
+        } catch {
+          cleanup?.()
+        }
+      }
+
+      send('retry: 3000\n\n')
+      const unsubscribe = subscribeCommentEvents(gameId, lastEventId, (event) => send(formatEvent(event)))
+      const heartbeat = setInterval(() => send(': ping\n\n'), HEARTBEAT_MS)
+
+      cleanup = () => {
+        cleanup = null
+        clearInterval(heartbeat)
+        unsubscribe()
+      }
+      request.signal.addEventListener('abort', () => {
+        cleanup?.()
+        try {
+          controller.close()
+        } catch {
+          // 已经关闭
+        }
+      })
+    },
+    cancel() {
+      cleanup?.()
+    }
+  })
+
+  return new Response(stream, {
+    headers: {
+      'Content-Type': 'text/event-stream; charset=utf-8',
+      'Cache-Control': 'no-cache, no-transform',
+      Connection: 'keep-alive',
+      'X-Accel-Buffering': 'no'
+    }
+  })
+}
@@ -0,0 +1,59 @@
+import { timingSafeEqual } from 'crypto'
+import { getCacheStats } from '@/lib/comments/cache'
+import { getSubscriberCount } from '@/lib/comments/events'
+import { renderMetrics } from '@/lib/comments/instrumentation'
+import { getRateLimitStats } from '@/lib/comments/rate-limit'
+import { getQueueStats } from '@/lib/comments/write-queue'
+
+export const dynamic = 'force-dynamic'
+
+// 配置了 COMMENTS_METRICS_TOKEN 时需要 Authorization: Bearer <token>，否则公开
+function isAuthorized(request) {
+  const token = process.env.COMMENTS_METRICS_TOKEN
+  if (!token) {
+    return true
+  }
+  const header = request.headers.get('authorization') || ''
+  const provided = header.startsWith('Bearer ') ? header.slice(7) : ''
+  if (provided.length !== token.length) {
+    return false
+  }
+  return timingSafeEqual(Buffer.from(provided), Buffer.from(token))
+}
+
+// 评论接口的请求/阶段耗时直方图、缓存、写入队列和限流计数（当前进程），Prometheus 文本格式
+export async function GET(request) {
+  if (!isAuthorized(request)) {
+    return new Response('Unauthorized\n', { status: 401 })
+  }
+
+  const cache = getCacheStats()
+  const queue = getQueueStats()
+  const rateLimit = getRateLimitStats()
+  const body = renderMetrics({
+    comments_cache_hits_total: cache.hits,
+    comments_cache_shared_hits_total: cache.sharedHits,
+    comments_cache_misses_total: cache.misses,
+    comments_cache_invalidations_total: cache.invalidations,
+    comments_cache_evictions_total: cache.evictions,
+    comments_cache_entries: cache.size,
+    comments_queue_enqueued_total: queue.enqueued,
+    comments_queue_rejected_total: queue.rejected,
+    comments_queue_inserted_total: queue.inserted,
+    comments_queue_failed_total: queue.failed,
+    comments_queue_batches_total: queue.batches,
+    comments_queue_depth: queue.depth,
+    comments_stream_subscribers: getSubscriberCount(),
+    comments_rate_limited_comments_total: rateLimit.limitedComments,
+    comments_rate_limited_votes_total: rateLimit.limitedVotes,
+    comments_vote_duplicates_total: rateLimit.duplicateVotes,
+    comments_rate_limit_buckets: rateLimit.buckets
+  })
+
+  return new Response(body, {
+    headers: {
+      'Content-Type': 'text/plain; version=0.0.4; charset=utf-8',
+      'Cache-Control': 'no-store'
+    }
+  })
+}
@@ -0,0 +1,63 @@
+import { cachedJsonResponse, instrumentRoute, jsonResponse } from '@/lib/comments/instrumentation'
+import { logger } from '@/lib/comments/logger'
+import { decodeCursor } from '@/lib/comments/pagination'
+import { compactComments, normalizeFormat } from '@/lib/comments/projection'
+import {
+  CommentServiceError,
+  NOT_CONFIGURED_MESSAGE,
+  isCommentServiceConfigured,
+  listReplies
+} from '@/lib/comments/service'
+
+// 加载更多回复：comments.ajax 的每条评论只带前几条回复，剩下的从 repliesCursor 开始按时间顺序取
+export const GET = instrumentRoute('comment-replies', async (request) => {
+  try {
+    if (!isCommentServiceConfigured()) {
+      return jsonResponse(
+        {
+          success: false,
+          replies: [],
+          error: NOT_CONFIGURED_MESSAGE
+        },
+        { status: 503 }
+      )
+    }
+
+    const { searchParams } = new URL(request.url)
+    const commentId = parseInt(searchParams.get('comment_id'))
+    const limit = Math.min(parseInt(searchParams.get('limit')) || 20, 100)
+    const position = decodeCursor(searchParams.get('cursor'))
+    const format = normalizeFormat(searchParams.get('format'))
+
+    if (!commentId || (searchParams.get('cursor') && !position)) {
+      return jsonResponse(
+        { success: false, error: 'Invalid parameters' },
+        { status: 400 }
+      )
+    }
+
+    const result = await listReplies(commentId, limit, position)
+
+    let body = { success: true, ...result }
+    if (format === 'compact') {
+      const { fields, rows } = compactComments(result.replies)
+      body = { success: true, format, fields, replies: rows, hasMore: result.hasMore, nextCursor: result.nextCursor }
+    }
+
+    return cachedJsonResponse(request, body)
+
+  } catch (error) {
+    if (error instanceof CommentServiceError) {
+      logger.error('加载回复失败', { error: error.cause })
+      return jsonResponse(
+        { success: false, error: error.message },
+        { status: 500 }
+      )
+    }
+    logger.error('API 错误', { error })
+    return jsonResponse(
+      { success: false, error: '服务器内部错误' },
+      { status: 500 }
+    )
+  }
+})
@@ -0,0 +1,31 @@
+import { instrumentRoute, jsonResponse } from '@/lib/comments/instrumentation'
+import { getSubmission } from '@/lib/comments/write-queue'
+
+export const dynamic = 'force-dynamic'
+
+// 排队写入的提交状态：queued → approved / pending / spam，写入失败为 failed
+export const GET = instrumentRoute('comment-status', async (request) => {
+  const id = new URL(request.url).searchParams.get('id')
+  const submission = id ? getSubmission(id) : null
+
+  if (!submission) {
+    return jsonResponse(
+      { success: false, error: 'Submission not found' },
+      { status: 404 }
+    )
+  }
+
+  return jsonResponse({
+    success: true,
+    submission: {
+      id: submission.id,
+      status: submission.status,
+      comment_id: submission.commentId ?? null,
+      game_id: submission.gameId,
+      reason: submission.reason ?? null,
+      error: submission.error ?? null,
+      submitted_at: new Date(submission.submittedAt).toISOString(),
+      processed_at: submission.processedAt ? new Date(submission.processedAt).toISOString() : null
+    }
+  }, { headers: { 'Cache-Control': 'no-store' } })
+})
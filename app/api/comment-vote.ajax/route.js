@@ -1,67 +1,87 @@
-import { NextResponse } from 'next/server'
-import { supabaseAdmin } from '@/lib/supabase-admin'
+import { instrumentRoute, jsonResponse, timed } from '@/lib/comments/instrumentation'
+import { logger } from '@/lib/comments/logger'
+import {
+  checkRateLimit,
+  claimVote,
+  clientIp,
+  releaseVote,
+  retryAfterSeconds,
+  voterCookie,
+  voterToken
+} from '@/lib/comments/rate-limit'
+import {
+  NOT_CONFIGURED_MESSAGE,
+  isCommentServiceConfigured,
+  voteComment
+} from '@/lib/comments/service'
 
-export async function POST(request) {
+export const POST = instrumentRoute('comment-vote', async (request) => {
   try {
-    if (!supabaseAdmin) {
-      return NextResponse.json(
-        { success: false, error: 'Supabase is not configured. Set the required environment variables to enable comments.' },
+    if (!isCommentServiceConfigured()) {
+      return jsonResponse(
+        { success: false, error: NOT_CONFIGURED_MESSAGE },
         { status: 503 }
       )
     }
 
-    const body = await request.json()
+    const body = await timed('parse', () => request.json())
     const { comment_id, vote_type } = body
 
-    console.log('🗳️ 处理投票请求:', { comment_id, vote_type })
+    logger.debug('处理投票请求', { comment_id, vote_type })
 
     if (!comment_id || !vote_type || !['like', 'dislike'].includes(vote_type)) {
-      return NextResponse.json(
+      return jsonResponse(
         { success: false, error: 'Invalid parameters' },
         { status: 400 }
       )
     }
 
-    // 获取当前评论的投票数
-    const { data: comment } = await supabaseAdmin
-      .from('comments')
-      .select('like_count, dislike_count')
-      .eq('id', comment_id)
-      .single()
+    const ip = clientIp(request)
+    const limit = await timed('ratelimit', () => checkRateLimit('comment-vote', { ip }))
+    if (!limit.allowed) {
+      return jsonResponse(
+        { success: false, error: '投票太频繁，请稍后再试' },
+        { status: 429, headers: { 'Retry-After': retryAfterSeconds(limit) } }
+      )
+    }
 
-    if (!comment) {
-      return NextResponse.json(
-        { success: false, error: 'Comment not found' },
-        { status: 404 }
+    // 同一浏览器（投票 cookie）在去重窗口内对同一条评论只计一票；不按 IP 去重，同一 IP 的刷票由上面的令牌桶限制
+    const { token, issued } = voterToken(request)
+    const cookieHeaders = issued ? { 'Set-Cookie': voterCookie(token) } : undefined
+    if (!(await timed('ratelimit', () => claimVote(comment_id, token)))) {
+      return jsonResponse(
+        { success: false, error: '你已经给这条评论投过票了', already_voted: true },
+        { status: 409, headers: cookieHeaders }
       )
     }
 
-    // 根据投票类型增加对应的计数
-    const updateData = vote_type === 'like'
-      ? { like_count: (comment.like_count || 0) + 1 }
-      : { dislike_count: (comment.dislike_count || 0) + 1 }
+    // 在数据库里原子地自增计数并返回最新值（一次往返，不会丢失并发投票）
+    let counts
+    try {
+      counts = await voteComment(comment_id, vote_type)
+    } catch (error) {
+      await releaseVote(comment_id, token)
+      throw error
+    }
 
-    // 更新评论表中的投票计数
-    const { data: updatedComment } = await supabaseAdmin
-      .from('comments')
-      .update(updateData)
-      .eq('id', comment_id)
-      .select('like_count, dislike_count')
-      .single()
+    if (!counts) {
+      await releaseVote(comment_id, token)
+      return jsonResponse(
+        { success: false, error: 'Comment not found' },
+        { status: 404 }
+      )
+    }
 
-    return NextResponse.json({
+    return jsonResponse({
       success: true,
-      counts: {
-        like: updatedComment.like_count,
-        dislike: updatedComment.dislike_count
-      }
-    })
+      counts
+    }, { headers: cookieHeaders })
 
   } catch (error) {
-    console.error('❌ 投票 API 错误:', error)
-    return NextResponse.json(
+    logger.error('投票 API 错误', { error })
+    return jsonResponse(
       { success: false, error: '处理投票失败' },
       { status: 500 }
     )
   }
-}
+})
@@ -0,0 +1,121 @@
+import { isAdminRequest } from '@/lib/comments/admin'
+import { instrumentRoute, jsonResponse, timed } from '@/lib/comments/instrumentation'
+import { logger } from '@/lib/comments/logger'
+import {
+  EMAIL_REGEX,
+  NOT_CONFIGURED_MESSAGE,
+  insertComments,
+  isCommentServiceConfigured
+} from '@/lib/comments/service'
+
+// 单次请求最多的评论条数
+const MAX_BATCH_ROWS = 1000
+
+// 管理接口：需要 Authorization: Bearer <COMMENTS_ADMIN_TOKEN>（见 lib/comments/admin.ts），未配置令牌时接口关闭
+
+// 校验并规范化一行；返回 { comment } 或 { error }
+function normalizeRow(item) {
+  if (!item || typeof item !== 'object') {
+    return { error: '无效的评论对象' }
+  }
+
+  const { author, email, content, parent_id = 0, game_id = 'steal-brainrot', created_at } = item
+
+  if (!author || !email || !content) {
+    return { error: '缺少必填字段' }
+  }
+  if (!EMAIL_REGEX.test(email)) {
+    return { error: '邮箱格式无效' }
+  }
+
+  const parentId = Number(parent_id)
+  if (!Number.isInteger(parentId) || parentId < 0) {
+    return { error: 'parent_id 无效' }
+  }
+
+  // 迁移旧页面的评论时保留原来的发表时间
+  const createdAt = created_at ? new Date(created_at) : new Date()
+  if (Number.isNaN(createdAt.getTime())) {
+    return { error: 'created_at 无效' }
+  }
+
+  return {
+    comment: {
+      author: String(author),
+      email: String(email),
+      content: String(content),
+      parentId,
+      gameId: String(game_id),
+      status: 'approved',
+      createdAt: createdAt.toISOString()
+    }
+  }
+}
+
+export const POST = instrumentRoute('comments-batch', async (request) => {
+  try {
+    if (!isCommentServiceConfigured()) {
+      return jsonResponse(
+        { success: false, error: NOT_CONFIGURED_MESSAGE },
+        { status: 503 }
+      )
+    }
+
+    if (!isAdminRequest(request)) {
+      return jsonResponse(
+        { success: false, error: 'Unauthorized' },
+        { status: 401 }
+      )
+    }
+
+    const body = await timed('parse', () => request.json()).catch(() => null)
+    const items = Array.isArray(body) ? body : body?.comments
+
+    if (!Array.isArray(items) || items.length === 0) {
+      return jsonResponse(
+        { success: false, error: '请求体必须是非空的评论数组' },
+        { status: 400 }
+      )
+    }
+
+    if (items.length > MAX_BATCH_ROWS) {
+      return jsonResponse(
+        { success: false, error: `单次最多 ${MAX_BATCH_ROWS} 条评论` },
+        { status: 413 }
+      )
+    }
+
+    const results = new Array(items.length)
+    const valid = []
+    items.forEach((item, index) => {
+      const { comment, error } = normalizeRow(item)
+      if (error) {
+        results[index] = { index, success: false, error }
+      } else {
+        valid.push({ index, comment })
+      }
+    })
+
+    // 分块多行插入，并失效涉及到的游戏的缓存
+    for (const result of await insertComments(valid)) {
+      results[result.index] = result
+    }
+
+    const inserted = results.filter(result => result.success).length
+    logger.info('批量导入评论', { total: items.length, inserted, failed: items.length - inserted })
+
+    return jsonResponse({
+      success: inserted === items.length,
+      inserted,
+      failed: items.length - inserted,
+      results
+    }, { status: inserted === 0 ? 422 : 200 })
+
+  } catch (error) {
+    logger.error('批量导入 API 错误', { error })
+    return jsonResponse(
+      { success: false, error: '服务器内部错误' },
+      { status: 500 }
+    )
+  }
+})
@@ -0,0 +1,18 @@
+import { NextResponse } from 'next/server'
+import { getCacheStats } from '@/lib/comments/cache'
+
+export const dynamic = 'force-dynamic'
+
+// 评论列表缓存的命中/未命中计数（当前进程），供 comments_loadgen.py 抓取
+export async function GET() {
+  const stats = getCacheStats()
+  const lookups = stats.hits + stats.sharedHits + stats.misses
+
+  return NextResponse.json({
+    success: true,
+    cache: {
+      ...stats,
+      hitRate: lookups ? (stats.hits + stats.sharedHits) / lookups : 0
+    }
+  })
+}
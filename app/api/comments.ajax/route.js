@@ -1,15 +1,23 @@
-import { NextResponse } from 'next/server'
-import { supabaseAdmin } from '@/lib/supabase-admin'
+import { cachedJsonResponse, instrumentRoute, jsonResponse } from '@/lib/comments/instrumentation'
+import { logger } from '@/lib/comments/logger'
+import { decodeCursor, normalizeSort } from '@/lib/comments/pagination'
+import { compactThreads, normalizeFormat } from '@/lib/comments/projection'
+import {
+  CommentServiceError,
+  NOT_CONFIGURED_MESSAGE,
+  isCommentServiceConfigured,
+  listCommentPage
+} from '@/lib/comments/service'
 
-export async function GET(request) {
+export const GET = instrumentRoute('comments', async (request) => {
   try {
-    if (!supabaseAdmin) {
-      return NextResponse.json(
+    if (!isCommentServiceConfigured()) {
+      return jsonResponse(
         {
           success: false,
           comments: [],
           pagination: { page: 1, totalPages: 1 },
-          error: 'Supabase is not configured. Set the required environment variables to enable comments.'
+          error: NOT_CONFIGURED_MESSAGE
         },
         { status: 503 }
       )
@@ -18,85 +26,45 @@ export async function GET(request) {
     const { searchParams } = new URL(request.url)
     const page = parseInt(searchParams.get('page')) || 1
     const limit = parseInt(searchParams.get('limit')) || 5
-    const sort = searchParams.get('sort') || 'newest'
+    const sort = normalizeSort(searchParams.get('sort'))
     const game_id = searchParams.get('game_id') || 'steal-brainrot'
+    // 传了 cursor 参数（第一页可以为空）就使用游标分页，深翻页不再随 offset 线性变慢
+    const pagination = searchParams.has('cursor') ? 'cursor' : 'offset'
+    const cursor = searchParams.get('cursor') || null
+    const format = normalizeFormat(searchParams.get('format'))
 
-    // 计算偏移量
-    const offset = (page - 1) * limit
-
-    // 构建查询 - 只获取顶级评论 (parent_id = 0)
-    let query = supabaseAdmin
-      .from('comments')
-      .select('*', { count: 'exact' })
-      .eq('game_id', game_id)
-      .eq('parent_id', 0) // 只获取顶级评论
-
-    // 排序
-    if (sort === 'newest') {
-      query = query.order('created_at', { ascending: false })
-    } else if (sort === 'oldest') {
-      query = query.order('created_at', { ascending: true })
-    } else if (sort === 'popular') {
-      query = query.order('like_count', { ascending: false })
-    }
-
-    // 分页
-    const { data: comments, error, count } = await query
-      .range(offset, offset + limit - 1)
-
-    console.log('🔍 查询调试信息:');
-    console.log('- game_id:', game_id);
-    console.log('- limit:', limit);
-    console.log('- offset:', offset);
-    console.log('- 查询错误:', error);
-    console.log('- 查询结果:', comments);
-    console.log('- 总数:', count);
-
-    if (error) {
-      console.error('❌ 加载评论失败:', error)
-      return NextResponse.json(
-        { success: false, error: '加载评论失败' },
-        { status: 500 }
+    if (cursor && !decodeCursor(cursor)) {
+      return jsonResponse(
+        { success: false, error: 'Invalid cursor' },
+        { status: 400 }
       )
     }
 
-    // 获取回复评论
-    const commentIds = comments.map(c => c.id)
-    let replies = []
-
-    if (commentIds.length > 0) {
-      const { data: repliesData } = await supabaseAdmin
-        .from('comments')
-        .select('*')
-        .in('parent_id', commentIds)
-        .order('created_at', { ascending: true })
+    // 读穿缓存：命中时不访问数据库，评论服务的写入函数按游戏失效
+    const { value, status } = await listCommentPage({ gameId: game_id, sort, pagination, page, limit, cursor })
 
-      replies = repliesData || []
+    // format=compact：每条评论按 fields 顺序压成数组，省掉每条评论重复的字段名
+    let body = { success: true, ...value }
+    if (format === 'compact') {
+      const { fields, reply_fields, rows } = compactThreads(value.comments)
+      body = { success: true, format, fields, reply_fields, comments: rows, pagination: value.pagination }
     }
 
-    // 组合数据
-    const commentsWithReplies = comments.map(comment => ({
-      ...comment,
-      date: new Date(comment.created_at).toLocaleDateString(),
-      replies: replies.filter(reply => reply.parent_id === comment.id)
-    }))
-
-    return NextResponse.json({
-      success: true,
-      comments: commentsWithReplies,
-      pagination: {
-        page,
-        limit,
-        total: count || 0,
-        totalPages: Math.ceil((count || 0) / limit)
-      }
-    })
+    // 内容没变时返回 304（客户端带 If-None-Match）
+    return cachedJsonResponse(request, body, { headers: { 'X-Cache': status } })
 
   } catch (error) {
-    console.error('❌ API 错误:', error)
-    return NextResponse.json(
+    if (error instanceof CommentServiceError) {
+      logger.error('加载评论失败', { error: error.cause })
+      return jsonResponse(
+        { success: false, error: error.message },
+        { status: 500 }
+      )
+    }
+    logger.error('API 错误', { error })
+    return jsonResponse(
       { success: false, error: '服务器内部错误' },
       { status: 500 }
     )
   }
-}
+})
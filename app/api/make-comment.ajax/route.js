@@ -1,16 +1,30 @@
-import { NextResponse } from 'next/server'
-import { supabaseAdmin } from '@/lib/supabase-admin'
+import { isAdminRequest } from '@/lib/comments/admin'
+import { instrumentRoute, jsonResponse, timed } from '@/lib/comments/instrumentation'
+import { logger } from '@/lib/comments/logger'
+import { projectComment } from '@/lib/comments/projection'
+import { checkRateLimit, clientIp, retryAfterSeconds } from '@/lib/comments/rate-limit'
+import {
+  CommentServiceError,
+  EMAIL_REGEX,
+  NOT_CONFIGURED_MESSAGE,
+  createComment,
+  isCommentServiceConfigured
+} from '@/lib/comments/service'
+import { QueueFullError, enqueueComment } from '@/lib/comments/write-queue'
 
-export async function POST(request) {
+// sync：插入后返回完整评论（默认）；queued：放入写入队列立即返回 202，由后台批量写入并自动审核
+const WRITE_MODE = process.env.COMMENTS_WRITE_MODE === 'queued' ? 'queued' : 'sync'
+
+export const POST = instrumentRoute('make-comment', async (request) => {
   try {
-    if (!supabaseAdmin) {
-      return NextResponse.json(
-        { success: false, error: 'Supabase is not configured. Set the required environment variables to enable comments.' },
+    if (!isCommentServiceConfigured()) {
+      return jsonResponse(
+        { success: false, error: NOT_CONFIGURED_MESSAGE },
         { status: 503 }
       )
     }
 
-    const body = await request.json()
+    const body = await timed('parse', () => request.json())
     const {
       author,
       email,
@@ -19,68 +33,96 @@ export async function POST(request) {
       game_id = 'steal-brainrot'
     } = body
 
-    console.log('📝 创建评论:', { author, email, content: content?.substring(0, 50) + '...', parent_id, game_id })
+    // 不记录邮箱和正文
+    logger.debug('创建评论', { parent_id, game_id, contentLength: content?.length ?? 0 })
 
     // 验证必填字段
     if (!author || !email || !content) {
-      return NextResponse.json(
+      return jsonResponse(
         { success: false, error: '缺少必填字段' },
         { status: 400 }
       )
     }
 
     // 验证邮箱格式
-    const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/
-    if (!emailRegex.test(email)) {
-      return NextResponse.json(
+    if (!EMAIL_REGEX.test(email)) {
+      return jsonResponse(
         { success: false, error: '邮箱格式无效' },
         { status: 400 }
       )
     }
 
-    // 插入评论到数据库
-    const { data, error } = await supabaseAdmin
-      .from('comments')
-      .insert({
-        author: author.trim(),
-        email: email.toLowerCase().trim(),
-        content: content.trim(),
-        parent_id: parent_id,
-        game_id,
-        status: 'approved', // 直接设置为已批准状态
-        ip_address: request.headers.get('x-forwarded-for') || request.ip
-        // user_agent: request.headers.get('user-agent') // 暂时注释，等待数据库表结构更新
-      })
-      .select()
-      .single()
+    // 按 IP 和邮箱限流，超出时直接返回 429，不占用数据库写入
+    const ipAddress = clientIp(request)
+    const limit = await timed('ratelimit', () => checkRateLimit('make-comment', { ip: ipAddress, email }))
+    if (!limit.allowed) {
+      return jsonResponse(
+        { success: false, error: '评论太频繁，请稍后再试' },
+        { status: 429, headers: { 'Retry-After': retryAfterSeconds(limit) } }
+      )
+    }
 
-    if (error) {
-      console.error('❌ 保存评论失败:', error)
-      return NextResponse.json(
-        { success: false, error: '保存评论失败' },
-        { status: 500 }
+    const comment = {
+      author,
+      email,
+      content,
+      parentId: parent_id,
+      gameId: game_id,
+      ipAddress
+    }
+
+    // 写入方式由服务端配置决定；?mode= 只对带管理令牌的请求生效（压测时在同一个部署上比较两种模式），
+    // 否则任何人都能用 ?mode=sync 绕过排队模式的自动审核
+    const requestedMode = new URL(request.url).searchParams.get('mode')
+    if (requestedMode && !isAdminRequest(request)) {
+      return jsonResponse(
+        { success: false, error: 'mode 参数需要管理令牌' },
+        { status: 403 }
       )
     }
+    const mode = requestedMode || WRITE_MODE
+    if (mode === 'queued') {
+      const submission = enqueueComment(comment)
+      const statusUrl = `/api/comment-status.ajax?id=${submission.id}`
+      return jsonResponse({
+        success: true,
+        queued: true,
+        submission: { id: submission.id, status: submission.status },
+        statusUrl
+      }, { status: 202, headers: { Location: statusUrl } })
+    }
+
+    // 插入评论到数据库（评论服务负责失效该游戏的列表和总数缓存）
+    const data = await createComment({
+      ...comment,
+      status: 'approved' // 同步模式直接设置为已批准状态
+    })
 
-    console.log('✅ 评论创建成功:', { id: data.id, author: data.author })
+    logger.info('评论创建成功', { id: data.id, game_id: data.game_id })
 
-    return NextResponse.json({
+    return jsonResponse({
       success: true,
-      comment: {
-        id: data.id,
-        author: data.author,
-        content: data.content,
-        date: new Date(data.created_at).toLocaleDateString(),
-        status: data.status,
-        parent_id: data.parent_id
-      }
+      comment: { ...projectComment(data), status: data.status }
     })
 
   } catch (error) {
-    console.error('❌ API 错误:', error)
-    return NextResponse.json(
+    if (error instanceof QueueFullError) {
+      return jsonResponse(
+        { success: false, error: error.message },
+        { status: 503, headers: { 'Retry-After': '1' } }
+      )
+    }
+    if (error instanceof CommentServiceError) {
+      logger.error('保存评论失败', { error: error.cause })
+      return jsonResponse(
+        { success: false, error: error.message },
+        { status: 500 }
+      )
+    }
+    logger.error('API 错误', { error })
+    return jsonResponse(
       { success: false, error: '服务器内部错误' },
       { status: 500 }
     )
   }
-}
+})
@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "brainrot-alphabet-lore-musical-merge-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("brainrot-alphabet-lore-musical-merge");
 
 export default function BrainrotAlphabetLoreMusicalMerge() {
   return (
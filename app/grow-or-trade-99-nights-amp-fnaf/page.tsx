@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "grow-or-trade-99-nights-amp-fnaf-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("grow-or-trade-99-nights-amp-fnaf");
 
 export default function GrowOrTrade99NightsAmpFnaf() {
   return (
@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "guest-666-steal-a-brainrot-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("guest-666-steal-a-brainrot");
 
 export default function Guest666StealABrainrotPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
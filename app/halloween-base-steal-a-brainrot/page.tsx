@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "halloween-base-steal-a-brainrot-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("halloween-base-steal-a-brainrot");
 
 export default function HalloweenBaseStealABrainrotPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
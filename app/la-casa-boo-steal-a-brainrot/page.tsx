@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "la-casa-boo-steal-a-brainrot-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("la-casa-boo-steal-a-brainrot");
 
 export default function LaCasaBooStealABrainrotPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
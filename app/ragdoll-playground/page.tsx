@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "ragdoll-playground-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("ragdoll-playground");
 
 export default function RagdollPlaygroundPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
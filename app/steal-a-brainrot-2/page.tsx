@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "steal-a-brainrot-2-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("steal-a-brainrot-2");
 
 export default function StealABrainrot2Page() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
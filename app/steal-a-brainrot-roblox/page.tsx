@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "steal-a-brainrot-roblox-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("steal-a-brainrot-roblox");
 
 export default function StealABrainrotRobloxPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
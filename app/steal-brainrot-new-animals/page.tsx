@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "steal-brainrot-new-animals-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("steal-brainrot-new-animals");
 
 export default function StealBrainrotNewAnimalsPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
@@ -1,10 +1,8 @@
-import fs from "node:fs";
-import path from "node:path";
+import { getPageBody } from "@/lib/site/getPageBody";
 
-const bodyHtml = fs.readFileSync(
-  path.join(process.cwd(), "data", "the-new-steal-brainrot-super-clicker-body.html"),
-  "utf8"
-);
+export const dynamic = "force-static";
+
+const bodyHtml = getPageBody("the-new-steal-brainrot-super-clicker");
 
 export default function TheNewStealBrainrotSuperClickerPage() {
   return <div dangerouslySetInnerHTML={{ __html: bodyHtml }} />;
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+评论批量导入工具
+
+把 JSONL 文件（每行一条评论：author、email、content，可选 parent_id、game_id、created_at）
+按批发送到 /api/comments-batch.ajax。文件边读边发：读取端和多个发送端之间是有界队列，
+发送跟不上时读取会暂停，内存里最多只有 (--concurrency * 2) 个批次。
+
+    COMMENTS_ADMIN_TOKEN=... python bulk_load_comments.py load comments.jsonl
+    python bulk_load_comments.py load comments.jsonl --batch-size 500 --concurrency 4 --errors failed.jsonl
+    python bulk_load_comments.py generate --count 100000 --games steal-brainrot,escape-drive --output seed.jsonl
+
+被拒绝的行（校验失败或写入失败）连同行号和原因写入 --errors 文件，修正后可以直接重新导入。
+接口按块提交、不是幂等的：请求已经送达后超时或返回 5xx 时，批次里可能已经有一部分写入，
+所以这种批次不重试，整批以 "unknown outcome" 写入 --errors，需要先在数据库里核对再决定是否重新导入。
+只有确定没有被处理的请求（429、连接没有建立）才会重试。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+from comments_loadgen import DEFAULT_BASE_URL, LoadStats
+from fake_supabase import generate_comments
+
+BATCH_API = "/api/comments-batch.ajax"
+MAX_BATCH_SIZE = 1000  # 与接口的 MAX_BATCH_ROWS 一致
+# 确定没有写入任何行、可以安全重试的情况
+RETRY_STATUS = {429}
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+UNKNOWN_OUTCOME = "unknown outcome"
+
+
+class FatalLoadError(Exception):
+    """鉴权失败等继续发送也没有意义的错误"""
+
+
+class BulkLoader:
+    def __init__(self, client, token, batch_size, concurrency, retries, errors_path=None):
+        self.client = client
+        self.token = token
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.queue = asyncio.Queue(maxsize=concurrency * 2)
+        self.stats = LoadStats()
+        self.errors_file = open(errors_path, "w", encoding="utf-8") if errors_path else None
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.unknown = 0
+        self.batches = 0
+
+    def close(self):
+        if self.errors_file:
+            self.errors_file.close()
+
+    def reject(self, line_no, error, item=None):
+        self.failed += 1
+        if self.errors_file:
+            self.errors_file.write(json.dumps({"line": line_no, "error": error, "item": item}, ensure_ascii=False) + "\n")
+
+    async def produce(self, path):
+        """逐行读取文件并按批放入队列；队列满时 put 会等待，形成背压"""
+        batch = []
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                self.rows += 1
+                try:
+                    batch.append((line_no, json.loads(line)))
+                except ValueError as e:
+                    self.reject(line_no, f"无效的 JSON: {e}")
+                    continue
+                if len(batch) >= self.batch_size:
+                    await self.queue.put(batch)
+                    batch = []
+        if batch:
+            await self.queue.put(batch)
+        for _ in range(self.concurrency):
+            await self.queue.put(None)
+
+    async def send(self, batch):
+        """发送一个批次；只有确定没有被处理的请求（429、连接失败）才按指数退避重试。
+        请求送达后超时或返回 5xx 时可能已经写入了一部分，返回 unknown=True，不再重试"""
+        payload = {"comments": [item for _, item in batch]}
+        headers = {"Authorization": f"Bearer {self.token}"}
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await self.client.post(BATCH_API, json=payload, headers=headers)
+            except RETRY_ERRORS as e:
+                self.stats.endpoint("batch").record((time.perf_counter() - started) * 1000, ok=False)
+                error = str(e) or e.__class__.__name__
+            except httpx.HTTPError as e:
+                self.stats.endpoint("batch").record((time.perf_counter() - started) * 1000, ok=False)
+                return None, {"error": f"{UNKNOWN_OUTCOME}: {str(e) or e.__class__.__name__}", "unknown": True}
+            else:
+                latency_ms = (time.perf_counter() - started) * 1000
+                self.stats.endpoint("batch").record(latency_ms, response.status_code, response.status_code < 400)
+                if response.status_code in (401, 403):
+                    raise FatalLoadError(f"鉴权失败 ({response.status_code})，检查 COMMENTS_ADMIN_TOKEN")
+                if response.status_code >= 500:
+                    return response.status_code, {"error": f"{UNKNOWN_OUTCOME}: HTTP {response.status_code}", "unknown": True}
+                if response.status_code not in RETRY_STATUS:
+                    return response.status_code, response.json()
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("retry-after")
+                if retry_after and retry_after.isdigit():
+                    await asyncio.sleep(int(retry_after))
+                    continue
+            if attempt < self.retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+        return None, {"error": error}
+
+    async def consume(self):
+        while True:
+            batch = await self.queue.get()
+            if batch is None:
+                return
+            status, body = await self.send(batch)
+            self.batches += 1
+            results = body.get("results") if isinstance(body, dict) else None
+            if results is None:
+                # 整批被拒绝（请求体过大、重试耗尽等），或者不知道写入了多少（超时、5xx）
+                if body.get("unknown"):
+                    self.unknown += len(batch)
+                for line_no, item in batch:
+                    self.reject(line_no, body.get("error") or f"HTTP {status}", item)
+            else:
+                for (line_no, item), result in zip(batch, results):
+                    if result.get("success"):
+                        self.inserted += 1
+                    else:
+                        self.reject(line_no, result.get("error"), item)
+            if self.batches % 20 == 0:
+                print(f"📦 已发送 {self.batches} 批，写入 {self.inserted} 条，失败 {self.failed} 条")
+
+    async def run(self, path):
+        consumers = [asyncio.create_task(self.consume()) for _ in range(self.concurrency)]
+        producer = asyncio.create_task(self.produce(path))
+        try:
+            await asyncio.gather(producer, *consumers)
+        except FatalLoadError:
+            for task in [producer, *consumers]:
+                task.cancel()
+            raise
+        finally:
+            self.stats.stop()
+
+    def report(self, **meta):
+        report = self.stats.report(**meta)
+        report.update({
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "unknown_outcome": self.unknown,
+            "batches": self.batches,
+            "rows_per_s": round(self.inserted / self.stats.elapsed, 1) if self.stats.elapsed else 0
+        })
+        return report
+
+
+async def run_load(args):
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        loader = BulkLoader(client, args.token, args.batch_size, args.concurrency, args.retries, args.errors)
+        try:
+            await loader.run(args.file)
+        finally:
+            loader.close()
+    return loader.report(mode="load", base_url=args.base_url, file=args.file, batch_size=args.batch_size)
+
+
+def command_load(args):
+    if not args.token:
+        print("❌ 需要管理令牌：设置 COMMENTS_ADMIN_TOKEN 或使用 --token")
+        return 2
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        print(f"❌ --batch-size 必须在 1-{MAX_BATCH_SIZE} 之间")
+        return 2
+    try:
+        report = asyncio.run(run_load(args))
+    except FatalLoadError as e:
+        print(f"❌ {e}")
+        return 2
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        latency = report["endpoints"].get("batch", {}).get("latency_ms", {})
+        print("=" * 60)
+        print(f"读取 {report['rows']} 行，写入 {report['inserted']} 条，失败 {report['failed']} 条")
+        print(f"{report['batches']} 批，耗时 {report['elapsed_s']}s，{report['rows_per_s']} 条/秒")
+        print(f"单批延迟 p50 {latency.get('p50')}ms，p95 {latency.get('p95')}ms")
+        if report["unknown_outcome"]:
+            print(f"⚠️  {report['unknown_outcome']} 行在请求送达后超时或遇到服务端错误，可能已经部分写入，重新导入前先在数据库里核对")
+        if report["failed"] and args.errors:
+            print(f"⚠️  失败的行已写入: {args.errors}")
+    return 1 if report["failed"] else 0
+
+
+def command_generate(args):
+    """生成压测用的评论数据（只有顶级评论：导入后 id 由数据库分配，回复无法预先指向父评论）"""
+    games = [game for game in args.games.split(",") if game]
+    with open(args.output, "w", encoding="utf-8") as f:
+        for row in generate_comments(args.count, games, reply_ratio=0, days=args.days, seed=args.seed):
+            _, author, email, content, _, game_id, _, _, _, _, created_at, _ = row
+            f.write(json.dumps({
+                "author": author,
+                "email": email,
+                "content": content,
+                "game_id": game_id,
+                "created_at": created_at
+            }, ensure_ascii=False) + "\n")
+    print(f"✅ 已生成 {args.count} 条评论: {args.output}")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="评论批量导入工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load = subparsers.add_parser("load", help="把 JSONL 文件导入评论表")
+    load.add_argument("file", help="JSONL 文件，每行一条评论")
+    load.add_argument("--base-url", default=DEFAULT_BASE_URL, help="站点地址")
+    load.add_argument("--token", default=os.environ.get("COMMENTS_ADMIN_TOKEN"), help="管理令牌，默认读取 COMMENTS_ADMIN_TOKEN")
+    load.add_argument("--batch-size", type=int, default=500, help=f"每批条数（最多 {MAX_BATCH_SIZE}）")
+    load.add_argument("--concurrency", type=int, default=4, help="同时发送的批次数")
+    load.add_argument("--retries", type=int, default=3, help="限流或连接失败时的重试次数（超时和 5xx 不重试）")
+    load.add_argument("--timeout", type=float, default=60.0, help="单个请求超时（秒）")
+    load.add_argument("--errors", default=None, help="把失败的行写入该 JSONL 文件")
+    load.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    load.set_defaults(handler=command_load)
+
+    generate = subparsers.add_parser("generate", help="生成压测用的 JSONL 评论数据")
+    generate.add_argument("--count", type=int, default=10000)
+    generate.add_argument("--games", default="steal-brainrot", help="逗号分隔的 game_id")
+    generate.add_argument("--days", type=int, default=365, help="created_at 分布在最近多少天")
+    generate.add_argument("--seed", type=int, default=None)
+    generate.add_argument("--output", default="comments_seed.jsonl")
+    generate.set_defaults(handler=command_generate)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+评论系统 E2E 并行运行器
+
+只启动一个 Chromium，把各个场景（提交、回复、点赞、分页、实时推送）分发到
+N 个相互隔离的 browser.new_context() 中并发执行，最后把每个场景的
+results 字典合并成一份报告。
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+from playwright.async_api import async_playwright
+
+from comment_waits import (
+    COMMENTS_API,
+    MAKE_COMMENT_API,
+    VOTE_API,
+    LatencyRecorder,
+    async_goto_and_wait_for_comments,
+    async_measure_page_switch,
+    async_wait_for_api,
+    async_wait_for_first_comment,
+    async_wait_for_realtime,
+    async_wait_for_text
+)
+from perf_budget import aggregate_summaries, print_result, run_gate
+from perf_trace import (
+    async_collect_page_metrics,
+    async_start_tracing,
+    async_stop_tracing,
+    context_options,
+    load_summary,
+    new_run_dir,
+    write_summary
+)
+
+DEFAULT_BASE_URL = "http://localhost:3000"
+VIEWPORT = {"width": 1920, "height": 1080}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+NAME_INPUT = "input[placeholder='Your name'], input[placeholder*='姓名'], input[name='name']"
+EMAIL_INPUT = "input[type='email'], input[name='email']"
+COMMENT_TEXTAREA = "textarea[placeholder*='comment'], textarea[placeholder*='评论'], textarea"
+SUBMIT_BUTTON = "button:has-text('Publish Comment'), button:has-text('提交评论')"
+REPLY_BUTTON = "button:has-text('Reply'), button:has-text('回复')"
+REPLY_SUBMIT_BUTTON = "button:has-text('Publish Reply'), button:has-text('提交评论')"
+LIKE_BUTTON = "button:has-text('👍')"
+NEXT_PAGE_BUTTON = "button:has-text('Next'), button:has-text('下一页')"
+PREVIOUS_PAGE_BUTTON = "button:has-text('Previous'), button:has-text('上一页')"
+
+# 每个 browser context 当作一个独立的用户：写接口按 IP 限流、投票按 (评论, 投票 cookie) 去重，
+# 并发或重复执行的场景共用同一个地址时会互相挡住。服务端设置了 COMMENTS_TRUSTED_PROXY_HOPS 时才读这个头
+_user_ids = itertools.count(1)
+
+
+def user_headers():
+    index = next(_user_ids)
+    return {"X-Forwarded-For": f"172.16.{index >> 8 & 255}.{index & 255}"}
+
+
+# 另一个 context 的评论或点赞通过推送到达观察者页面的时间上限
+REALTIME_BUDGET_MS = 1000
+
+LIKE_COUNT_JS = """([id, before]) => {
+    const button = document.querySelector(`#comment-${id} button`);
+    return button && !button.innerText.includes(`👍 ${before}`);
+}"""
+
+
+def new_results(scenario):
+    """创建单个场景的结果字典（与 test_comments_functionality.py 的结构一致）"""
+    return {
+        "scenario": scenario,
+        "test_time": datetime.now().isoformat(),
+        "steps": [],
+        "errors": [],
+        "warnings": [],
+        "success": False
+    }
+
+
+def add_step(results, name, status, **extra):
+    """追加一个步骤记录"""
+    step = {"step": len(results["steps"]) + 1, "name": name, "status": status}
+    step.update(extra)
+    results["steps"].append(step)
+    return step
+
+
+def unique_text(scenario):
+    """每个场景使用不同的评论内容，避免并发场景互相干扰"""
+    return f"[{scenario}] Playwright 并行测试评论 {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}"
+
+
+async def open_homepage(page, base_url, results, recorder):
+    """访问首页并等待首屏评论列表加载完成"""
+    with recorder.step("访问首页") as timing:
+        response, comments_response = await async_goto_and_wait_for_comments(page, base_url)
+    # 第一条评论渲染完成的时间点（相对导航开始），用于性能预算
+    results["first_comment_ms"] = await async_wait_for_first_comment(page)
+
+    add_step(
+        results,
+        "访问首页",
+        "success" if response and response.status == 200 else "error",
+        response_status=response.status if response else None,
+        comments_status=comments_response.status,
+        latency_ms=timing["latency_ms"],
+        first_comment_ms=results["first_comment_ms"]
+    )
+    if not response or response.status != 200:
+        raise RuntimeError(f"首页返回状态 {response.status if response else '无响应'}")
+
+
+async def fill_comment_form(scope, author, email, content):
+    await scope.locator(NAME_INPUT).first.fill(author)
+    await scope.locator(EMAIL_INPUT).first.fill(email)
+    await scope.locator(COMMENT_TEXTAREA).first.fill(content)
+
+
+async def scenario_submit(page, base_url, results, recorder):
+    """提交一条顶级评论，并确认它出现在列表中"""
+    await open_homepage(page, base_url, results, recorder)
+
+    content = unique_text("submit")
+    await fill_comment_form(page, "并行测试用户", "submit@example.com", content)
+
+    with recorder.step("提交评论"):
+        submit_response = await async_wait_for_api(
+            page, MAKE_COMMENT_API, page.locator(SUBMIT_BUTTON).first.click
+        )
+    payload = await submit_response.json()
+
+    if not payload.get("success"):
+        add_step(results, "提交评论", "error", message=payload.get("error"))
+        results["errors"].append(f"提交评论失败: {payload.get('error')}")
+        return
+
+    with recorder.step("评论出现在列表中"):
+        visible = await async_wait_for_text(page, content)
+    add_step(
+        results,
+        "提交评论",
+        "success" if visible else "warning",
+        comment_id=payload["comment"]["id"]
+    )
+    if not visible:
+        results["warnings"].append("提交成功但列表中未出现新评论")
+
+
+async def scenario_reply(page, base_url, results, recorder):
+    """回复第一条评论"""
+    await open_homepage(page, base_url, results, recorder)
+
+    reply_buttons = page.locator(REPLY_BUTTON)
+    if await reply_buttons.count() == 0:
+        add_step(results, "回复评论", "warning", message="页面上没有可回复的评论")
+        results["warnings"].append("页面上没有可回复的评论")
+        return
+
+    await reply_buttons.first.click()
+    reply_form = page.locator("form").filter(has=page.locator(REPLY_SUBMIT_BUTTON)).last
+    content = unique_text("reply")
+    await fill_comment_form(reply_form, "并行回复用户", "reply@example.com", content)
+
+    with recorder.step("提交回复"):
+        reply_response = await async_wait_for_api(
+            page, MAKE_COMMENT_API, reply_form.locator(REPLY_SUBMIT_BUTTON).first.click
+        )
+    payload = await reply_response.json()
+
+    if not payload.get("success"):
+        add_step(results, "回复评论", "error", message=payload.get("error"))
+        results["errors"].append(f"回复失败: {payload.get('error')}")
+        return
+
+    with recorder.step("回复出现在列表中"):
+        visible = await async_wait_for_text(page, content)
+    add_step(
+        results,
+        "回复评论",
+        "success" if visible else "warning",
+        parent_id=payload["comment"]["parent_id"]
+    )
+    if not visible:
+        results["warnings"].append("回复成功但列表中未出现新回复")
+
+
+async def scenario_like(page, base_url, results, recorder):
+    """给第一条评论点赞，并确认返回的计数"""
+    await open_homepage(page, base_url, results, recorder)
+
+    like_buttons = page.locator(LIKE_BUTTON)
+    if await like_buttons.count() == 0:
+        add_step(results, "点赞评论", "warning", message="页面上没有可点赞的评论")
+        results["warnings"].append("页面上没有可点赞的评论")
+        return
+
+    with recorder.step("点赞"):
+        vote_response = await async_wait_for_api(page, VOTE_API, like_buttons.first.click)
+    payload = await vote_response.json()
+
+    if not payload.get("success"):
+        add_step(results, "点赞评论", "error", message=payload.get("error"))
+        results["errors"].append(f"点赞失败: {payload.get('error')}")
+        return
+
+    add_step(results, "点赞评论", "success", counts=payload.get("counts"))
+
+
+# 来回翻页的顺序：第一次翻到第 2 页（空闲时已经预取过时同样走缓存），之后两次切到的都是缓存过的页面
+PAGE_SWITCHES = (
+    ("翻页", NEXT_PAGE_BUTTON),
+    ("翻页返回", PREVIOUS_PAGE_BUTTON),
+    ("翻页（缓存）", NEXT_PAGE_BUTTON)
+)
+
+
+async def scenario_pagination(page, base_url, results, recorder):
+    """来回翻页，记录每次点击到列表换成另一页的时间，以及切换期间是否请求了评论接口"""
+    await open_homepage(page, base_url, results, recorder)
+
+    next_button = page.locator(NEXT_PAGE_BUTTON).first
+    if await next_button.count() == 0 or await next_button.is_disabled():
+        add_step(results, "分页", "warning", message="只有一页评论，无法翻页")
+        results["warnings"].append("只有一页评论，无法翻页")
+        return
+
+    requests = []
+    page.on("request", lambda request: requests.append(request.url) if COMMENTS_API in request.url else None)
+
+    switches = []
+    for name, selector in PAGE_SWITCHES:
+        before = len(requests)
+        with recorder.step(name):
+            latency = await async_measure_page_switch(page, page.locator(selector).first.click)
+        switch = {"name": name, "page_switch_ms": latency, "requests": len(requests) - before}
+        switches.append(switch)
+        add_step(results, name, "success" if latency is not None else "error", **switch)
+        if latency is None:
+            results["errors"].append(f"{name}后评论列表没有变化")
+            break
+
+    results["page_switch"] = switches
+
+
+async def scenario_realtime(page, base_url, results, recorder, budget_ms=REALTIME_BUDGET_MS):
+    """另一个 context 发评论、点赞，观察者页面应在预算内通过推送收到增量，且不重新请求评论列表"""
+    await open_homepage(page, base_url, results, recorder)
+    if not await async_wait_for_realtime(page):
+        add_step(results, "实时推送", "error", message="评论推送连接未建立")
+        results["errors"].append("评论推送连接未建立")
+        return
+
+    # 只统计当前显示的第 1 页；空闲时预取下一页的请求不算重新请求
+    refetches = []
+    page.on(
+        "response",
+        lambda response: refetches.append(response.url)
+        if COMMENTS_API in response.url and parse_qs(urlparse(response.url).query).get("page") == ["1"]
+        else None
+    )
+
+    author_context = await page.context.browser.new_context(
+        viewport=VIEWPORT, user_agent=USER_AGENT, extra_http_headers=user_headers()
+    )
+    try:
+        author = await author_context.new_page()
+        await async_goto_and_wait_for_comments(author, base_url)
+
+        content = unique_text("realtime")
+        await fill_comment_form(author, "推送测试用户", "realtime@example.com", content)
+        observed = asyncio.create_task(async_wait_for_text(page, content))
+        submit_response = await async_wait_for_api(author, MAKE_COMMENT_API, author.locator(SUBMIT_BUTTON).first.click)
+        submitted = time.perf_counter()
+        payload = await submit_response.json()
+        if not payload.get("success"):
+            observed.cancel()
+            add_step(results, "实时推送", "error", message=payload.get("error"))
+            results["errors"].append(f"提交评论失败: {payload.get('error')}")
+            return
+
+        visible = await observed
+        comment_latency = round((time.perf_counter() - submitted) * 1000, 1)
+        add_step(
+            results,
+            "推送新评论",
+            "success" if visible and comment_latency <= budget_ms else "error",
+            latency_ms=comment_latency,
+            budget_ms=budget_ms
+        )
+
+        # 在作者页面给这条评论点赞，观察者页面的计数应随推送更新
+        comment_id = payload.get("comment", {}).get("id")
+        vote_latency = None
+        if visible and comment_id:
+            observed = asyncio.create_task(page.wait_for_function(LIKE_COUNT_JS, arg=[comment_id, 0], timeout=budget_ms * 5))
+            await async_wait_for_api(author, VOTE_API, author.locator(f"#comment-{comment_id} {LIKE_BUTTON}").first.click)
+            voted = time.perf_counter()
+            try:
+                await observed
+                vote_latency = round((time.perf_counter() - voted) * 1000, 1)
+            except Exception:
+                pass
+            add_step(
+                results,
+                "推送点赞计数",
+                "success" if vote_latency is not None and vote_latency <= budget_ms else "error",
+                latency_ms=vote_latency,
+                budget_ms=budget_ms
+            )
+    finally:
+        await author_context.close()
+
+    results["realtime"] = {
+        "comment_latency_ms": comment_latency,
+        "vote_latency_ms": vote_latency,
+        "budget_ms": budget_ms,
+        "list_refetches": len(refetches)
+    }
+    if not visible:
+        results["errors"].append("观察者页面没有收到新评论")
+    elif comment_latency > budget_ms:
+        results["errors"].append(f"新评论推送耗时 {comment_latency}ms，超出预算 {budget_ms}ms")
+    if visible and (vote_latency is None or vote_latency > budget_ms):
+        results["errors"].append(f"点赞计数推送耗时 {vote_latency}ms，超出预算 {budget_ms}ms")
+    if refetches:
+        results["errors"].append(f"观察者页面重新请求了 {len(refetches)} 次评论列表，应只应用推送的增量")
+
+
+SCENARIOS = {
+    "submit": scenario_submit,
+    "reply": scenario_reply,
+    "like": scenario_like,
+    "pagination": scenario_pagination,
+    "realtime": scenario_realtime
+}
+
+
+async def run_scenario(browser, name, base_url, semaphore, run_dir=None, options=None):
+    """在独立的 browser context 中执行一个场景；给出 run_dir 时记录 trace、HAR 和性能汇总"""
+    async with semaphore:
+        results = new_results(name)
+        recorder = LatencyRecorder()
+        context_opts = context_options(run_dir) if run_dir else {}
+        context = await browser.new_context(
+            viewport=VIEWPORT, user_agent=USER_AGENT, extra_http_headers=user_headers(), **context_opts
+        )
+        if run_dir:
+            await async_start_tracing(context)
+        page = await context.new_page()
+        started = time.time()
+        print(f"🚀 [{name}] 开始")
+        try:
+            await SCENARIOS[name](page, base_url, results, recorder, **(options or {}).get(name, {}))
+            results["success"] = not results["errors"]
+        except Exception as e:
+            error_msg = f"测试过程中发生错误: {str(e)}"
+            results["errors"].append(error_msg)
+            add_step(results, "异常", "error", message=str(e))
+        finally:
+            results["duration"] = f"{time.time() - started:.2f}s"
+            results["latency"] = recorder.summary()
+            page_metrics = None
+            if run_dir:
+                try:
+                    page_metrics = await async_collect_page_metrics(page)
+                    page_metrics["first_comment_ms"] = results.get("first_comment_ms")
+                except Exception as e:
+                    results["warnings"].append(f"无法读取页面性能指标: {str(e)}")
+                await async_stop_tracing(context, run_dir)
+            await context.close()
+            if run_dir:
+                summary = write_summary(run_dir, page_metrics, results["latency"], scenario=name, url=base_url)
+                results["perf"] = {"run_dir": run_dir, "page": summary["page"], "api": summary["api"]}
+        print(f"{'✅' if results['success'] else '❌'} [{name}] 结束 ({results['duration']})")
+        return results
+
+
+def merge_results(scenario_results, started):
+    """把每个场景的 results 合并成一份报告"""
+    report = {
+        "test_time": datetime.now().isoformat(),
+        "duration": f"{time.time() - started:.2f}s",
+        "scenarios": {},
+        "steps": [],
+        "errors": [],
+        "warnings": [],
+        "success": bool(scenario_results)
+    }
+    for results in scenario_results:
+        name = results["scenario"]
+        if name in report["scenarios"]:
+            name = f"{name}#{len(report['scenarios'])}"
+        report["scenarios"][name] = results
+        for step in results["steps"]:
+            report["steps"].append({**step, "scenario": name})
+        report["errors"].extend(f"[{name}] {e}" for e in results["errors"])
+        report["warnings"].extend(f"[{name}] {w}" for w in results["warnings"])
+        report["success"] = report["success"] and results["success"]
+    return report
+
+
+async def run(scenarios, base_url=DEFAULT_BASE_URL, workers=None, headless=True, trace_dir=None, options=None):
+    """启动一个浏览器，并发执行所有场景，返回合并后的报告；options 为 {场景: 额外参数}"""
+    workers = workers or os.cpu_count() or 4
+    semaphore = asyncio.Semaphore(workers)
+    started = time.time()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        try:
+            scenario_results = await asyncio.gather(
+                *(
+                    run_scenario(
+                        browser, name, base_url, semaphore,
+                        new_run_dir(f"{name}-{index}", trace_dir) if trace_dir else None,
+                        options
+                    )
+                    for index, name in enumerate(scenarios, start=1)
+                )
+            )
+        finally:
+            await browser.close()
+
+    return merge_results(scenario_results, started)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="并行运行评论系统 E2E 场景")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="被测站点地址")
+    parser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help=f"逗号分隔的场景列表，可选: {', '.join(SCENARIOS)}"
+    )
+    parser.add_argument("--workers", type=int, default=None, help="并发 context 数量，默认等于 CPU 核数")
+    parser.add_argument("--repeat", type=int, default=1, help="每个场景重复执行的次数")
+    parser.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    parser.add_argument("--output", default=None, help="报告输出路径，默认 test_results_<时间戳>.json")
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="为每个场景记录 Playwright trace、HAR 和 perf_summary.json（写到 perf_runs/<时间戳>/）"
+    )
+    parser.add_argument("--budget", default=None, help="性能预算文件（如 perf_budget.json），超出时退出码为 1；隐含 --trace")
+    parser.add_argument("--baseline", default=None, help="与之比较的基线文件（如 perf_baseline.json）")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写成新的基线")
+    parser.add_argument(
+        "--realtime-budget-ms",
+        type=float,
+        default=REALTIME_BUDGET_MS,
+        help="realtime 场景中推送到达另一个 context 的时间上限（毫秒）"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"❌ 未知场景: {', '.join(unknown)}")
+        return 2
+
+    print("=" * 60)
+    print(f"并行执行 {len(names) * args.repeat} 个场景: {args.base_url}")
+    print("=" * 60)
+
+    trace_dir = new_run_dir() if args.trace or args.budget else None
+    options = {"realtime": {"budget_ms": args.realtime_budget_ms}}
+    report = asyncio.run(
+        run(names * args.repeat, args.base_url, args.workers, headless=not args.headed, trace_dir=trace_dir, options=options)
+    )
+    if trace_dir:
+        report["trace_dir"] = trace_dir
+
+    # realtime 场景把实际使用的预算写进结果，和 --realtime-budget-ms 对不上说明参数没有传到场景里
+    for name, results in report["scenarios"].items():
+        used = results.get("realtime", {}).get("budget_ms")
+        if used is not None and used != args.realtime_budget_ms:
+            report["errors"].append(f"[{name}] 推送预算为 {used}ms，与 --realtime-budget-ms {args.realtime_budget_ms}ms 不一致")
+            report["success"] = False
+
+    if args.budget:
+        summaries = [
+            load_summary(results["perf"]["run_dir"])
+            for results in report["scenarios"].values() if "perf" in results
+        ]
+        if summaries:
+            gate = run_gate(aggregate_summaries(summaries), args.budget, args.baseline, args.update_baseline)
+            report["budget"] = gate
+            report["success"] = report["success"] and gate["passed"]
+            print_result(gate)
+        else:
+            report["warnings"].append("没有可用的性能汇总，未检查预算")
+
+    results_file = args.output or f"test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(results_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("\n" + "=" * 60)
+    print(f"总耗时: {report['duration']}，错误 {len(report['errors'])}，警告 {len(report['warnings'])}")
+    print(f"测试结果已保存到: {results_file}")
+    print("=" * 60)
+
+    return 0 if report["success"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+评论测试的事件驱动等待工具
+
+用等待具体的 make-comment.ajax / comments.ajax / comment-vote.ajax 响应
+或 DOM 变化来代替固定的 sleep / wait_for_timeout / networkidle，
+同时记录每个步骤的实际耗时。同步（sync_api）和异步（async_api）页面都可以使用。
+"""
+
+import time
+from contextlib import contextmanager
+
+COMMENTS_API = "/api/comments.ajax"
+MAKE_COMMENT_API = "/api/make-comment.ajax"
+VOTE_API = "/api/comment-vote.ajax"
+EVENTS_API = "/api/comment-events.ajax"
+
+DEFAULT_TIMEOUT = 10000
+
+FIRST_COMMENT_SELECTOR = "article[id^='comment-']"
+# 评论区的 SSE 连接建立后，CommentsSection 把 data-realtime 设为 open
+REALTIME_READY_SELECTOR = "#comments-section[data-realtime='open']"
+
+COUNT_CHANGED_JS = "([selector, before]) => document.querySelectorAll(selector).length !== before"
+TEXT_VISIBLE_JS = "(text) => document.body && document.body.innerText.includes(text)"
+FIRST_RENDER_JS = "(selector) => document.querySelector(selector) ? performance.now() : false"
+# 第一条评论换成了另一条（翻页后列表已经显示新的一页），返回当时的 performance.now()
+PAGE_SWITCHED_JS = """([selector, before]) => {
+    const first = document.querySelector(selector);
+    return first && first.id !== before ? performance.now() : false;
+}"""
+
+
+class LatencyRecorder:
+    """记录每个步骤的墙钟耗时（毫秒）"""
+
+    def __init__(self):
+        self.steps = []
+
+    @contextmanager
+    def step(self, name):
+        record = {"name": name}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            self.steps.append(record)
+
+    def total_ms(self):
+        return round(sum(step["latency_ms"] for step in self.steps), 1)
+
+    def summary(self):
+        return {"steps": list(self.steps), "total_ms": self.total_ms()}
+
+
+def api_matcher(api_path, predicate=None):
+    """匹配指定 API 的响应，可附加额外条件（例如 URL 里的 page=2）"""
+    def matches(response):
+        if api_path not in response.url:
+            return False
+        return predicate(response) if predicate else True
+    return matches
+
+
+def wait_for_api(page, api_path, action, timeout=DEFAULT_TIMEOUT, predicate=None):
+    """执行 action（例如点击），并等待它触发的 API 响应返回"""
+    with page.expect_response(api_matcher(api_path, predicate), timeout=timeout) as response_info:
+        action()
+    return response_info.value
+
+
+async def async_wait_for_api(page, api_path, action, timeout=DEFAULT_TIMEOUT, predicate=None):
+    """wait_for_api 的异步版本，action 是一个返回 awaitable 的函数"""
+    async with page.expect_response(api_matcher(api_path, predicate), timeout=timeout) as response_info:
+        await action()
+    return await response_info.value
+
+
+def goto_and_wait_for_comments(page, url, timeout=DEFAULT_TIMEOUT * 3):
+    """打开页面并等待首屏的 comments.ajax 返回，返回 (页面响应, 评论接口响应)"""
+    with page.expect_response(api_matcher(COMMENTS_API), timeout=timeout) as comments_info:
+        response = page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    return response, comments_info.value
+
+
+async def async_goto_and_wait_for_comments(page, url, timeout=DEFAULT_TIMEOUT * 3):
+    async with page.expect_response(api_matcher(COMMENTS_API), timeout=timeout) as comments_info:
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+    return response, await comments_info.value
+
+
+def wait_for_count_change(page, selector, before, timeout=DEFAULT_TIMEOUT):
+    """等待匹配 selector 的节点数量发生变化（DOM 变化），超时返回 False"""
+    try:
+        page.wait_for_function(COUNT_CHANGED_JS, arg=[selector, before], timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+async def async_wait_for_count_change(page, selector, before, timeout=DEFAULT_TIMEOUT):
+    try:
+        await page.wait_for_function(COUNT_CHANGED_JS, arg=[selector, before], timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+def wait_for_text(page, text, timeout=DEFAULT_TIMEOUT):
+    """等待页面出现指定文本，超时返回 False"""
+    try:
+        page.wait_for_function(TEXT_VISIBLE_JS, arg=text, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+async def async_wait_for_text(page, text, timeout=DEFAULT_TIMEOUT):
+    try:
+        await page.wait_for_function(TEXT_VISIBLE_JS, arg=text, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+def wait_for_first_comment(page, selector=FIRST_COMMENT_SELECTOR, timeout=DEFAULT_TIMEOUT):
+    """等待第一条评论渲染，返回相对导航开始的毫秒数；超时返回 None"""
+    try:
+        handle = page.wait_for_function(FIRST_RENDER_JS, arg=selector, timeout=timeout)
+        return round(handle.json_value(), 1)
+    except Exception:
+        return None
+
+
+async def async_wait_for_first_comment(page, selector=FIRST_COMMENT_SELECTOR, timeout=DEFAULT_TIMEOUT):
+    try:
+        handle = await page.wait_for_function(FIRST_RENDER_JS, arg=selector, timeout=timeout)
+        return round(await handle.json_value(), 1)
+    except Exception:
+        return None
+
+
+def measure_page_switch(page, action, selector=FIRST_COMMENT_SELECTOR, timeout=DEFAULT_TIMEOUT):
+    """执行 action（例如点“Next”），返回列表换成另一页所用的毫秒数（浏览器时钟，不含 Playwright 的往返）；超时返回 None"""
+    before = page.eval_on_selector(selector, "el => el.id")
+    started = page.evaluate("performance.now()")
+    action()
+    try:
+        handle = page.wait_for_function(PAGE_SWITCHED_JS, arg=[selector, before], timeout=timeout)
+        return round(handle.json_value() - started, 1)
+    except Exception:
+        return None
+
+
+async def async_measure_page_switch(page, action, selector=FIRST_COMMENT_SELECTOR, timeout=DEFAULT_TIMEOUT):
+    before = await page.eval_on_selector(selector, "el => el.id")
+    started = await page.evaluate("performance.now()")
+    await action()
+    try:
+        handle = await page.wait_for_function(PAGE_SWITCHED_JS, arg=[selector, before], timeout=timeout)
+        return round(await handle.json_value() - started, 1)
+    except Exception:
+        return None
+
+
+async def async_wait_for_realtime(page, timeout=DEFAULT_TIMEOUT):
+    """等待评论推送连接建立，超时返回 False"""
+    try:
+        await page.wait_for_selector(REALTIME_READY_SELECTOR, timeout=timeout)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,926 @@
+#!/usr/bin/env python3
+"""
+评论接口压测工具
+
+用 asyncio + httpx 对 comments.ajax / make-comment.ajax / comment-vote.ajax
+按可配置的读/写/投票比例施压，按接口统计 p50/p95/p99 延迟、吞吐量和错误率。
+加 --json 输出机器可读的结果，便于长期跟踪。接口返回 Server-Timing 头时，
+同时汇总服务端各阶段（parse / db / count / serialize ...）的 p50/p95，区分网络和服务端耗时。
+
+    python comments_loadgen.py mix --concurrency 50 --duration 30 --mix read=90,write=5,vote=5
+    python comments_loadgen.py mix --json --output loadgen.json
+    python comments_loadgen.py deep-page --pages 1,10,100,1000 --sorts newest,popular
+    python comments_loadgen.py vote-race --votes 1000
+    python comments_loadgen.py write-path --comments 1000 --modes sync,queued
+    python comments_loadgen.py compare --baseline-url http://localhost:3001 --samples 200
+    python comments_loadgen.py homepage --samples 200 --baseline-url http://localhost:3001
+    python comments_loadgen.py abuse --duration 15 --rate 20 --abuse-concurrency 50
+
+写接口按 IP 限流、投票按 (评论, 投票 cookie) 去重，压测发出的每个写请求都带上不同的
+X-Forwarded-For、不保存服务器下发的 cookie，模拟不同的用户；abuse 模式另外用一个固定的 IP 刷写接口，
+检查正常流量的延迟是否受影响。服务端只在设置了 COMMENTS_TRUSTED_PROXY_HOPS 时才读 X-Forwarded-For，
+直连本地服务压测写接口时用 COMMENTS_TRUSTED_PROXY_HOPS=1 启动。
+"""
+
+import argparse
+import asyncio
+import itertools
+import http.cookiejar
+import json
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime
+
+import httpx
+
+from perf_trace import parse_server_timing
+
+DEFAULT_BASE_URL = "http://localhost:3000"
+DEFAULT_GAME_ID = "steal-brainrot"
+
+COMMENTS_API = "/api/comments.ajax"
+MAKE_COMMENT_API = "/api/make-comment.ajax"
+VOTE_API = "/api/comment-vote.ajax"
+CACHE_STATS_API = "/api/comments-cache.ajax"
+STATUS_API = "/api/comment-status.ajax"
+
+SORTS = ("newest", "oldest", "popular")
+
+# 刷写客户端的固定地址（TEST-NET-3 文档保留段，不会和模拟用户的 10.x 地址冲突）
+ABUSER_IP = "203.0.113.66"
+
+_user_ids = itertools.count(1)
+
+
+def simulated_user():
+    """新的模拟用户，返回 (请求头, 邮箱)"""
+    index = next(_user_ids)
+    ip = f"10.{index >> 16 & 255}.{index >> 8 & 255}.{index & 255}"
+    return {"X-Forwarded-For": ip}, f"loadgen+{index}@example.com"
+
+
+class _RejectCookies(http.cookiejar.DefaultCookiePolicy):
+    def set_ok(self, cookie, request):
+        return False
+
+
+def no_cookies():
+    """不保存任何 cookie 的 cookie jar：同一个 client 发出的请求不会带上前一个模拟用户的投票 cookie"""
+    return http.cookiejar.CookieJar(policy=_RejectCookies())
+
+
+def percentile(values, pct):
+    """最近秩法计算百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class EndpointStats:
+    """单个接口的延迟和错误统计"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.errors = 0
+        self.status_codes = {}
+        self.server_timing = {}
+
+    def record(self, latency_ms, status=None, ok=True, server_timing=None):
+        self.latencies.append(latency_ms)
+        key = str(status) if status is not None else "exception"
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if not ok:
+            self.errors += 1
+        for phase, duration in (server_timing or {}).items():
+            self.server_timing.setdefault(phase, []).append(duration)
+
+    def summary(self, elapsed):
+        count = len(self.latencies)
+        return {
+            "endpoint": self.name,
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / count, 4) if count else 0,
+            "throughput_rps": round(count / elapsed, 2) if elapsed else 0,
+            "latency_ms": {
+                "min": round(min(self.latencies), 1) if count else None,
+                "mean": round(sum(self.latencies) / count, 1) if count else None,
+                "p50": _round(percentile(self.latencies, 50)),
+                "p95": _round(percentile(self.latencies, 95)),
+                "p99": _round(percentile(self.latencies, 99)),
+                "max": round(max(self.latencies), 1) if count else None
+            },
+            "status_codes": self.status_codes,
+            "server_timing_ms": {
+                phase: {"p50": _round(percentile(values, 50)), "p95": _round(percentile(values, 95))}
+                for phase, values in self.server_timing.items()
+            }
+        }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+class LoadStats:
+    """按接口汇总的统计集合"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def endpoint(self, name):
+        if name not in self.endpoints:
+            self.endpoints[name] = EndpointStats(name)
+        return self.endpoints[name]
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def report(self, **meta):
+        return {
+            "test_time": datetime.now().isoformat(),
+            **meta,
+            "elapsed_s": round(self.elapsed, 2),
+            "endpoints": {name: stats.summary(self.elapsed) for name, stats in self.endpoints.items()}
+        }
+
+
+async def timed_request(client, stats, name, method, url, ok=None, **kwargs):
+    """发出一个请求并记录耗时；返回 (response, payload)，异常时返回 (None, None)"""
+    started = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        stats.endpoint(name).record((time.perf_counter() - started) * 1000, ok=False)
+        return None, None
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    payload = None
+    if response.headers.get("content-type", "").startswith("application/json"):
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = None
+
+    success = response.status_code < 400 and (payload is None or payload.get("success", True) is not False)
+    if ok is not None:
+        success = ok(response, payload)
+    server_timing = parse_server_timing(response.headers.get("server-timing"))
+    stats.endpoint(name).record(latency_ms, response.status_code, success, server_timing)
+    return response, payload
+
+
+async def fetch_cache_stats(client):
+    """抓取 comments-cache.ajax 的命中计数，接口不存在或出错时返回 None"""
+    try:
+        response = await client.get(CACHE_STATS_API)
+        return response.json()["cache"] if response.status_code == 200 else None
+    except (httpx.HTTPError, ValueError, KeyError):
+        return None
+
+
+def cache_delta(before, after):
+    """两次抓取之间的命中/未命中增量（计数是进程级的，多实例部署时只反映其中一个实例）"""
+    if not before or not after:
+        return None
+    delta = {key: after[key] - before[key] for key in ("hits", "sharedHits", "misses", "invalidations", "evictions")}
+    lookups = delta["hits"] + delta["sharedHits"] + delta["misses"]
+    delta["hit_rate"] = round((delta["hits"] + delta["sharedHits"]) / lookups, 4) if lookups else 0
+    delta["size"] = after["size"]
+    return delta
+
+
+def parse_mix(value):
+    """解析 read=90,write=5,vote=5 形式的比例"""
+    weights = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        key, _, weight = part.partition("=")
+        key = key.strip()
+        if key not in ("read", "write", "vote"):
+            raise argparse.ArgumentTypeError(f"未知操作: {key}")
+        weights[key] = float(weight or 1)
+    if not weights or sum(weights.values()) <= 0:
+        raise argparse.ArgumentTypeError("比例不能全为 0")
+    return weights
+
+
+def parse_sorts(value):
+    """解析 newest,popular 形式的排序列表"""
+    sorts = [sort.strip() for sort in value.split(",") if sort.strip()]
+    unknown = [sort for sort in sorts if sort not in SORTS]
+    if unknown or not sorts:
+        raise argparse.ArgumentTypeError(f"未知排序: {', '.join(unknown) or value}（可选 {', '.join(SORTS)}）")
+    return sorts
+
+
+class CommentWorkload:
+    """读/写/投票三种操作"""
+
+    def __init__(self, client, stats, args, prefix=""):
+        self.client = client
+        self.stats = stats
+        self.args = args
+        # 统计项名称的前缀，abuse 模式用来区分基线和刷写两个阶段
+        self.prefix = prefix
+        self.comment_ids = []
+        self.sequence = 0
+
+    async def read(self):
+        params = {
+            "game_id": self.args.game_id,
+            "page": random.randint(1, self.args.max_page),
+            "limit": self.args.limit,
+            "sort": random.choice(self.args.sorts)
+        }
+        _, payload = await timed_request(
+            self.client, self.stats, f"{self.prefix}comments.ajax", "GET", COMMENTS_API, params=params
+        )
+        if payload and payload.get("comments"):
+            for comment in payload["comments"]:
+                if comment["id"] not in self.comment_ids:
+                    self.comment_ids.append(comment["id"])
+
+    async def write(self):
+        self.sequence += 1
+        headers, email = simulated_user()
+        body = {
+            "author": "Loadgen",
+            "email": email,
+            "content": f"loadgen comment #{self.sequence} {time.time():.3f}",
+            "parent_id": 0,
+            "game_id": self.args.game_id
+        }
+        _, payload = await timed_request(
+            self.client, self.stats, f"{self.prefix}make-comment.ajax", "POST", MAKE_COMMENT_API,
+            headers=headers, json=body
+        )
+        # 排队写入模式只返回提交 id
+        if payload and payload.get("comment"):
+            self.comment_ids.append(payload["comment"]["id"])
+
+    async def vote(self):
+        if not self.comment_ids:
+            await self.read()
+            if not self.comment_ids:
+                return
+        body = {
+            "comment_id": random.choice(self.comment_ids),
+            "vote_type": "like" if random.random() < 0.8 else "dislike"
+        }
+        headers, _ = simulated_user()
+        await timed_request(
+            self.client, self.stats, f"{self.prefix}comment-vote.ajax", "POST", VOTE_API, headers=headers, json=body
+        )
+
+
+async def run_mix(args):
+    stats = LoadStats()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits, cookies=no_cookies()) as client:
+        workload = CommentWorkload(client, stats, args)
+        await workload.read()  # 预热，并取得可投票的评论 id
+        stats = workload.stats = LoadStats()
+        cache_before = await fetch_cache_stats(client)
+
+        operations = list(args.mix)
+        weights = [args.mix[op] for op in operations]
+        deadline = time.perf_counter() + args.duration
+        remaining = [args.requests] if args.requests else None
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                if remaining is not None:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                operation = random.choices(operations, weights)[0]
+                await getattr(workload, operation)()
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        stats.stop()
+        cache = cache_delta(cache_before, await fetch_cache_stats(client))
+
+    return stats.report(
+        mode="mix",
+        base_url=args.base_url,
+        game_id=args.game_id,
+        concurrency=args.concurrency,
+        mix=args.mix,
+        cache=cache
+    )
+
+
+async def sample_endpoint(client, stats, name, params, samples, concurrency):
+    """对同一个 URL 重复请求 samples 次，记录到 stats[name]"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await timed_request(client, stats, name, "GET", COMMENTS_API, params=params)
+
+    await asyncio.gather(*(one() for _ in range(samples)))
+
+
+async def walk_cursors(client, base_params, pages):
+    """沿着 nextCursor 顺序翻页，返回 {页码: 游标}"""
+    cursors = {1: ""}
+    cursor = ""
+    for page in range(1, max(pages)):
+        response = await client.get(COMMENTS_API, params={**base_params, "cursor": cursor})
+        cursor = response.json().get("pagination", {}).get("nextCursor")
+        if not cursor:
+            print(f"⚠ 第 {page} 页之后没有更多评论，游标模式只测到这里")
+            break
+        if page + 1 in pages:
+            cursors[page + 1] = cursor
+    return cursors
+
+
+async def run_deep_page(args):
+    """比较 page/offset 分页与游标分页在不同深度的延迟；给出多个排序时逐个测量，接口名带上排序前缀"""
+    stats = LoadStats()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        for sort in args.sorts:
+            prefix = f"{sort} " if len(args.sorts) > 1 else ""
+            base_params = {"game_id": args.game_id, "limit": args.limit, "sort": sort}
+            cursors = await walk_cursors(client, base_params, args.pages)
+            for page in args.pages:
+                await sample_endpoint(client, stats, f"{prefix}offset page {page}", {**base_params, "page": page}, args.samples, args.concurrency)
+                if page in cursors:
+                    await sample_endpoint(client, stats, f"{prefix}cursor page {page}", {**base_params, "cursor": cursors[page]}, args.samples, args.concurrency)
+        stats.stop()
+
+    return stats.report(
+        mode="deep-page",
+        base_url=args.base_url,
+        game_id=args.game_id,
+        sorts=args.sorts,
+        pages=args.pages,
+        samples=args.samples
+    )
+
+
+async def run_vote_race(args):
+    """并发发出 N 个点赞，校验最终计数精确等于 初始值 + N"""
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits, cookies=no_cookies()) as client:
+        comment_id = args.comment_id
+        if comment_id is None:
+            headers, email = simulated_user()
+            response = await client.post(MAKE_COMMENT_API, headers=headers, json={
+                "author": "Loadgen",
+                "email": email,
+                "content": f"vote race target {time.time():.3f}",
+                "parent_id": 0,
+                "game_id": args.game_id
+            })
+            comment_id = response.json()["comment"]["id"]
+
+        # 先投一个 dislike 读出当前的点赞数，不影响被测的 like 计数；每一票都来自不同的模拟用户，不会被去重
+        baseline = (await client.post(
+            VOTE_API, headers=simulated_user()[0], json={"comment_id": comment_id, "vote_type": "dislike"}
+        )).json()
+        initial = baseline["counts"]["like"]
+
+        stats = LoadStats()
+        semaphore = asyncio.Semaphore(args.concurrency)
+        returned = []
+
+        async def like():
+            async with semaphore:
+                _, payload = await timed_request(
+                    client, stats, "comment-vote.ajax", "POST", VOTE_API,
+                    headers=simulated_user()[0], json={"comment_id": comment_id, "vote_type": "like"}
+                )
+                if payload and payload.get("success"):
+                    returned.append(payload["counts"]["like"])
+
+        await asyncio.gather(*(like() for _ in range(args.votes)))
+        stats.stop()
+
+        final = (await client.post(
+            VOTE_API, headers=simulated_user()[0], json={"comment_id": comment_id, "vote_type": "dislike"}
+        )).json()["counts"]["like"]
+
+    expected = initial + args.votes
+    # 原子自增时每个请求拿到的计数互不相同，且正好覆盖 initial+1 .. initial+N
+    exact = final == expected and sorted(returned) == list(range(initial + 1, expected + 1))
+    return stats.report(
+        mode="vote-race",
+        base_url=args.base_url,
+        comment_id=comment_id,
+        votes=args.votes,
+        initial_likes=initial,
+        expected_likes=expected,
+        final_likes=final,
+        lost_updates=expected - final,
+        exact=exact
+    )
+
+
+class WritePathRun:
+    """一种写入模式的一轮测量：提交评论，排队模式下轮询提交状态直到离开 queued"""
+
+    def __init__(self, client, stats, mode, args):
+        self.client = client
+        self.stats = stats
+        self.mode = mode
+        self.args = args
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.waiting = {}  # 提交 id -> 提交开始时间
+        self.latencies = []
+        self.statuses = {}
+        self.visible_at = []
+        self.submitting = True
+
+    def finish(self, started, state):
+        now = time.perf_counter()
+        self.statuses[state] = self.statuses.get(state, 0) + 1
+        if started is not None:
+            self.latencies.append((now - started) * 1000)
+            self.visible_at.append(now)
+
+    async def submit(self, index):
+        headers, email = simulated_user()
+        body = {
+            "author": "Loadgen",
+            "email": email,
+            "content": f"write-path {self.mode} comment #{index} {time.time():.3f}",
+            "parent_id": 0,
+            "game_id": self.args.game_id
+        }
+        async with self.semaphore:
+            started = time.perf_counter()
+            _, payload = await timed_request(
+                self.client, self.stats, f"{self.mode} submit", "POST", MAKE_COMMENT_API,
+                params={"mode": self.mode}, headers={**headers, "Authorization": f"Bearer {self.args.token}"}, json=body
+            )
+        if not payload or not payload.get("success"):
+            self.finish(None, "failed")
+        elif payload.get("queued"):
+            self.waiting[payload["submission"]["id"]] = started
+        else:
+            # 同步模式返回时已经写入并失效了缓存
+            self.finish(started, payload["comment"]["status"])
+
+    async def poll(self, submission_id):
+        async with self.semaphore:
+            _, payload = await timed_request(
+                self.client, self.stats, f"{self.mode} status", "GET", STATUS_API, params={"id": submission_id}
+            )
+        state = (payload or {}).get("submission", {}).get("status")
+        started = self.waiting.get(submission_id)
+        if state and state != "queued" and started is not None:
+            del self.waiting[submission_id]
+            self.finish(started, state)
+        elif started is not None and time.perf_counter() - started > self.args.visible_timeout:
+            del self.waiting[submission_id]
+            self.finish(None, "timeout")
+
+    async def watch(self):
+        """与提交并行运行：每隔 --poll-interval 查询一遍所有还在排队的提交"""
+        while self.submitting or self.waiting:
+            await asyncio.sleep(self.args.poll_interval)
+            await asyncio.gather(*(self.poll(submission_id) for submission_id in list(self.waiting)))
+
+    async def run(self):
+        started = time.perf_counter()
+        watcher = asyncio.create_task(self.watch())
+        await asyncio.gather(*(self.submit(index) for index in range(self.args.comments)))
+        self.submitting = False
+        await watcher
+        elapsed = (max(self.visible_at) - started) if self.visible_at else None
+        return {
+            "comments": self.args.comments,
+            "statuses": self.statuses,
+            "submit_to_visible_ms": {
+                "p50": _round(percentile(self.latencies, 50)),
+                "p95": _round(percentile(self.latencies, 95)),
+                "max": _round(max(self.latencies)) if self.latencies else None
+            },
+            "inserts_per_s": round(len(self.visible_at) / elapsed, 1) if elapsed else 0
+        }
+
+
+async def run_write_path(args):
+    """比较同步写入和排队写入：提交延迟、提交到可见的延迟和持续写入吞吐量"""
+    if not args.token:
+        raise SystemExit("❌ write-path 用 ?mode= 切换写入方式，需要管理令牌：设置 COMMENTS_ADMIN_TOKEN 或使用 --token")
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    stats = LoadStats()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits, cookies=no_cookies()) as client:
+        results = {mode: await WritePathRun(client, stats, mode, args).run() for mode in args.modes}
+        stats.stop()
+
+    report = stats.report(
+        mode="write-path",
+        base_url=args.base_url,
+        game_id=args.game_id,
+        concurrency=args.concurrency,
+        poll_interval_s=args.poll_interval
+    )
+    report["write_path"] = results
+    report["failed_writes"] = sum(
+        count for result in results.values() for state, count in result["statuses"].items() if state in ("failed", "timeout")
+    )
+    return report
+
+
+async def legit_traffic(workload, args, deadline):
+    """按 --rate 匀速发出正常用户的请求；开环发送，接口变慢时不会跟着少发，排队延迟也能体现在统计里"""
+    operations = list(args.mix)
+    weights = [args.mix[op] for op in operations]
+    interval = 1 / args.rate
+    tasks = []
+    next_at = time.perf_counter()
+    while next_at < deadline:
+        tasks.append(asyncio.create_task(getattr(workload, random.choices(operations, weights)[0])()))
+        next_at += interval
+        await asyncio.sleep(max(0, next_at - time.perf_counter()))
+    await asyncio.gather(*tasks)
+
+
+async def flood(client, stats, args, comment_id, deadline):
+    """刷写客户端的一个连接：固定的 IP 和邮箱，交替发评论、给同一条评论点赞。
+    429 / 409 是期望的拒绝，只有 5xx 和连接错误算作错误"""
+    headers = {"X-Forwarded-For": ABUSER_IP}
+    handled = lambda response, payload: response.status_code < 500
+    sequence = 0
+    while time.perf_counter() < deadline:
+        sequence += 1
+        await timed_request(
+            client, stats, "abuser make-comment.ajax", "POST", MAKE_COMMENT_API, ok=handled, headers=headers,
+            json={
+                "author": "Flood",
+                "email": "flood@example.com",
+                "content": f"flood #{sequence} {time.time():.6f}",
+                "parent_id": 0,
+                "game_id": args.game_id
+            }
+        )
+        await timed_request(
+            client, stats, "abuser comment-vote.ajax", "POST", VOTE_API, ok=handled, headers=headers,
+            json={"comment_id": comment_id, "vote_type": "like"}
+        )
+
+
+def abuse_verdict(report, args):
+    """比较刷写前后正常请求的 p95：涨幅同时超过 --max-increase-pct 和 --min-increase-ms 时判定为被拖慢"""
+    rows = []
+    for endpoint in ("comments.ajax", "make-comment.ajax", "comment-vote.ajax"):
+        before = report["endpoints"].get(f"baseline {endpoint}")
+        after = report["endpoints"].get(f"flood {endpoint}")
+        if not before or not after or before["latency_ms"]["p95"] is None or after["latency_ms"]["p95"] is None:
+            continue
+        baseline_p95, flood_p95 = before["latency_ms"]["p95"], after["latency_ms"]["p95"]
+        increase_pct = (flood_p95 - baseline_p95) / baseline_p95 * 100 if baseline_p95 else 0
+        rows.append({
+            "endpoint": endpoint,
+            "baseline_p95": baseline_p95,
+            "flood_p95": flood_p95,
+            "increase_pct": round(increase_pct, 1),
+            "degraded": flood_p95 - baseline_p95 > args.min_increase_ms and increase_pct > args.max_increase_pct
+        })
+
+    abuser = {}
+    for endpoint in ("make-comment.ajax", "comment-vote.ajax"):
+        codes = report["endpoints"].get(f"abuser {endpoint}", {}).get("status_codes", {})
+        abuser[endpoint] = {
+            "requests": sum(codes.values()),
+            "accepted": sum(count for code, count in codes.items() if code.startswith("2")),
+            "rate_limited": codes.get("429", 0),
+            "duplicates": codes.get("409", 0)
+        }
+    return rows, abuser
+
+
+async def run_abuse(args):
+    """先只发正常流量测出基线，再在同样的正常流量下加上一个刷写接口的客户端，比较正常请求的延迟"""
+    legit_limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    abuse_limits = httpx.Limits(max_connections=args.abuse_concurrency, max_keepalive_connections=args.abuse_concurrency)
+    # 两边各用一个连接池，刷写的请求不会占用正常流量在客户端这一侧的连接
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=legit_limits, cookies=no_cookies()) as client, \
+            httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=abuse_limits, cookies=no_cookies()) as abuse_client:
+        workload = CommentWorkload(client, LoadStats(), args)
+        await workload.read()  # 预热，并取得可投票的评论 id
+        if not workload.comment_ids:
+            await workload.write()
+        if not workload.comment_ids:
+            raise RuntimeError("没有可投票的评论，且新建评论失败")
+        target = workload.comment_ids[0]
+        stats = workload.stats = LoadStats()
+
+        print(f"⏱ 基线阶段: 正常流量 {args.rate:g} 次/秒，{args.duration:g}s")
+        workload.prefix = "baseline "
+        await legit_traffic(workload, args, time.perf_counter() + args.duration)
+
+        print(f"🔥 刷写阶段: 同样的正常流量 + {args.abuse_concurrency} 个连接从 {ABUSER_IP} 刷写，{args.duration:g}s")
+        workload.prefix = "flood "
+        deadline = time.perf_counter() + args.duration
+        await asyncio.gather(
+            legit_traffic(workload, args, deadline),
+            *(flood(abuse_client, stats, args, target, deadline) for _ in range(args.abuse_concurrency))
+        )
+        stats.stop()
+
+    report = stats.report(
+        mode="abuse",
+        base_url=args.base_url,
+        game_id=args.game_id,
+        rate=args.rate,
+        phase_duration_s=args.duration,
+        abuse_concurrency=args.abuse_concurrency,
+        mix=args.mix
+    )
+    rows, abuser = abuse_verdict(report, args)
+    report["abuse"] = {
+        "legit_p95": rows,
+        "abuser": abuser,
+        "max_increase_pct": args.max_increase_pct,
+        "min_increase_ms": args.min_increase_ms
+    }
+    report["degraded"] = [row["endpoint"] for row in rows if row["degraded"]]
+    return report
+
+
+def latency_delta(report, baseline, candidate):
+    """candidate 与 baseline 两个统计项的 p50/p95/p99 之差（毫秒，负数表示变快）"""
+    before = report["endpoints"][baseline]["latency_ms"]
+    after = report["endpoints"][candidate]["latency_ms"]
+    return {
+        key: _round(after[key] - before[key]) if after[key] is not None and before[key] is not None else None
+        for key in ("p50", "p95", "p99")
+    }
+
+
+async def run_compare(args):
+    """把同一组读请求交替发给 baseline 和 candidate，比较改动前后的延迟"""
+    targets = {"baseline": args.baseline_url, "candidate": args.base_url}
+    samples = [
+        {"game_id": args.game_id, "page": random.randint(1, args.max_page), "limit": args.limit, "sort": random.choice(SORTS)}
+        for _ in range(args.samples)
+    ]
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=targets["baseline"], timeout=args.timeout) as baseline, \
+            httpx.AsyncClient(base_url=targets["candidate"], timeout=args.timeout) as candidate:
+        clients = {"baseline": baseline, "candidate": candidate}
+
+        async def one(params):
+            async with semaphore:
+                # 随机先后顺序，避免某一边总是吃到冷缓存
+                for name in random.sample(list(clients), len(clients)):
+                    await timed_request(clients[name], stats, f"{name} comments.ajax", "GET", COMMENTS_API, params=params)
+
+        await asyncio.gather(*(one(params) for params in samples))
+        stats.stop()
+
+    report = stats.report(
+        mode="compare",
+        base_url=args.base_url,
+        baseline_url=args.baseline_url,
+        game_id=args.game_id,
+        samples=args.samples
+    )
+    report["delta_ms"] = latency_delta(report, "baseline comments.ajax", "candidate comments.ajax")
+    return report
+
+
+async def measure_page(client, stats, name, path):
+    """请求一个页面，分别记录首字节时间（响应头到达）和完整下载时间；
+    返回解压后的字节数和实际传输的字节数，请求失败时返回 None"""
+    started = time.perf_counter()
+    try:
+        async with client.stream("GET", path) as response:
+            ttfb_ms = (time.perf_counter() - started) * 1000
+            await response.aread()
+    except httpx.HTTPError:
+        stats.endpoint(f"{name} ttfb").record((time.perf_counter() - started) * 1000, ok=False)
+        return None
+    ok = response.status_code < 400
+    stats.endpoint(f"{name} ttfb").record(ttfb_ms, response.status_code, ok)
+    stats.endpoint(f"{name} total").record((time.perf_counter() - started) * 1000, response.status_code, ok)
+    return {"bytes": len(response.content), "wire_bytes": response.num_bytes_downloaded}
+
+
+async def run_homepage(args):
+    """测量首页 TTFB；给出 --baseline-url 时与改动前的部署交替请求并比较"""
+    targets = {"candidate": args.base_url}
+    if args.baseline_url:
+        targets["baseline"] = args.baseline_url
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    clients = {name: httpx.AsyncClient(base_url=url, timeout=args.timeout) for name, url in targets.items()}
+    try:
+        # 预热：第一次请求包含编译/冷启动，不计入统计
+        for client in clients.values():
+            await client.get(args.path)
+
+        async def one():
+            async with semaphore:
+                for name in random.sample(list(clients), len(clients)):
+                    label = name if args.baseline_url else "homepage"
+                    await measure_page(clients[name], stats, label, args.path)
+
+        await asyncio.gather(*(one() for _ in range(args.samples)))
+        stats.stop()
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+    report = stats.report(
+        mode="homepage",
+        base_url=args.base_url,
+        baseline_url=args.baseline_url,
+        path=args.path,
+        samples=args.samples
+    )
+    if args.baseline_url:
+        report["delta_ms"] = latency_delta(report, "baseline ttfb", "candidate ttfb")
+    return report
+
+
+def print_report(report):
+    print("=" * 72)
+    print(f"{report['base_url']}  模式: {report['mode']}  耗时: {report['elapsed_s']}s")
+    print("=" * 72)
+    print(f"{'接口':<22}{'请求':>8}{'错误率':>9}{'RPS':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for summary in report["endpoints"].values():
+        latency = summary["latency_ms"]
+        print(
+            f"{summary['endpoint']:<22}{summary['requests']:>8}"
+            f"{summary['error_rate'] * 100:>8.1f}%{summary['throughput_rps']:>9}"
+            f"{_fmt(latency['p50'])}{_fmt(latency['p95'])}{_fmt(latency['p99'])}"
+        )
+    if "delta_ms" in report:
+        delta = report["delta_ms"]
+        print(f"{'candidate - baseline':<48}{_fmt(delta['p50'])}{_fmt(delta['p95'])}{_fmt(delta['p99'])}")
+    phases = [(summary["endpoint"], summary.get("server_timing_ms", {})) for summary in report["endpoints"].values()]
+    if any(timing for _, timing in phases):
+        print(f"\n{'服务端阶段 (Server-Timing)':<40}{'p50':>9}{'p95':>9}")
+        for endpoint, timing in phases:
+            for phase, values in timing.items():
+                print(f"{endpoint + ' ' + phase:<40}{_fmt(values['p50'])}{_fmt(values['p95'])}")
+    write_path = report.get("write_path")
+    if write_path:
+        print(f"\n{'写入模式':<12}{'提交→可见 p50':>16}{'p95':>9}{'max':>9}{'条/秒':>9}  状态")
+        for mode, result in write_path.items():
+            latency = result["submit_to_visible_ms"]
+            statuses = ", ".join(f"{state} {count}" for state, count in result["statuses"].items())
+            print(
+                f"{mode:<12}{_fmt(latency['p50']):>16}{_fmt(latency['p95'])}{_fmt(latency['max'])}"
+                f"{result['inserts_per_s']:>9}  {statuses}"
+            )
+    abuse = report.get("abuse")
+    if abuse:
+        print(f"\n{'正常请求 p95':<22}{'基线':>9}{'刷写中':>9}{'涨幅':>9}")
+        for row in abuse["legit_p95"]:
+            print(
+                f"{row['endpoint']:<22}{_fmt(row['baseline_p95'])}{_fmt(row['flood_p95'])}"
+                f"{row['increase_pct']:>8}%{'  ❌' if row['degraded'] else ''}"
+            )
+        for endpoint, counts in abuse["abuser"].items():
+            print(
+                f"刷写 {endpoint}: {counts['requests']} 次，接受 {counts['accepted']}，"
+                f"限流 {counts['rate_limited']}，重复投票 {counts['duplicates']}"
+            )
+    cache = report.get("cache")
+    if cache:
+        print(
+            f"\n缓存: 命中 {cache['hits']}，共享命中 {cache['sharedHits']}，未命中 {cache['misses']}，"
+            f"命中率 {cache['hit_rate'] * 100:.1f}%，失效 {cache['invalidations']} 次"
+        )
+
+
+def _fmt(value):
+    return f"{value:>9}" if value is not None else f"{'-':>9}"
+
+
+def emit(report, args):
+    """按 --json / --output 输出报告"""
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if not args.json:
+            print(f"\n结果已保存到: {args.output}")
+
+
+def add_common_arguments(parser):
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="被测站点地址")
+    parser.add_argument("--game-id", default=DEFAULT_GAME_ID)
+    parser.add_argument("--concurrency", type=int, default=20, help="并发连接数")
+    parser.add_argument("--timeout", type=float, default=30.0, help="单个请求超时（秒）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    parser.add_argument("--output", default=None, help="把 JSON 结果写入文件")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="评论接口压测工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    mix = subparsers.add_parser("mix", help="按读/写/投票比例混合施压")
+    add_common_arguments(mix)
+    mix.add_argument("--duration", type=float, default=30.0, help="持续时间（秒）")
+    mix.add_argument("--requests", type=int, default=None, help="总请求数上限（优先于 --duration 结束）")
+    mix.add_argument("--mix", type=parse_mix, default=parse_mix("read=90,write=5,vote=5"), help="操作比例，如 read=90,write=5,vote=5")
+    mix.add_argument("--limit", type=int, default=5, help="每页评论数")
+    mix.add_argument("--max-page", type=int, default=5, help="随机读取的最大页码")
+    mix.add_argument("--sorts", type=parse_sorts, default=list(SORTS))
+    mix.set_defaults(handler=run_mix)
+
+    deep = subparsers.add_parser("deep-page", help="比较 offset 分页和游标分页在深页的延迟")
+    add_common_arguments(deep)
+    deep.add_argument("--pages", type=lambda v: sorted({int(p) for p in v.split(",")}), default=[1, 10, 100, 1000], help="要测量的页码")
+    deep.add_argument("--samples", type=int, default=50, help="每个页码的请求次数")
+    deep.add_argument("--limit", type=int, default=5)
+    deep.add_argument("--sorts", "--sort", type=parse_sorts, default=list(SORTS), help="逗号分隔的排序方式，默认三种都测")
+    deep.set_defaults(handler=run_deep_page, concurrency=5)
+
+    race = subparsers.add_parser("vote-race", help="并发点赞，校验计数没有丢失")
+    add_common_arguments(race)
+    race.add_argument("--votes", type=int, default=1000, help="并发点赞次数")
+    race.add_argument("--comment-id", type=int, default=None, help="目标评论 id，默认新建一条")
+    race.set_defaults(handler=run_vote_race, concurrency=100, game_id="loadgen-vote-race")
+
+    write_path = subparsers.add_parser("write-path", help="比较同步写入和排队写入的提交到可见延迟和写入吞吐量")
+    add_common_arguments(write_path)
+    write_path.add_argument("--comments", type=int, default=500, help="每种模式提交的评论数")
+    write_path.add_argument("--modes", type=lambda v: [m for m in v.split(",") if m in ("sync", "queued")], default=["sync", "queued"], help="要测量的写入模式")
+    write_path.add_argument("--poll-interval", type=float, default=0.05, help="排队模式轮询提交状态的间隔（秒）")
+    write_path.add_argument("--token", default=os.environ.get("COMMENTS_ADMIN_TOKEN"), help="管理令牌（?mode= 需要），默认读取 COMMENTS_ADMIN_TOKEN")
+    write_path.add_argument("--visible-timeout", type=float, default=30.0, help="等待评论可见的上限（秒）")
+    write_path.set_defaults(handler=run_write_path, concurrency=50, game_id="loadgen-write-path")
+
+    compare = subparsers.add_parser("compare", help="同一组读请求分别打到改动前后的两个部署，比较延迟")
+    add_common_arguments(compare)
+    compare.add_argument("--baseline-url", required=True, help="改动前的部署地址（--base-url 为改动后）")
+    compare.add_argument("--samples", type=int, default=200, help="读请求数量，每个请求两边各发一次")
+    compare.add_argument("--limit", type=int, default=5)
+    compare.add_argument("--max-page", type=int, default=5, help="随机读取的最大页码")
+    compare.set_defaults(handler=run_compare, concurrency=10)
+
+    homepage = subparsers.add_parser("homepage", help="测量首页 TTFB，可与改动前的部署比较")
+    add_common_arguments(homepage)
+    homepage.add_argument("--path", default="/", help="要测量的页面路径")
+    homepage.add_argument("--samples", type=int, default=200, help="请求次数")
+    homepage.add_argument("--baseline-url", default=None, help="改动前的部署地址（--base-url 为改动后）")
+    homepage.set_defaults(handler=run_homepage, concurrency=10)
+
+    abuse = subparsers.add_parser("abuse", help="一个客户端刷写接口时，检查正常流量的延迟是否保持稳定")
+    add_common_arguments(abuse)
+    abuse.add_argument("--duration", type=float, default=15.0, help="基线和刷写两个阶段各自的持续时间（秒）")
+    abuse.add_argument("--rate", type=float, default=20.0, help="正常流量的请求速率（次/秒）")
+    abuse.add_argument("--mix", type=parse_mix, default=parse_mix("read=80,write=10,vote=10"), help="正常流量的操作比例")
+    abuse.add_argument("--limit", type=int, default=5, help="每页评论数")
+    abuse.add_argument("--max-page", type=int, default=5, help="随机读取的最大页码")
+    abuse.add_argument("--sorts", type=parse_sorts, default=list(SORTS))
+    abuse.add_argument("--abuse-concurrency", type=int, default=50, help="刷写客户端的并发连接数（同一个 IP 和邮箱）")
+    abuse.add_argument("--max-increase-pct", type=float, default=20.0, help="刷写阶段正常请求 p95 允许的涨幅（%%）")
+    abuse.add_argument("--min-increase-ms", type=float, default=25.0, help="p95 涨幅小于这个毫秒数时不算被拖慢")
+    abuse.set_defaults(handler=run_abuse, concurrency=20, game_id="loadgen-abuse")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(args.handler(args))
+    emit(report, args)
+    failed = any(summary["errors"] for summary in report["endpoints"].values())
+    if report.get("exact") is False:
+        print(f"❌ 计数不精确: 期望 {report['expected_likes']}，实际 {report['final_likes']}")
+        failed = True
+    if report.get("degraded"):
+        print(f"❌ 刷写期间正常请求变慢: {', '.join(report['degraded'])}")
+        failed = True
+    abuser = report.get("abuse", {}).get("abuser", {})
+    if abuser and not any(counts["rate_limited"] for counts in abuser.values()):
+        print("⚠ 刷写客户端一次也没有被限流，服务端可能没有开启写接口限流")
+    if report.get("failed_writes"):
+        print(f"❌ {report['failed_writes']} 条评论写入失败或在 --visible-timeout 内没有可见")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,31 @@
 'use client'
 
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
+import {
+  fetchCommentPage,
+  invalidateCommentPages,
+  prefetchCommentPage,
+  readCommentPage,
+  updateCommentPages
+} from '@/lib/comments/client-cache'
+import {
+  applyVoteCounts,
+  insertPending,
+  nextPendingId,
+  settlePending,
+  shiftVote
+} from '@/lib/comments/optimistic'
 
 interface Comment {
   id: number
   author: string
   content: string
-  date: string
+  created_at: string
   like_count: number
   dislike_count: number
   parent_id: number
   replies?: Comment[]
+  pending?: boolean
 }
 
 interface CommentForm {
@@ -24,6 +39,8 @@ interface CommentsSystemProps {
   gameId?: string
 }
 
+const PAGE_SIZE = 5
+
 export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSystemProps) {
   const [comments, setComments] = useState<Comment[]>([])
   const [loading, setLoading] = useState(true)
@@ -33,6 +50,9 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
   const [sort, setSort] = useState<'newest' | 'oldest' | 'popular'>('newest')
   const [showForm, setShowForm] = useState(false)
   const [replyingTo, setReplyingTo] = useState<number | null>(null)
+  // 请求返回时用来判断是否仍是当前显示的页面
+  const viewRef = useRef({ gameId, page, sort })
+  viewRef.current = { gameId, page, sort }
 
   const [form, setForm] = useState<CommentForm>({
     author: '',
@@ -41,29 +61,38 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
     parent_id: 0
   })
 
-  // 加载评论
-  const loadComments = async () => {
-    try {
-      setLoading(true)
-      const response = await fetch(
-        `/api/comments.ajax?game_id=${gameId}&page=${page}&limit=5&sort=${sort}`
-      )
-      const data = await response.json()
+  // 当前列表和本游戏的所有缓存页一起更新
+  const mutateComments = useCallback((updater: (items: Comment[]) => Comment[]) => {
+    setComments(updater)
+    updateCommentPages<Comment>(gameId, updater)
+  }, [gameId])
+
+  // 加载评论：有缓存时立即显示，过期了再在后台重新请求；没有缓存时保留当前列表直到新的一页返回
+  const loadComments = useCallback(async (targetPage: number, targetSort: string) => {
+    const cached = readCommentPage<Comment>(gameId, targetPage, targetSort)
+    if (cached) {
+      setComments(cached.data.comments)
+      setTotalPages(cached.data.totalPages)
+    }
+    setLoading(!cached)
+    if (cached && !cached.stale) return
 
-      if (data.success) {
+    const isCurrent = () =>
+      viewRef.current.gameId === gameId && viewRef.current.page === targetPage && viewRef.current.sort === targetSort
+    try {
+      const data = await fetchCommentPage<Comment>(gameId, targetPage, targetSort, PAGE_SIZE)
+      if (isCurrent()) {
         setComments(data.comments)
-        setTotalPages(data.pagination.totalPages)
-      } else {
-        console.error('加载评论失败:', data.error)
+        setTotalPages(data.totalPages)
       }
     } catch (error) {
       console.error('加载评论错误:', error)
     } finally {
-      setLoading(false)
+      if (isCurrent()) setLoading(false)
     }
-  }
+  }, [gameId])
 
-  // 提交评论
+  // 提交评论：先插入占位评论，成功后换成服务器返回的评论，失败时撤销
   const submitComment = async (e: React.FormEvent) => {
     e.preventDefault()
 
@@ -79,6 +108,27 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
       return
     }
 
+    // 顶级评论只出现在“最新”排序的第一页
+    const isFirstNewestPage = (targetPage: number, targetSort: string) => targetPage === 1 && targetSort === 'newest'
+    const placeholder: Comment = {
+      id: nextPendingId(),
+      author: form.author,
+      content: form.content,
+      created_at: new Date().toISOString(),
+      like_count: 0,
+      dislike_count: 0,
+      parent_id: form.parent_id,
+      replies: [],
+      pending: true
+    }
+    const insert = (prev: Comment[]) => insertPending(prev, placeholder, PAGE_SIZE)
+    if (form.parent_id) {
+      mutateComments(insert)
+    } else {
+      updateCommentPages<Comment>(gameId, insert, isFirstNewestPage)
+      if (isFirstNewestPage(page, sort)) setComments(insert)
+    }
+
     try {
       setSubmitting(true)
       const response = await fetch('/api/make-comment.ajax', {
@@ -100,13 +150,27 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
         setShowForm(false)
         setReplyingTo(null)
 
-        // 重新加载评论
-        loadComments()
-        alert('评论提交成功！')
+        // 排队写入（202）时没有返回评论，占位评论保持待审核状态
+        if (data.comment) {
+          mutateComments(prev => settlePending(prev, placeholder.id, data.comment as Comment))
+        }
+        if (!form.parent_id) {
+          // 其它页整体后移一条；当前不在“最新”第一页时回到第一页
+          invalidateCommentPages(gameId)
+          if (!isFirstNewestPage(page, sort)) {
+            if (page === 1) {
+              loadComments(1, sort)
+            } else {
+              setPage(1)
+            }
+          }
+        }
       } else {
+        mutateComments(prev => settlePending(prev, placeholder.id, null))
         alert('提交失败: ' + data.error)
       }
     } catch (error) {
+      mutateComments(prev => settlePending(prev, placeholder.id, null))
       console.error('提交评论错误:', error)
       alert('提交失败，请重试')
     } finally {
@@ -114,8 +178,9 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
     }
   }
 
-  // 投票功能
+  // 投票功能：先把计数加一，接口返回后换成服务器的计数，失败时撤销
   const handleVote = async (commentId: number, voteType: 'like' | 'dislike') => {
+    mutateComments(prev => shiftVote(prev, commentId, voteType, 1))
     try {
       const response = await fetch('/api/comment-vote.ajax', {
         method: 'POST',
@@ -131,34 +196,13 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
       const data = await response.json()
 
       if (data.success) {
-        // 更新评论计数
-        setComments(prevComments =>
-          prevComments.map(comment => {
-            if (comment.id === commentId) {
-              return {
-                ...comment,
-                like_count: data.counts.like,
-                dislike_count: data.counts.dislike
-              }
-            }
-            // 更新回复中的计数
-            if (comment.replies) {
-              return {
-                ...comment,
-                replies: comment.replies.map(reply =>
-                  reply.id === commentId
-                    ? { ...reply, like_count: data.counts.like, dislike_count: data.counts.dislike }
-                    : reply
-                )
-              }
-            }
-            return comment
-          })
-        )
+        mutateComments(prev => applyVoteCounts(prev, commentId, data.counts.like, data.counts.dislike))
       } else {
+        mutateComments(prev => shiftVote(prev, commentId, voteType, -1))
         console.error('投票失败:', data.error)
       }
     } catch (error) {
+      mutateComments(prev => shiftVote(prev, commentId, voteType, -1))
       console.error('投票错误:', error)
     }
   }
@@ -170,18 +214,16 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
     setShowForm(true)
   }
 
-  // 页面加载时获取评论
+  // 页面加载、翻页、切换排序时获取评论
   useEffect(() => {
-    loadComments()
-  }, [gameId, page, sort])
+    loadComments(page, sort)
+  }, [loadComments, page, sort])
 
-  if (loading) {
-    return (
-      <div className="flex items-center justify-center py-8">
-        <div className="text-gray-600">加载评论中...</div>
-      </div>
-    )
-  }
+  // 浏览器空闲时预取下一页
+  useEffect(() => {
+    if (page >= totalPages) return
+    return prefetchCommentPage(gameId, page + 1, sort, PAGE_SIZE)
+  }, [gameId, page, sort, totalPages])
 
   return (
     <div className="comments-system max-w-4xl mx-auto p-4">
@@ -274,21 +316,25 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
         </div>
 
         {/* 评论列表 */}
-        <div className="p-6">
-          {comments.length === 0 ? (
+        <div className={`p-6 transition-opacity ${loading ? 'opacity-60' : ''}`} aria-busy={loading}>
+          {loading && comments.length === 0 ? (
+            <div className="flex items-center justify-center py-8">
+              <div className="text-gray-600">加载评论中...</div>
+            </div>
+          ) : comments.length === 0 ? (
             <div className="text-center py-8 text-gray-500">
               暂无评论，来发表第一条评论吧！
             </div>
           ) : (
             <div className="space-y-6">
               {comments.map((comment) => (
-                <div key={comment.id} className="border-b border-gray-100 last:border-b-0 pb-6 last:pb-0">
+                <div key={comment.id} className={`border-b border-gray-100 last:border-b-0 pb-6 last:pb-0 ${comment.pending ? 'opacity-60' : ''}`}>
                   <div className="flex items-start space-x-3">
                     <div className="flex-1">
                       <div className="flex items-center justify-between mb-2">
                         <div className="flex items-center space-x-2">
                           <span className="font-medium text-gray-900">{comment.author}</span>
-                          <span className="text-sm text-gray-500">{comment.date}</span>
+                          <span className="text-sm text-gray-500">{comment.pending ? '待发布' : new Date(comment.created_at).toLocaleDateString()}</span>
                         </div>
                       </div>
 
@@ -299,6 +345,7 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
                         <div className="flex items-center space-x-2">
                           <button
                             onClick={() => handleVote(comment.id, 'like')}
+                            disabled={comment.pending}
                             className="flex items-center space-x-1 px-3 py-1 text-sm rounded-full border border-gray-300 hover:bg-gray-50 transition-colors"
                           >
                             <span>👍</span>
@@ -306,6 +353,7 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
                           </button>
                           <button
                             onClick={() => handleVote(comment.id, 'dislike')}
+                            disabled={comment.pending}
                             className="flex items-center space-x-1 px-3 py-1 text-sm rounded-full border border-gray-300 hover:bg-gray-50 transition-colors"
                           >
                             <span>👎</span>
@@ -315,6 +363,7 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
 
                         <button
                           onClick={() => startReply(comment.id, comment.author)}
+                          disabled={comment.pending}
                           className="text-sm text-blue-600 hover:text-blue-700"
                         >
                           回复
@@ -325,13 +374,13 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
                       {comment.replies && comment.replies.length > 0 && (
                         <div className="mt-4 space-y-4 pl-6 border-l-2 border-gray-200">
                           {comment.replies.map((reply) => (
-                            <div key={reply.id}>
+                            <div key={reply.id} className={reply.pending ? 'opacity-60' : ''}>
                               <div className="flex items-start space-x-3">
                                 <div className="flex-1">
                                   <div className="flex items-center justify-between mb-2">
                                     <div className="flex items-center space-x-2">
                                       <span className="font-medium text-gray-900">{reply.author}</span>
-                                      <span className="text-sm text-gray-500">{reply.date}</span>
+                                      <span className="text-sm text-gray-500">{reply.pending ? '待发布' : new Date(reply.created_at).toLocaleDateString()}</span>
                                     </div>
                                   </div>
 
@@ -340,6 +389,7 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
                                   <div className="flex items-center space-x-2">
                                     <button
                                       onClick={() => handleVote(reply.id, 'like')}
+                                      disabled={reply.pending}
                                       className="flex items-center space-x-1 px-2 py-1 text-sm rounded border border-gray-300 hover:bg-gray-50 transition-colors"
                                     >
                                       <span>👍</span>
@@ -347,6 +397,7 @@ export default function CommentsSystem({ gameId = 'steal-brainrot' }: CommentsSy
                                     </button>
                                     <button
                                       onClick={() => handleVote(reply.id, 'dislike')}
+                                      disabled={reply.pending}
                                       className="flex items-center space-x-1 px-2 py-1 text-sm rounded border border-gray-300 hover:bg-gray-50 transition-colors"
                                     >
                                       <span>👎</span>
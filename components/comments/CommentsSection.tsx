@@ -1,39 +1,60 @@
 "use client";
 
-import { useCallback, useEffect, useMemo, useState } from "react";
+import { useCallback, useEffect, useMemo, useRef, useState } from "react";
 import type { FormEvent } from "react";
+import {
+  fetchCommentPage,
+  invalidateCommentPages,
+  prefetchCommentPage,
+  readCommentPage,
+  updateCommentPages
+} from "@/lib/comments/client-cache";
+import {
+  applyVoteCounts,
+  insertPending,
+  nextPendingId,
+  settlePending,
+  shiftVote,
+  upsertComment
+} from "@/lib/comments/optimistic";
 
 interface CommentItem {
   id: number;
   author: string;
   content: string;
-  date: string;
+  created_at: string;
   like_count: number;
   dislike_count: number;
   parent_id: number;
   replies?: CommentItem[];
-}
-
-interface ApiResponse {
-  success: boolean;
-  comments: CommentItem[];
-  pagination: {
-    page: number;
-    totalPages: number;
-  };
-  error?: string;
+  reply_count?: number;
+  repliesCursor?: string | null;
+  pending?: boolean;
 }
 
 const GAME_ID = "steal-brainrot";
+const PAGE_SIZE = 5;
 const SORT_OPTIONS = [
   { value: "newest", label: "Newest" },
   { value: "oldest", label: "Oldest" },
-  { value: "popular", label: "Most liked" }
+  { value: "popular", label: "Popular" }
 ] as const;
 
+type RealtimeState = "connecting" | "open" | "closed";
+
+// 接口只返回 created_at，按浏览器的本地格式显示
+function formatDate(value: string) {
+  return new Date(value).toLocaleDateString();
+}
+
+// 新的顶级评论只会出现在“最新”排序的第一页
+function isFirstNewestPage(page: number, sort: string) {
+  return page === 1 && sort === "newest";
+}
+
 export function CommentsSection() {
   const [comments, setComments] = useState<CommentItem[]>([]);
-  const [loading, setLoading] = useState(false);
+  const [loading, setLoading] = useState(true);
   const [page, setPage] = useState(1);
   const [totalPages, setTotalPages] = useState(1);
   const [sort, setSort] = useState<(typeof SORT_OPTIONS)[number]["value"]>("newest");
@@ -42,30 +63,94 @@ export function CommentsSection() {
   const [commentForm, setCommentForm] = useState({ name: "", email: "", content: "" });
   const [replyForm, setReplyForm] = useState({ name: "", email: "", content: "" });
   const [submitting, setSubmitting] = useState(false);
+  const [realtime, setRealtime] = useState<RealtimeState>("connecting");
+  // 推送事件的回调只注册一次，通过 ref 读取当前的页码和排序
+  const viewRef = useRef({ page, sort });
+  viewRef.current = { page, sort };
 
-  const loadComments = useCallback(async (targetPage: number, targetSort: string) => {
+  // 当前列表和所有缓存页一起更新，翻回缓存过的页面时看到的也是最新的计数和回复
+  const mutateComments = useCallback((updater: (items: CommentItem[]) => CommentItem[]) => {
+    setComments(updater);
+    updateCommentPages<CommentItem>(GAME_ID, updater);
+  }, []);
+
+  // 有缓存时立即显示，过期了再在后台重新请求；没有缓存时保留上一页的列表直到新的一页返回
+  const showPage = useCallback(async (targetPage: number, targetSort: string) => {
+    const cached = readCommentPage<CommentItem>(GAME_ID, targetPage, targetSort);
+    if (cached) {
+      setComments(cached.data.comments);
+      setTotalPages(cached.data.totalPages);
+    }
+    setLoading(!cached);
+    if (cached && !cached.stale) return;
+
+    const isCurrent = () => viewRef.current.page === targetPage && viewRef.current.sort === targetSort;
     try {
-      setLoading(true);
-      const response = await fetch(
-        `/api/comments.ajax?game_id=${GAME_ID}&page=${targetPage}&limit=5&sort=${targetSort}`
-      );
-      const payload = (await response.json()) as ApiResponse;
-      if (!payload.success) {
-        throw new Error(payload.error || "Unable to load comments");
-      }
-      setComments(payload.comments);
-      setTotalPages(payload.pagination.totalPages);
+      const data = await fetchCommentPage<CommentItem>(GAME_ID, targetPage, targetSort, PAGE_SIZE);
+      // 请求期间已经切到了别的页面
+      if (!isCurrent()) return;
+      setComments(data.comments);
+      setTotalPages(data.totalPages);
       setError(null);
     } catch (err) {
-      setError(err instanceof Error ? err.message : "Unable to load comments");
+      if (isCurrent()) setError(err instanceof Error ? err.message : "Unable to load comments");
     } finally {
-      setLoading(false);
+      if (isCurrent()) setLoading(false);
     }
   }, []);
 
   useEffect(() => {
-    loadComments(page, sort);
-  }, [page, sort, loadComments]);
+    showPage(page, sort);
+  }, [page, sort, showPage]);
+
+  // 浏览器空闲时预取下一页，点“Next”时直接从缓存显示
+  useEffect(() => {
+    if (page >= totalPages) return;
+    return prefetchCommentPage(GAME_ID, page + 1, sort, PAGE_SIZE);
+  }, [page, sort, totalPages]);
+
+  // 新的顶级评论插入“最新”第一页（当前列表或它的缓存），其它页整体后移一条，标记为过期
+  const applyNewComment = useCallback((comment: CommentItem) => {
+    const insert = (prev: CommentItem[]) =>
+      upsertComment(prev, { ...comment, replies: [], reply_count: 0, repliesCursor: null }, PAGE_SIZE);
+    invalidateCommentPages(GAME_ID);
+    updateCommentPages<CommentItem>(GAME_ID, insert, isFirstNewestPage);
+    if (isFirstNewestPage(viewRef.current.page, viewRef.current.sort)) setComments(insert);
+  }, []);
+
+  const applyReply = useCallback(
+    (reply: CommentItem) => {
+      mutateComments((prev) => upsertComment(prev, reply, PAGE_SIZE));
+    },
+    [mutateComments]
+  );
+
+  // 订阅本游戏的评论推送（SSE），只接收增量，不再重新请求整页
+  useEffect(() => {
+    if (typeof EventSource === "undefined") {
+      setRealtime("closed");
+      return;
+    }
+    const source = new EventSource(`/api/comment-events.ajax?game_id=${GAME_ID}`);
+    source.onopen = () => setRealtime("open");
+    source.onerror = () => setRealtime(source.readyState === EventSource.CLOSED ? "closed" : "connecting");
+    source.addEventListener("comment", (event) => {
+      applyNewComment(JSON.parse((event as MessageEvent).data) as CommentItem);
+    });
+    source.addEventListener("reply", (event) => {
+      applyReply(JSON.parse((event as MessageEvent).data) as CommentItem);
+    });
+    source.addEventListener("vote", (event) => {
+      const { id, like_count, dislike_count } = JSON.parse((event as MessageEvent).data);
+      mutateComments((prev) => applyVoteCounts(prev, id, like_count, dislike_count));
+    });
+    // 断线期间错过的事件无法补发时，缓存全部作废并重新加载当前页
+    source.addEventListener("reset", () => {
+      invalidateCommentPages(GAME_ID);
+      showPage(viewRef.current.page, viewRef.current.sort);
+    });
+    return () => source.close();
+  }, [applyNewComment, applyReply, mutateComments, showPage]);
 
   const isCommentValid = useMemo(() => {
     const emailRegex = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
@@ -80,25 +165,66 @@ export function CommentsSection() {
 
   const submitComment = useCallback(
     async (formData: { name: string; email: string; content: string }, parentId: number) => {
-      const response = await fetch("/api/make-comment.ajax", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({
-          author: formData.name,
-          email: formData.email,
-          content: formData.content,
-          parent_id: parentId,
-          game_id: GAME_ID
-        })
-      });
-      const payload = await response.json();
-      if (!payload.success) {
-        throw new Error(payload.error || "Unable to submit comment");
+      const { page: currentPage, sort: currentSort } = viewRef.current;
+      // 先插入占位评论；顶级评论只出现在“最新”第一页（当前列表或它的缓存）
+      const placeholder: CommentItem = {
+        id: nextPendingId(),
+        author: formData.name,
+        content: formData.content,
+        created_at: new Date().toISOString(),
+        like_count: 0,
+        dislike_count: 0,
+        parent_id: parentId,
+        replies: [],
+        reply_count: 0,
+        repliesCursor: null,
+        pending: true
+      };
+      const insert = (prev: CommentItem[]) => insertPending(prev, placeholder, PAGE_SIZE);
+      if (parentId) {
+        mutateComments(insert);
+      } else {
+        updateCommentPages<CommentItem>(GAME_ID, insert, isFirstNewestPage);
+        if (isFirstNewestPage(currentPage, currentSort)) setComments(insert);
+      }
+
+      try {
+        const response = await fetch("/api/make-comment.ajax", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({
+            author: formData.name,
+            email: formData.email,
+            content: formData.content,
+            parent_id: parentId,
+            game_id: GAME_ID
+          })
+        });
+        const payload = await response.json();
+        if (!payload.success) {
+          throw new Error(payload.error || "Unable to submit comment");
+        }
+        // 排队写入（202）时占位评论保持待审核状态，审核通过后由推送替换
+        if (!payload.comment) return;
+
+        // 占位评论换成返回的评论（推送先到时已经替换过）；当前不在“最新”第一页时回到第一页
+        mutateComments((prev) => settlePending(prev, placeholder.id, payload.comment as CommentItem));
+        if (!parentId) {
+          invalidateCommentPages(GAME_ID);
+          if (!isFirstNewestPage(currentPage, currentSort)) {
+            if (viewRef.current.page === 1) {
+              await showPage(1, viewRef.current.sort);
+            } else {
+              setPage(1);
+            }
+          }
+        }
+      } catch (err) {
+        mutateComments((prev) => settlePending(prev, placeholder.id, null));
+        throw err;
       }
-      await loadComments(1, sort);
-      setPage(1);
     },
-    [loadComments, sort]
+    [mutateComments, showPage]
   );
 
   const handleSubmitComment = async (event: FormEvent<HTMLFormElement>) => {
@@ -131,7 +257,9 @@ export function CommentsSection() {
     }
   };
 
+  // 乐观投票：先把计数加一，接口返回后换成服务器的计数，失败时撤销
   const handleVote = async (commentId: number, type: "like" | "dislike") => {
+    mutateComments((prev) => shiftVote(prev, commentId, type, 1));
     try {
       const response = await fetch("/api/comment-vote.ajax", {
         method: "POST",
@@ -139,34 +267,53 @@ export function CommentsSection() {
         body: JSON.stringify({ comment_id: commentId, vote_type: type })
       });
       const payload = await response.json();
+      if (payload.already_voted) {
+        throw new Error("You have already voted on this comment");
+      }
       if (!payload.success) {
         throw new Error(payload.error || "Unable to record vote");
       }
 
-      const updateCounts = (items: CommentItem[]): CommentItem[] =>
-        items.map((item) => {
-          if (item.id === commentId) {
-            return {
-              ...item,
-              like_count: payload.counts.like,
-              dislike_count: payload.counts.dislike
-            };
-          }
-          if (item.replies?.length) {
-            return {
-              ...item,
-              replies: updateCounts(item.replies)
-            };
-          }
-          return item;
-        });
-
-      setComments((prev) => updateCounts(prev));
+      mutateComments((prev) => applyVoteCounts(prev, commentId, payload.counts.like, payload.counts.dislike));
     } catch (err) {
+      mutateComments((prev) => shiftVote(prev, commentId, type, -1));
       setError(err instanceof Error ? err.message : "Unable to record vote");
     }
   };
 
+  const loadMoreReplies = async (comment: CommentItem) => {
+    if (!comment.repliesCursor) return;
+    try {
+      const response = await fetch(
+        `/api/comment-replies.ajax?comment_id=${comment.id}&cursor=${encodeURIComponent(comment.repliesCursor)}`
+      );
+      const payload = await response.json();
+      if (!payload.success) {
+        throw new Error(payload.error || "Unable to load replies");
+      }
+
+      // 自己刚发的回复已经显示在末尾，取回时去重
+      mutateComments((prev) =>
+        prev.map((item) =>
+          item.id === comment.id
+            ? {
+                ...item,
+                replies: [
+                  ...(item.replies ?? []),
+                  ...(payload.replies as CommentItem[]).filter(
+                    (reply) => !item.replies?.some((existing) => existing.id === reply.id)
+                  )
+                ],
+                repliesCursor: payload.nextCursor
+              }
+            : item
+        )
+      );
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Unable to load replies");
+    }
+  };
+
   const startReply = (comment: CommentItem) => {
     setreplyTarget(comment);
     setReplyForm({ name: "", email: "", content: "" });
@@ -182,7 +329,7 @@ export function CommentsSection() {
   const textareaPlaceholder = "Share your comment...";
 
   return (
-    <section id="comments-section" className="card space-y-6">
+    <section id="comments-section" className="card space-y-6" data-realtime={realtime}>
       <div className="flex flex-col gap-3 md:flex-row md:items-center md:justify-between">
         <div>
           <h2 className="text-2xl font-semibold text-accent">Comments</h2>
@@ -245,24 +392,31 @@ export function CommentsSection() {
         </div>
       </form>
 
-      <div className="space-y-6">
-        {loading ? (
+      <div className={`space-y-6 transition-opacity ${loading ? "opacity-60" : ""}`} aria-busy={loading}>
+        {loading && comments.length === 0 ? (
           <p className="text-sm text-white/60">Loading comments...</p>
         ) : comments.length === 0 ? (
           <p className="text-sm text-white/60">No comments yet. Be the first to steal the spotlight!</p>
         ) : (
           comments.map((comment) => (
-            <article key={comment.id} id={`comment-${comment.id}`} className="rounded-2xl border border-white/10 bg-surface/70 p-5">
+            <article
+              key={comment.id}
+              id={`comment-${comment.id}`}
+              className={`rounded-2xl border border-white/10 bg-surface/70 p-5 ${comment.pending ? "opacity-60" : ""}`}
+            >
               <div className="flex flex-wrap items-center justify-between gap-4">
                 <div>
                   <p className="font-semibold text-white">{comment.author}</p>
-                  <p className="text-xs uppercase tracking-widest text-white/50">{comment.date}</p>
+                  <p className="text-xs uppercase tracking-widest text-white/50">
+                    {comment.pending ? "Pending" : formatDate(comment.created_at)}
+                  </p>
                 </div>
                 <div className="flex gap-2 text-xs text-white/70">
                   <button
                     type="button"
                     className="rounded-xl border border-white/15 px-4 py-2 text-sm font-semibold text-white transition hover:border-white/40"
                     onClick={() => handleVote(comment.id, "like")}
+                    disabled={comment.pending}
                   >
                     👍 {comment.like_count}
                   </button>
@@ -270,6 +424,7 @@ export function CommentsSection() {
                     type="button"
                     className="rounded-xl border border-white/15 px-4 py-2 text-sm font-semibold text-white transition hover:border-white/40"
                     onClick={() => handleVote(comment.id, "dislike")}
+                    disabled={comment.pending}
                   >
                     👎 {comment.dislike_count}
                   </button>
@@ -281,6 +436,7 @@ export function CommentsSection() {
                   type="button"
                   className="rounded-full border border-accent/40 bg-accent/15 px-4 py-1 text-xs font-semibold uppercase tracking-widest text-accent transition hover:bg-accent/25"
                   onClick={() => startReply(comment)}
+                  disabled={comment.pending}
                 >
                   Reply
                 </button>
@@ -334,17 +490,20 @@ export function CommentsSection() {
               {comment.replies?.length ? (
                 <div className="mt-4 space-y-4 border-l border-white/10 pl-4">
                   {comment.replies.map((reply) => (
-                    <article key={reply.id} className="rounded-xl bg-night/40 p-4 text-sm text-white/80">
+                    <article key={reply.id} className={`rounded-xl bg-night/40 p-4 text-sm text-white/80 ${reply.pending ? "opacity-60" : ""}`}>
                       <div className="flex flex-wrap items-center justify-between gap-3">
                         <div>
                           <p className="font-medium text-white">{reply.author}</p>
-                          <p className="text-[10px] uppercase tracking-widest text-white/50">{reply.date}</p>
+                          <p className="text-[10px] uppercase tracking-widest text-white/50">
+                            {reply.pending ? "Pending" : formatDate(reply.created_at)}
+                          </p>
                         </div>
                         <div className="flex gap-2 text-[10px] text-white/70">
                           <button
                             type="button"
                             className="rounded-xl border border-white/15 px-3 py-1 text-xs font-semibold text-white transition hover:border-white/40"
                             onClick={() => handleVote(reply.id, "like")}
+                            disabled={reply.pending}
                           >
                             👍 {reply.like_count}
                           </button>
@@ -352,6 +511,7 @@ export function CommentsSection() {
                             type="button"
                             className="rounded-xl border border-white/15 px-3 py-1 text-xs font-semibold text-white transition hover:border-white/40"
                             onClick={() => handleVote(reply.id, "dislike")}
+                            disabled={reply.pending}
                           >
                             👎 {reply.dislike_count}
                           </button>
@@ -360,6 +520,15 @@ export function CommentsSection() {
                       <p className="mt-2">{reply.content}</p>
                     </article>
                   ))}
+                  {comment.repliesCursor ? (
+                    <button
+                      type="button"
+                      className="text-xs font-semibold uppercase tracking-widest text-accent transition hover:text-white"
+                      onClick={() => loadMoreReplies(comment)}
+                    >
+                      Show more replies ({(comment.reply_count ?? 0) - comment.replies.length})
+                    </button>
+                  ) : null}
                 </div>
               ) : null}
             </article>
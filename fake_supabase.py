@@ -0,0 +1,843 @@
+#!/usr/bin/env python3
+"""
+本地 Supabase / PostgREST 替身
+
+实现 supabase-js 用到的 PostgREST 子集（select / eq / neq / lt / gt / in / is /
+or / order / limit / offset / range / count / single / insert / update / delete / rpc），
+数据存放在 SQLite 中，表结构从 FINAL_SQL_TO_RUN.sql 翻译而来。
+这样评论相关的 E2E 测试和压测可以在没有真实 Supabase 项目的环境里运行。
+
+    python fake_supabase.py seed --comments 100000
+    python fake_supabase.py serve --port 54321
+
+然后用下面的环境变量启动 Next.js（任意非空 key 即可）：
+
+    NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321
+    NEXT_PUBLIC_SUPABASE_ANON_KEY=local
+    SUPABASE_SERVICE_ROLE_KEY=local
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCHEMA = os.path.join(ROOT_DIR, "FINAL_SQL_TO_RUN.sql")
+DEFAULT_DB = os.path.join(ROOT_DIR, ".fake-supabase.sqlite3")
+DEFAULT_PORT = 54321
+
+REST_PREFIX = "/rest/v1/"
+RPC_PREFIX = "/rest/v1/rpc/"
+OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+
+# 与 PostgreSQL 的 NOW() 输出保持同样的 ISO 8601 格式，便于字符串比较
+NOW_SQL = "(strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))"
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "or", "and", "columns", "on_conflict"}
+OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+    "ilike": "LIKE"
+}
+
+RPC_FUNCTIONS = {}
+
+
+def rpc(name):
+    """注册一个 /rest/v1/rpc/<name> 函数，签名为 fn(conn, params)"""
+    def register(fn):
+        RPC_FUNCTIONS[name] = fn
+        return fn
+    return register
+
+
+class PostgrestError(Exception):
+    """以 PostgREST 的错误格式返回给客户端"""
+
+    def __init__(self, status, message, code="PGRST100", details=None, hint=None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": details, "hint": hint}
+
+
+# ---------------------------------------------------------------------------
+# 表结构：把 FINAL_SQL_TO_RUN.sql 翻译成 SQLite
+# ---------------------------------------------------------------------------
+
+TYPE_REWRITES = [
+    (re.compile(r"BIGINT\s+GENERATED\s+(?:BY\s+DEFAULT|ALWAYS)\s+AS\s+IDENTITY\s+PRIMARY\s+KEY", re.I), "INTEGER PRIMARY KEY"),
+    (re.compile(r"\bBIGSERIAL\s+PRIMARY\s+KEY", re.I), "INTEGER PRIMARY KEY"),
+    (re.compile(r"TIMESTAMP(?:\s+WITH(?:OUT)?\s+TIME\s+ZONE)?", re.I), "TEXT"),
+    (re.compile(r"DEFAULT\s+NOW\(\)", re.I), f"DEFAULT {NOW_SQL}"),
+    (re.compile(r"DOUBLE\s+PRECISION", re.I), "REAL"),
+    (re.compile(r"\b(?:INET|UUID|JSONB?)\b", re.I), "TEXT")
+]
+
+
+def split_sql_statements(sql):
+    """按分号拆分 SQL，跳过注释并保留 $$ ... $$ 函数体"""
+    statements, current, in_dollar = [], [], False
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not in_dollar and stripped.startswith("--"):
+            continue
+        if line.count("$$") % 2 == 1:
+            in_dollar = not in_dollar
+        current.append(line)
+        if not in_dollar and stripped.endswith(";"):
+            statements.append("\n".join(current).strip().rstrip(";"))
+            current = []
+    if "".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def translate_statement(statement):
+    """只保留建表和建索引语句；函数、视图、触发器、RLS 策略由本文件模拟"""
+    head = " ".join(statement.split()[:3]).upper()
+    if head.startswith("CREATE TABLE"):
+        for pattern, replacement in TYPE_REWRITES:
+            statement = pattern.sub(replacement, statement)
+        return statement
+    if head.startswith("CREATE INDEX") or head.startswith("CREATE UNIQUE INDEX"):
+        statement = re.sub(r"\s+INCLUDE\s*\([^)]*\)", "", statement, flags=re.I)
+        statement = re.sub(r"\s+USING\s+\w+", "", statement, flags=re.I)
+        # 迁移旧库时会对已有的表重新执行建索引语句
+        statement = re.sub(r"\bINDEX\s+(?!IF\s+NOT\s+EXISTS)", "INDEX IF NOT EXISTS ", statement, count=1, flags=re.I)
+        return statement
+    return None
+
+
+def apply_schema(conn, schema_path=DEFAULT_SCHEMA, indexes_only=False):
+    with open(schema_path, encoding="utf-8-sig") as f:
+        statements = split_sql_statements(f.read())
+    applied = 0
+    for statement in statements:
+        translated = translate_statement(statement)
+        if translated and not (indexes_only and "INDEX" not in translated.split("(")[0].upper()):
+            conn.execute(translated)
+            applied += 1
+    return applied
+
+
+def comment_popular_score(likes, dislikes, created_at):
+    """与 SQL 函数 comment_popular_score 相同：Wilson 下界 × 总票数，加上每年 +1 的时间项"""
+    likes, dislikes = max(likes or 0, 0), max(dislikes or 0, 0)
+    n = likes + dislikes
+    confident = 0.0
+    if n:
+        p = likes / n
+        confident = (p + 1.9208 / n - 1.96 * math.sqrt((p * (1 - p) + 0.9604 / n) / n)) / (1 + 3.8416 / n) * n
+    age = 0.0
+    if created_at:
+        age = datetime.fromisoformat(created_at).timestamp() / POPULAR_RECENCY_SECONDS
+    return confident + age
+
+
+# 热门度时间项：晚发表这么多秒只相当于多 1 个有效赞，票数仍是主要排序依据
+POPULAR_RECENCY_SECONDS = 365 * 86400
+
+# Postgres 视图用到的 LATERAL / json_agg 在 SQLite 里写法不同，这里手写等价的视图
+REPLY_PREVIEW_LIMIT = 3
+REPLY_PREVIEW_COLUMNS = ("id", "author", "content", "parent_id", "like_count", "dislike_count", "created_at")
+JSON_COLUMNS = {"replies"}
+
+
+def create_views(conn):
+    reply_object = "json_object(" + ", ".join(f"'{name}', r.{name}" for name in REPLY_PREVIEW_COLUMNS) + ")"
+    conn.execute("DROP VIEW IF EXISTS comment_threads")
+    conn.execute(f"""
+        CREATE VIEW comment_threads AS
+        SELECT
+            c.*,
+            (SELECT json_group_array({reply_object}) FROM (
+                SELECT * FROM comments WHERE parent_id = c.id AND status = 'approved'
+                ORDER BY created_at, id LIMIT {REPLY_PREVIEW_LIMIT}
+            ) r) AS replies,
+            (SELECT COUNT(*) FROM comments r WHERE r.parent_id = c.id AND r.status = 'approved') AS reply_count
+        FROM comments c
+        WHERE c.parent_id = 0 AND c.status = 'approved'
+    """)
+
+
+def create_triggers(conn):
+    """对应 update_comments_popular_score 触发器：写入和投票后重算热门度"""
+    score = "comment_popular_score(NEW.like_count, NEW.dislike_count, NEW.created_at)"
+    conn.execute("DROP TRIGGER IF EXISTS comments_popular_score_insert")
+    conn.execute("DROP TRIGGER IF EXISTS comments_popular_score_update")
+    conn.execute(f"""
+        CREATE TRIGGER comments_popular_score_insert AFTER INSERT ON comments
+        BEGIN
+            UPDATE comments SET popular_score = {score} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER comments_popular_score_update AFTER UPDATE OF like_count, dislike_count, created_at ON comments
+        BEGIN
+            UPDATE comments SET popular_score = {score} WHERE id = NEW.id;
+        END
+    """)
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.create_function("comment_popular_score", 3, comment_popular_score, deterministic=True)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def table_columns(conn, table):
+    return [row["name"] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+# ---------------------------------------------------------------------------
+# 数据生成
+# ---------------------------------------------------------------------------
+
+AUTHORS = ["BrainrotFan", "StealMaster", "Tralalero", "Bombardiro", "Tung Tung", "Capuccino", "Lirili", "Noob123"]
+WORDS = (
+    "steal brainrot base rare secret god legendary lucky block rebirth money lock trade "
+    "friend server admin event update halloween noob pro best worst fun lag epic"
+).split()
+
+
+def generate_comments(total, games, reply_ratio=0.3, days=365, start_id=1, seed=None):
+    """按时间顺序生成评论行；回复指向同一游戏里较新的顶级评论"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    started = now - timedelta(days=days)
+    step = (days * 86400) / max(total, 1)
+    recent_parents = {game: [] for game in games}
+
+    for offset in range(total):
+        comment_id = start_id + offset
+        game_id = games[offset % len(games)]
+        parents = recent_parents[game_id]
+        parent_id = 0
+        if parents and rng.random() < reply_ratio:
+            parent_id = rng.choice(parents)
+        else:
+            parents.append(comment_id)
+            if len(parents) > 1000:
+                del parents[:500]
+
+        created_at = started + timedelta(seconds=offset * step + rng.random() * step)
+        status_roll = rng.random()
+        yield (
+            comment_id,
+            rng.choice(AUTHORS),
+            f"user{rng.randint(1, 50000)}@example.com",
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 40))),
+            parent_id,
+            game_id,
+            "approved" if status_roll < 0.97 else ("pending" if status_roll < 0.99 else "spam"),
+            f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            min(int(rng.paretovariate(1.2)) - 1, 5000),
+            min(int(rng.paretovariate(2.5)) - 1, 500),
+            created_at.isoformat(timespec="milliseconds"),
+            created_at.isoformat(timespec="milliseconds")
+        )
+
+
+SEED_COLUMNS = (
+    "id", "author", "email", "content", "parent_id", "game_id", "status",
+    "ip_address", "like_count", "dislike_count", "created_at", "updated_at"
+)
+
+
+def seed_comments(conn, total, games, reply_ratio=0.3, batch_size=10000, seed=None):
+    start_id = (conn.execute("SELECT COALESCE(MAX(id), 0) FROM comments").fetchone()[0] or 0) + 1
+    placeholders = ", ".join("?" for _ in SEED_COLUMNS)
+    sql = f"INSERT INTO comments ({', '.join(SEED_COLUMNS)}) VALUES ({placeholders})"
+
+    rows = generate_comments(total, games, reply_ratio, start_id=start_id, seed=seed)
+    inserted = 0
+    started = time.perf_counter()
+    while inserted < total:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            break
+        conn.execute("BEGIN")
+        conn.executemany(sql, batch)
+        conn.execute("COMMIT")
+        inserted += len(batch)
+        print(f"  已写入 {inserted}/{total} 条评论 ({time.perf_counter() - started:.1f}s)", end="\r")
+    conn.execute("ANALYZE")
+    print()
+    return inserted
+
+
+# ---------------------------------------------------------------------------
+# PostgREST 查询解析
+# ---------------------------------------------------------------------------
+
+def split_top_level(text, separator=","):
+    """按顶层分隔符拆分，忽略括号和双引号内部"""
+    parts, current, depth, quoted = [], [], 0, False
+    for i, char in enumerate(text):
+        if char == '"' and (i == 0 or text[i - 1] != "\\"):
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == separator:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part for part in parts if part != ""]
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+class QueryBuilder:
+    """把 PostgREST 的查询参数翻译成 SQLite 的 WHERE / ORDER BY / LIMIT"""
+
+    def __init__(self, conn, table):
+        if not IDENTIFIER.match(table):
+            raise PostgrestError(404, f"relation \"{table}\" does not exist", code="42P01")
+        self.table = table
+        self.columns = table_columns(conn, table)
+        if not self.columns:
+            raise PostgrestError(404, f"relation \"public.{table}\" does not exist", code="42P01")
+
+    def column(self, name):
+        name = name.strip()
+        if name not in self.columns:
+            raise PostgrestError(400, f"column {self.table}.{name} does not exist", code="42703")
+        return f'"{name}"'
+
+    def select_list(self, select):
+        if not select or select.strip() == "*":
+            return "*"
+        names = [part.strip() for part in select.split(",") if part.strip()]
+        if any("(" in name or ":" in name for name in names):
+            raise PostgrestError(400, "resource embedding and aliases are not supported by fake_supabase")
+        return ", ".join(self.column(name) for name in names)
+
+    def condition(self, column, expression):
+        """col + 'op.value'（可带 not. 前缀）→ SQL 片段"""
+        negate = False
+        if expression.startswith("not."):
+            negate, expression = True, expression[4:]
+        operator, _, value = expression.partition(".")
+        column_sql = self.column(column)
+
+        if operator == "in":
+            if not (value.startswith("(") and value.endswith(")")):
+                raise PostgrestError(400, f"invalid in filter: {value}")
+            values = [unquote(v.strip()) for v in split_top_level(value[1:-1])]
+            if not values:
+                sql, params = "0", []
+            else:
+                sql, params = f"{column_sql} IN ({', '.join('?' for _ in values)})", values
+        elif operator == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}.get(value.lower())
+            if literal is None:
+                raise PostgrestError(400, f"invalid is filter: {value}")
+            sql, params = f"{column_sql} IS {literal}", []
+        elif operator in OPERATORS:
+            value = unquote(value)
+            if operator in ("like", "ilike"):
+                value = value.replace("*", "%")
+            if operator == "ilike":
+                sql, params = f"LOWER({column_sql}) LIKE LOWER(?)", [value]
+            else:
+                sql, params = f"{column_sql} {OPERATORS[operator]} ?", [value]
+        else:
+            raise PostgrestError(400, f"unsupported operator: {operator}")
+
+        return (f"NOT ({sql})" if negate else sql), params
+
+    def logic(self, kind, expression):
+        """解析 or=(a.eq.1,and(b.lt.2,c.gt.3)) 形式的逻辑树"""
+        expression = expression.strip()
+        if not (expression.startswith("(") and expression.endswith(")")):
+            raise PostgrestError(400, f"invalid logic tree: {expression}")
+        parts, params = [], []
+        for item in split_top_level(expression[1:-1]):
+            item = item.strip()
+            negate = item.startswith("not.")
+            if negate:
+                item = item[4:]
+            match = re.match(r"^(and|or)(\(.*\))$", item)
+            if match:
+                sql, item_params = self.logic(match.group(1), match.group(2))
+            else:
+                column, _, rest = item.partition(".")
+                sql, item_params = self.condition(column, rest)
+            parts.append(f"NOT ({sql})" if negate else f"({sql})")
+            params.extend(item_params)
+        joiner = " OR " if kind == "or" else " AND "
+        return joiner.join(parts) or "1", params
+
+    def where(self, params):
+        clauses, values = [], []
+        for key, value in params:
+            if key in ("or", "and"):
+                sql, item_params = self.logic(key, value)
+            elif key in RESERVED_PARAMS:
+                continue
+            else:
+                sql, item_params = self.condition(key, value)
+            clauses.append(f"({sql})")
+            values.extend(item_params)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", values
+
+    def order_by(self, order):
+        if not order:
+            return ""
+        terms = []
+        for item in order.split(","):
+            parts = item.strip().split(".")
+            term = self.column(parts[0])
+            for modifier in parts[1:]:
+                term += {
+                    "asc": " ASC",
+                    "desc": " DESC",
+                    "nullsfirst": " NULLS FIRST",
+                    "nullslast": " NULLS LAST"
+                }.get(modifier, "")
+            terms.append(term)
+        return " ORDER BY " + ", ".join(terms)
+
+
+def row_to_dict(row):
+    return {
+        key: json.loads(row[key]) if key in JSON_COLUMNS and isinstance(row[key], str) else row[key]
+        for key in row.keys()
+    }
+
+
+def adapt_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def integrity_error(error):
+    message = str(error)
+    if "UNIQUE" in message:
+        return PostgrestError(409, message, code="23505")
+    if "NOT NULL" in message:
+        return PostgrestError(400, message, code="23502")
+    if "CHECK" in message:
+        return PostgrestError(400, message, code="23514")
+    return PostgrestError(400, message, code="23000")
+
+
+# ---------------------------------------------------------------------------
+# RPC：与 FINAL_SQL_TO_RUN.sql 中的函数一一对应
+# ---------------------------------------------------------------------------
+
+@rpc("increment_comment_vote")
+def increment_comment_vote(conn, params):
+    column = "like_count" if params.get("p_vote_type") == "like" else "dislike_count"
+    rows = conn.execute(
+        f"UPDATE comments SET {column} = COALESCE({column}, 0) + 1, updated_at = {NOW_SQL} "
+        "WHERE id = ? RETURNING like_count, dislike_count, game_id",
+        [params.get("p_comment_id")]
+    ).fetchall()
+    return [row_to_dict(row) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# HTTP 服务
+# ---------------------------------------------------------------------------
+
+class FakeSupabase:
+    """持有数据库路径和每个线程各自的连接"""
+
+    def __init__(self, db_path, latency_ms=0):
+        self.db_path = db_path
+        self.latency_ms = latency_ms
+        self.local = threading.local()
+
+    def conn(self):
+        if not hasattr(self.local, "conn"):
+            self.local.conn = connect(self.db_path)
+        return self.local.conn
+
+
+class PostgrestHandler(BaseHTTPRequestHandler):
+    server_version = "fake-supabase/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # --- 通用工具 ---------------------------------------------------------
+
+    @property
+    def app(self):
+        return self.server.app
+
+    def prefer(self):
+        values = {}
+        for part in self.headers.get("Prefer", "").split(","):
+            key, _, value = part.strip().partition("=")
+            if key:
+                values[key] = value
+        return values
+
+    def wants_object(self):
+        return OBJECT_MEDIA_TYPE in self.headers.get("Accept", "")
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError:
+            raise PostgrestError(400, "invalid JSON body", code="PGRST102")
+
+    def send_json(self, status, payload, headers=None, head_only=False):
+        body = b"" if payload is None else json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        content_type = OBJECT_MEDIA_TYPE if self.wants_object() else "application/json"
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(0 if head_only else len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if not head_only and body:
+            self.wfile.write(body)
+
+    def send_rows(self, status, rows, headers=None, head_only=False):
+        if self.wants_object():
+            if len(rows) != 1:
+                raise PostgrestError(
+                    406,
+                    "JSON object requested, multiple (or no) rows returned",
+                    code="PGRST116",
+                    details=f"The result contains {len(rows)} rows"
+                )
+            self.send_json(status, rows[0], headers, head_only)
+        else:
+            self.send_json(status, rows, headers, head_only)
+
+    def dispatch(self, method):
+        started = time.perf_counter()
+        try:
+            if self.app.latency_ms:
+                time.sleep(self.app.latency_ms / 1000)
+            url = urlsplit(self.path)
+            params = parse_qsl(url.query, keep_blank_values=True)
+            if url.path.startswith(RPC_PREFIX):
+                self.handle_rpc(url.path[len(RPC_PREFIX):], params, method)
+            elif url.path.startswith(REST_PREFIX):
+                table = url.path[len(REST_PREFIX):].strip("/")
+                getattr(self, f"handle_{method.lower()}")(table, params)
+            else:
+                raise PostgrestError(404, f"no route for {url.path}", code="PGRST125")
+        except PostgrestError as error:
+            self.send_json(error.status, error.body)
+        except sqlite3.IntegrityError as error:
+            failure = integrity_error(error)
+            self.send_json(failure.status, failure.body)
+        except sqlite3.Error as error:
+            self.send_json(500, {"code": "XX000", "message": str(error), "details": None, "hint": None})
+        finally:
+            self.server.record(method, time.perf_counter() - started)
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_HEAD(self):
+        self.dispatch("HEAD")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Headers", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, HEAD, POST, PATCH, DELETE")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    # --- 查询 ---------------------------------------------------------
+
+    def count_rows(self, conn, builder, where, values):
+        # SQLite 没有可用的行数估算，exact / planned / estimated 都返回精确值
+        return conn.execute(f"SELECT COUNT(*) FROM {builder.table}{where}", values).fetchone()[0]
+
+    def pagination(self, params):
+        query = dict(params)
+        limit = query.get("limit")
+        offset = int(query.get("offset") or 0)
+        range_header = self.headers.get("Range")
+        if range_header and "-" in range_header:
+            start, _, end = range_header.partition("-")
+            offset = int(start or 0)
+            if end:
+                limit = int(end) - offset + 1
+        return (int(limit) if limit not in (None, "") else None), offset
+
+    def handle_get(self, table, params, head_only=False):
+        conn = self.app.conn()
+        builder = QueryBuilder(conn, table)
+        query = dict(params)
+        where, values = builder.where(params)
+        limit, offset = self.pagination(params)
+
+        sql = f"SELECT {builder.select_list(query.get('select'))} FROM {table}{where}{builder.order_by(query.get('order'))}"
+        if limit is not None or offset:
+            sql += f" LIMIT {limit if limit is not None else -1} OFFSET {offset}"
+        rows = [row_to_dict(row) for row in conn.execute(sql, values)]
+
+        count_mode = self.prefer().get("count")
+        total = self.count_rows(conn, builder, where, values) if count_mode else None
+        content_range = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+        headers = {"Content-Range": f"{content_range}/{total if total is not None else '*'}"}
+        self.send_rows(200, rows, headers, head_only)
+
+    def handle_head(self, table, params):
+        self.handle_get(table, params, head_only=True)
+
+    def respond_with_rows(self, status, rows, query):
+        prefer = self.prefer()
+        if prefer.get("return") == "representation":
+            select = query.get("select")
+            if select and select.strip() != "*":
+                names = [name.strip() for name in select.split(",")]
+                rows = [{name: row.get(name) for name in names} for row in rows]
+            self.send_rows(status, rows)
+        else:
+            self.send_json(status if status != 200 else 204, None)
+
+    def handle_post(self, table, params):
+        conn = self.app.conn()
+        builder = QueryBuilder(conn, table)
+        payload = self.read_body()
+        items = payload if isinstance(payload, list) else [payload or {}]
+
+        inserted = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for item in items:
+                names = [builder.column(name) for name in item]
+                values = [adapt_value(value) for value in item.values()]
+                if names:
+                    sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join('?' for _ in names)}) RETURNING *"
+                else:
+                    sql = f"INSERT INTO {table} DEFAULT VALUES RETURNING *"
+                inserted.append(row_to_dict(conn.execute(sql, values).fetchone()))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.respond_with_rows(201, inserted, dict(params))
+
+    def handle_patch(self, table, params):
+        conn = self.app.conn()
+        builder = QueryBuilder(conn, table)
+        changes = dict(self.read_body() or {})
+        # 模拟 update_updated_at_column 触发器
+        if "updated_at" in builder.columns and "updated_at" not in changes:
+            changes["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        assignments = ", ".join(f"{builder.column(name)} = ?" for name in changes)
+        where, values = builder.where(params)
+        rows = conn.execute(
+            f"UPDATE {table} SET {assignments}{where} RETURNING *",
+            [adapt_value(value) for value in changes.values()] + values
+        ).fetchall()
+        self.respond_with_rows(200, [row_to_dict(row) for row in rows], dict(params))
+
+    def handle_delete(self, table, params):
+        conn = self.app.conn()
+        builder = QueryBuilder(conn, table)
+        where, values = builder.where(params)
+        rows = conn.execute(f"DELETE FROM {table}{where} RETURNING *", values).fetchall()
+        self.respond_with_rows(200, [row_to_dict(row) for row in rows], dict(params))
+
+    def handle_rpc(self, name, params, method):
+        fn = RPC_FUNCTIONS.get(name)
+        if not fn:
+            raise PostgrestError(404, f"Could not find the function public.{name}", code="PGRST202")
+        arguments = dict(params) if method in ("GET", "HEAD") else (self.read_body() or {})
+        result = fn(self.app.conn(), arguments)
+        if self.wants_object() and isinstance(result, list):
+            self.send_rows(200, result)
+        else:
+            self.send_json(200, result, head_only=method == "HEAD")
+
+
+class FakeSupabaseServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, app, verbose=False):
+        super().__init__(address, PostgrestHandler)
+        self.app = app
+        self.verbose = verbose
+        self.stats_lock = threading.Lock()
+        self.request_counts = {}
+
+    def record(self, method, elapsed):
+        with self.stats_lock:
+            count, total = self.request_counts.get(method, (0, 0.0))
+            self.request_counts[method] = (count + 1, total + elapsed)
+
+
+def ensure_schema(db_path, schema_path):
+    conn = connect(db_path)
+    columns = table_columns(conn, "comments")
+    if not columns:
+        applied = apply_schema(conn, schema_path)
+        print(f"✅ 已从 {os.path.relpath(schema_path, ROOT_DIR)} 创建 {applied} 个表/索引")
+    elif "popular_score" not in columns:
+        # 旧版本建的库：补上热门度列并回填，再补建缺少的索引
+        conn.execute("ALTER TABLE comments ADD COLUMN popular_score REAL NOT NULL DEFAULT 0")
+        conn.execute("DROP INDEX IF EXISTS idx_comments_game_parent_likes")
+        apply_schema(conn, schema_path, indexes_only=True)
+        print("✅ 已添加 popular_score 列")
+    # 和 FINAL_SQL_TO_RUN.sql 的回填一样：热门度公式改过之后，旧库里分数不一致的行在这里重算
+    score = "comment_popular_score(like_count, dislike_count, created_at)"
+    updated = conn.execute(f"UPDATE comments SET popular_score = {score} WHERE popular_score != {score}").rowcount
+    if updated:
+        print(f"✅ 已回填 {updated} 条评论的 popular_score")
+    create_triggers(conn)
+    create_views(conn)
+    return conn
+
+
+def command_init(args):
+    if args.reset and os.path.exists(args.db):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    ensure_schema(args.db, args.schema)
+    return 0
+
+
+def command_seed(args):
+    command_init(args)
+    conn = connect(args.db)
+    games = [game.strip() for game in args.games.split(",") if game.strip()]
+    print(f"🌱 生成 {args.comments} 条评论，游戏: {', '.join(games)}")
+    started = time.perf_counter()
+    inserted = seed_comments(conn, args.comments, games, args.reply_ratio, seed=args.seed)
+    print(f"✅ 写入 {inserted} 条评论，用时 {time.perf_counter() - started:.1f}s")
+    return 0 if check_popular_order(conn, games) else 1
+
+
+def check_popular_order(conn, games, limit=20):
+    """热门排序的第一页和最新排序的第一页重合超过四分之一，说明热门度实际上还是在按时间排"""
+    ok = True
+    for game_id in games:
+        pages = {}
+        for sort, column in (("popular", "popular_score"), ("newest", "created_at")):
+            rows = conn.execute(
+                f"SELECT id FROM comments WHERE game_id = ? AND parent_id = 0 AND status = 'approved' "
+                f"ORDER BY {column} DESC, id DESC LIMIT ?",
+                (game_id, limit)
+            )
+            pages[sort] = [row["id"] for row in rows]
+        if len(pages["newest"]) < 2:
+            continue
+        shared = len(set(pages["popular"]) & set(pages["newest"]))
+        if pages["popular"] == pages["newest"] or shared > len(pages["newest"]) // 4:
+            print(f"❌ {game_id}: 热门排序前 {limit} 条与最新排序重合 {shared} 条，热门度被时间项主导")
+            ok = False
+        else:
+            print(f"✅ {game_id}: 热门排序前 {limit} 条与最新排序重合 {shared} 条")
+    return ok
+
+
+def command_check(args):
+    conn = ensure_schema(args.db, args.schema)
+    games = [row["game_id"] for row in conn.execute("SELECT DISTINCT game_id FROM comments ORDER BY game_id")]
+    return 0 if check_popular_order(conn, games, args.limit) else 1
+
+
+def command_serve(args):
+    ensure_schema(args.db, args.schema).close()
+    app = FakeSupabase(args.db, latency_ms=args.latency_ms)
+    server = FakeSupabaseServer((args.host, args.port), app, verbose=args.verbose)
+    print(f"🚀 fake Supabase 已启动: http://{args.host}:{args.port}  (数据库: {args.db})")
+    print(f"   NEXT_PUBLIC_SUPABASE_URL=http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for method, (count, total) in sorted(server.request_counts.items()):
+            print(f"   {method}: {count} 次请求，平均 {total / count * 1000:.2f} ms")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="本地 Supabase/PostgREST 替身")
+    parser.add_argument("--db", default=DEFAULT_DB, help="SQLite 数据库文件")
+    parser.add_argument("--schema", default=DEFAULT_SCHEMA, help="用于建表的 SQL 文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    init = subparsers.add_parser("init", help="根据 SQL 文件建表")
+    init.add_argument("--reset", action="store_true", help="删除已有数据库后重建")
+    init.set_defaults(handler=command_init)
+
+    seed = subparsers.add_parser("seed", help="生成评论数据")
+    seed.add_argument("--comments", type=int, default=100000, help="生成的评论数量")
+    seed.add_argument("--games", default="steal-brainrot", help="逗号分隔的 game_id 列表")
+    seed.add_argument("--reply-ratio", type=float, default=0.3, help="回复所占比例")
+    seed.add_argument("--seed", type=int, default=None, help="随机种子")
+    seed.add_argument("--reset", action="store_true", help="删除已有数据库后重建")
+    seed.set_defaults(handler=command_seed)
+
+    check = subparsers.add_parser("check", help="检查热门排序与最新排序不同")
+    check.add_argument("--limit", type=int, default=20, help="比较的第一页条数")
+    check.set_defaults(handler=command_check)
+
+    serve = subparsers.add_parser("serve", help="启动 PostgREST 兼容的 HTTP 服务")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--latency-ms", type=float, default=0, help="为每个请求附加的模拟网络延迟")
+    serve.add_argument("--verbose", action="store_true", help="打印每个请求")
+    serve.set_defaults(handler=command_serve)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
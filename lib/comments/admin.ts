@@ -0,0 +1,12 @@
+import { timingSafeEqual } from "crypto";
+
+// 管理权限：Authorization: Bearer <COMMENTS_ADMIN_TOKEN>，未配置令牌时一律拒绝
+export function isAdminRequest(request: Request): boolean {
+  const token = process.env.COMMENTS_ADMIN_TOKEN;
+  const header = request.headers.get("authorization") || "";
+  const provided = header.startsWith("Bearer ") ? header.slice(7) : "";
+  if (!token || provided.length !== token.length) {
+    return false;
+  }
+  return timingSafeEqual(Buffer.from(provided), Buffer.from(token));
+}
@@ -0,0 +1,137 @@
+import type { CommentPagination } from "./pagination";
+import { isRedisConfigured, redis } from "./redis";
+
+// 评论列表的读穿缓存：进程内 LRU + 可选的共享后端（Upstash Redis REST）
+// key 为 (game_id, sort, 分页方式 + page 或 cursor, limit)，同一游戏有写入时整体失效
+
+const LOCAL_TTL_MS = Number(process.env.COMMENTS_CACHE_TTL_MS) || 15_000;
+const SHARED_TTL_SECONDS = Number(process.env.COMMENTS_CACHE_SHARED_TTL_SECONDS) || 60;
+const MAX_ENTRIES = Number(process.env.COMMENTS_CACHE_MAX_ENTRIES) || 500;
+
+export interface CommentListKey {
+  gameId: string;
+  sort: string;
+  pagination: CommentPagination;
+  page: number;
+  cursor: string | null;
+  limit: number;
+}
+
+export interface CacheStats {
+  hits: number;
+  sharedHits: number;
+  misses: number;
+  invalidations: number;
+  evictions: number;
+  size: number;
+  maxEntries: number;
+  ttlMs: number;
+  sharedBackend: boolean;
+}
+
+interface Entry {
+  gameId: string;
+  value: unknown;
+  expiresAt: number;
+}
+
+// Map 保持插入顺序：命中时删除再插入即移到末尾，淘汰时从头部取最久未用的
+const entries = new Map<string, Entry>();
+const inflight = new Map<string, Promise<unknown>>();
+// 每次失效把游戏的代数加一，加载期间发生失效时不再写回旧结果
+const generations = new Map<string, number>();
+const counters = { hits: 0, sharedHits: 0, misses: 0, invalidations: 0, evictions: 0 };
+
+function gameHash(gameId: string) {
+  return `comments:list:${gameId}`;
+}
+
+function fieldFor(key: CommentListKey) {
+  const position = key.pagination === "cursor" ? `c:${key.cursor ?? ""}` : `p:${key.page}`;
+  return `${key.sort}|${position}|${key.limit}`;
+}
+
+function readLocal(cacheKey: string) {
+  const entry = entries.get(cacheKey);
+  if (!entry) return undefined;
+  entries.delete(cacheKey);
+  if (entry.expiresAt <= Date.now()) return undefined;
+  entries.set(cacheKey, entry);
+  return entry.value;
+}
+
+function writeLocal(cacheKey: string, gameId: string, value: unknown) {
+  entries.delete(cacheKey);
+  entries.set(cacheKey, { gameId, value, expiresAt: Date.now() + LOCAL_TTL_MS });
+  while (entries.size > MAX_ENTRIES) {
+    const oldest = entries.keys().next().value as string;
+    entries.delete(oldest);
+    counters.evictions += 1;
+  }
+}
+
+export type CacheStatus = "HIT" | "SHARED" | "MISS";
+
+// 先查进程内缓存，再查共享后端，都没有时调用 load；同一 key 的并发未命中只加载一次
+export async function readThrough<T>(
+  key: CommentListKey,
+  load: () => Promise<T>
+): Promise<{ value: T; status: CacheStatus }> {
+  const field = fieldFor(key);
+  const cacheKey = `${key.gameId}|${field}`;
+  const generation = generations.get(key.gameId) ?? 0;
+
+  const local = readLocal(cacheKey);
+  if (local !== undefined) {
+    counters.hits += 1;
+    return { value: local as T, status: "HIT" };
+  }
+
+  const shared = await redis([["HGET", gameHash(key.gameId), field]]);
+  if (typeof shared?.[0] === "string") {
+    const value = JSON.parse(shared[0]) as T;
+    counters.sharedHits += 1;
+    writeLocal(cacheKey, key.gameId, value);
+    return { value, status: "SHARED" };
+  }
+
+  counters.misses += 1;
+  let pending = inflight.get(cacheKey) as Promise<T> | undefined;
+  if (!pending) {
+    pending = load().finally(() => inflight.delete(cacheKey));
+    inflight.set(cacheKey, pending);
+    const value = await pending;
+    if (generation !== (generations.get(key.gameId) ?? 0)) {
+      return { value, status: "MISS" };
+    }
+    writeLocal(cacheKey, key.gameId, value);
+    await redis([
+      ["HSET", gameHash(key.gameId), field, JSON.stringify(value)],
+      ["EXPIRE", gameHash(key.gameId), SHARED_TTL_SECONDS]
+    ]);
+    return { value, status: "MISS" };
+  }
+  return { value: await pending, status: "MISS" };
+}
+
+// 评论或投票写入后调用：清掉该游戏所有分页/排序的缓存
+export async function invalidateCommentList(gameId: string) {
+  counters.invalidations += 1;
+  generations.set(gameId, (generations.get(gameId) ?? 0) + 1);
+  for (const [cacheKey, entry] of entries) {
+    if (entry.gameId === gameId) {
+      entries.delete(cacheKey);
+    }
+  }
+  await redis([["DEL", gameHash(gameId)]]);
+}
+
+export function getCacheStats(): CacheStats {
+  return {
+    ...counters,
+    size: entries.size,
+    maxEntries: MAX_ENTRIES,
+    ttlMs: LOCAL_TTL_MS,
+    sharedBackend: isRedisConfigured()
+  };
+}
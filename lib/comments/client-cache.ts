@@ -0,0 +1,130 @@
+// 浏览器端的评论分页缓存（stale-while-revalidate）
+// key 为 (game_id, page, sort)：切回缓存过的页面时立即显示，超过 REVALIDATE_AFTER_MS 再在后台重新请求；
+// 接口带 ETag 且 cache-control 为 no-cache，重新请求时浏览器自动发 If-None-Match，内容没变只回 304
+
+export interface CommentPage<T> {
+  comments: T[];
+  totalPages: number;
+}
+
+export interface CachedCommentPage<T> {
+  data: CommentPage<T>;
+  stale: boolean;
+}
+
+interface Entry {
+  gameId: string;
+  page: number;
+  sort: string;
+  data: CommentPage<unknown>;
+  fetchedAt: number;
+}
+
+interface ApiResponse {
+  success: boolean;
+  comments: unknown[];
+  pagination: { page: number; totalPages: number };
+  error?: string;
+}
+
+const MAX_ENTRIES = 50;
+// 这段时间内请求过的页面再次显示时不重新验证，来回翻页不会每次都发请求
+const REVALIDATE_AFTER_MS = 10_000;
+// requestIdleCallback 不可用时（Safari）预取的延迟
+const IDLE_FALLBACK_MS = 200;
+
+// Map 保持插入顺序：写入时删除再插入即移到末尾，淘汰时从头部取最久没更新的
+const entries = new Map<string, Entry>();
+const inflight = new Map<string, Promise<CommentPage<unknown>>>();
+// 每次失效把游戏的代数加一，请求期间发生失效时写回的结果直接标记为过期
+const generations = new Map<string, number>();
+
+function keyFor(gameId: string, page: number, sort: string) {
+  return `${gameId}|${sort}|${page}`;
+}
+
+function store(entry: Entry) {
+  const key = keyFor(entry.gameId, entry.page, entry.sort);
+  entries.delete(key);
+  entries.set(key, entry);
+  while (entries.size > MAX_ENTRIES) {
+    entries.delete(entries.keys().next().value as string);
+  }
+}
+
+export function commentsUrl(gameId: string, page: number, sort: string, limit: number) {
+  return `/api/comments.ajax?game_id=${encodeURIComponent(gameId)}&page=${page}&limit=${limit}&sort=${sort}`;
+}
+
+export function readCommentPage<T>(gameId: string, page: number, sort: string): CachedCommentPage<T> | null {
+  const entry = entries.get(keyFor(gameId, page, sort));
+  if (!entry) return null;
+  return {
+    data: entry.data as CommentPage<T>,
+    stale: Date.now() - entry.fetchedAt > REVALIDATE_AFTER_MS
+  };
+}
+
+// 请求一页并写入缓存；同一页已经在请求中时复用同一个 Promise
+export function fetchCommentPage<T>(gameId: string, page: number, sort: string, limit: number): Promise<CommentPage<T>> {
+  const key = keyFor(gameId, page, sort);
+  const pending = inflight.get(key);
+  if (pending) return pending as Promise<CommentPage<T>>;
+
+  const generation = generations.get(gameId) ?? 0;
+  const request = (async () => {
+    const response = await fetch(commentsUrl(gameId, page, sort, limit));
+    const payload = (await response.json()) as ApiResponse;
+    if (!payload.success) {
+      throw new Error(payload.error || "Unable to load comments");
+    }
+    const data = { comments: payload.comments, totalPages: payload.pagination.totalPages };
+    store({
+      gameId,
+      page,
+      sort,
+      data,
+      fetchedAt: (generations.get(gameId) ?? 0) === generation ? Date.now() : 0
+    });
+    return data;
+  })().finally(() => inflight.delete(key));
+
+  inflight.set(key, request);
+  return request as Promise<CommentPage<T>>;
+}
+
+// 浏览器空闲时预取一页（通常是下一页），已有未过期的缓存或正在请求时跳过；返回取消函数
+export function prefetchCommentPage(gameId: string, page: number, sort: string, limit: number): () => void {
+  const run = () => {
+    const cached = readCommentPage(gameId, page, sort);
+    if ((cached && !cached.stale) || inflight.has(keyFor(gameId, page, sort))) return;
+    fetchCommentPage(gameId, page, sort, limit).catch(() => undefined);
+  };
+
+  if (typeof window.requestIdleCallback === "function") {
+    const handle = window.requestIdleCallback(run, { timeout: 2000 });
+    return () => window.cancelIdleCallback(handle);
+  }
+  const timer = window.setTimeout(run, IDLE_FALLBACK_MS);
+  return () => window.clearTimeout(timer);
+}
+
+// 就地修改缓存中的页面（乐观更新、推送的增量），不改变它们的新鲜度；match 为空时修改本游戏的所有页
+export function updateCommentPages<T>(
+  gameId: string,
+  updater: (comments: T[]) => T[],
+  match?: (page: number, sort: string) => boolean
+) {
+  for (const entry of entries.values()) {
+    if (entry.gameId !== gameId || (match && !match(entry.page, entry.sort))) continue;
+    entry.data = { ...entry.data, comments: updater(entry.data.comments as T[]) };
+  }
+}
+
+// 标记本游戏的所有页为过期：仍然可以立即显示，但下次显示时会重新请求
+export function invalidateCommentPages(gameId: string) {
+  generations.set(gameId, (generations.get(gameId) ?? 0) + 1);
+  for (const entry of entries.values()) {
+    if (entry.gameId === gameId) entry.fetchedAt = 0;
+  }
+}
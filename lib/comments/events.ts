@@ -0,0 +1,79 @@
+// 评论的实时推送：按 game_id 分频道的进程内发布/订阅，comment-events.ajax 以 SSE 转发给浏览器。
+// 只推送增量（新评论、新回复、投票计数），客户端就地更新列表而不是重新请求整页。
+// 频道在进程内存里，多实例部署时只有写入发生的那个实例的订阅者能收到推送
+
+export type CommentEventType = "comment" | "reply" | "vote";
+
+export interface CommentEvent {
+  id: number;
+  type: CommentEventType | "reset";
+  data: Record<string, unknown>;
+}
+
+type Listener = (event: CommentEvent) => void;
+
+interface Channel {
+  sequence: number;
+  // 最近的事件，断线重连（Last-Event-ID）时补发
+  recent: CommentEvent[];
+  listeners: Set<Listener>;
+}
+
+const REPLAY_LIMIT = 100;
+
+// 开发环境下 HMR 会重新执行本模块，频道挂在 globalThis 上，已建立的连接才能继续收到推送
+const STATE_KEY = Symbol.for("comments.events");
+const channels: Map<string, Channel> = ((globalThis as typeof globalThis & { [STATE_KEY]?: Map<string, Channel> })[
+  STATE_KEY
+] ??= new Map());
+
+function channelFor(gameId: string): Channel {
+  let channel = channels.get(gameId);
+  if (!channel) {
+    channel = { sequence: 0, recent: [], listeners: new Set() };
+    channels.set(gameId, channel);
+  }
+  return channel;
+}
+
+export function publishCommentEvent(gameId: string, type: CommentEventType, data: Record<string, unknown>) {
+  const channel = channelFor(gameId);
+  channel.sequence += 1;
+  const event: CommentEvent = { id: channel.sequence, type, data };
+  channel.recent.push(event);
+  if (channel.recent.length > REPLAY_LIMIT) {
+    channel.recent.shift();
+  }
+  for (const listener of channel.listeners) {
+    listener(event);
+  }
+}
+
+// 订阅一个游戏的事件，返回取消订阅函数。
+// 给出 lastEventId 时先补发之后的事件；补不全（缓冲区已滚动或进程重启过）时发送 reset，让客户端重新加载
+export function subscribeCommentEvents(gameId: string, lastEventId: string | null, listener: Listener): () => void {
+  const channel = channelFor(gameId);
+  const lastId = lastEventId ? Number(lastEventId) : null;
+
+  if (lastId !== null && Number.isInteger(lastId)) {
+    const oldest = channel.recent[0]?.id ?? channel.sequence + 1;
+    if (lastId > channel.sequence || lastId < oldest - 1) {
+      listener({ id: channel.sequence, type: "reset", data: {} });
+    } else {
+      channel.recent.filter((event) => event.id > lastId).forEach(listener);
+    }
+  }
+
+  channel.listeners.add(listener);
+  return () => {
+    channel.listeners.delete(listener);
+  };
+}
+
+export function getSubscriberCount(): number {
+  let count = 0;
+  for (const channel of channels.values()) {
+    count += channel.listeners.size;
+  }
+  return count;
+}
@@ -0,0 +1,180 @@
+import { AsyncLocalStorage } from "node:async_hooks";
+import { createHash } from "node:crypto";
+import { NextResponse } from "next/server";
+
+// 评论接口的请求计时：每个请求记录各阶段耗时（parse / db / replies / serialize ...），
+// 写入 Server-Timing 响应头，并累计到进程内的 Prometheus 直方图
+
+type RouteHandler = (request: Request, context?: unknown) => Promise<Response>;
+
+interface RequestTiming {
+  route: string;
+  method: string;
+  started: number;
+  phases: Map<string, number>;
+}
+
+interface Histogram {
+  labels: Record<string, string>;
+  buckets: number[];
+  sum: number;
+  count: number;
+}
+
+interface MetricsState {
+  requests: Map<string, Histogram>;
+  phases: Map<string, Histogram>;
+}
+
+// 直方图的桶上限（毫秒）
+const BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000];
+
+const storage = new AsyncLocalStorage<RequestTiming>();
+
+// 开发环境下 HMR 会重新执行本模块，指标挂在 globalThis 上才不会被清零
+const STATE_KEY = Symbol.for("comments.metrics");
+const metrics: MetricsState = ((globalThis as typeof globalThis & { [STATE_KEY]?: MetricsState })[STATE_KEY] ??= {
+  requests: new Map(),
+  phases: new Map()
+});
+
+function observe(series: Map<string, Histogram>, labels: Record<string, string>, value: number) {
+  const key = JSON.stringify(labels);
+  let histogram = series.get(key);
+  if (!histogram) {
+    histogram = { labels, buckets: BUCKETS_MS.map(() => 0), sum: 0, count: 0 };
+    series.set(key, histogram);
+  }
+  BUCKETS_MS.forEach((limit, i) => {
+    if (value <= limit) histogram.buckets[i] += 1;
+  });
+  histogram.sum += value;
+  histogram.count += 1;
+}
+
+function addPhase(timing: RequestTiming, phase: string, duration: number) {
+  // 同一阶段出现多次（例如分块插入）时累加
+  timing.phases.set(phase, (timing.phases.get(phase) ?? 0) + duration);
+}
+
+// 当前请求的路由名，日志用；不在请求上下文中时为 undefined
+export function currentRoute(): string | undefined {
+  return storage.getStore()?.route;
+}
+
+// 计时一个阶段；不在 instrumentRoute 包装的请求里调用时直接执行
+export async function timed<T>(phase: string, fn: () => T | PromiseLike<T>): Promise<T> {
+  const timing = storage.getStore();
+  if (!timing) {
+    return fn();
+  }
+  const started = performance.now();
+  try {
+    return await fn();
+  } finally {
+    addPhase(timing, phase, performance.now() - started);
+  }
+}
+
+function serialize(body: unknown): string {
+  const timing = storage.getStore();
+  const started = performance.now();
+  const text = JSON.stringify(body);
+  if (timing) {
+    addPhase(timing, "serialize", performance.now() - started);
+  }
+  return text;
+}
+
+// 代替 NextResponse.json：把 JSON 序列化单独计为 serialize 阶段
+export function jsonResponse(body: unknown, init: ResponseInit = {}): NextResponse {
+  const headers = new Headers(init.headers);
+  headers.set("content-type", "application/json");
+  return new NextResponse(serialize(body), { ...init, headers });
+}
+
+function matchesETag(ifNoneMatch: string | null, etag: string): boolean {
+  if (!ifNoneMatch) return false;
+  // 弱比较：忽略 W/ 前缀
+  const bare = etag.replace(/^W\//, "");
+  return ifNoneMatch.split(",").some((tag) => {
+    const candidate = tag.trim();
+    return candidate === "*" || candidate.replace(/^W\//, "") === bare;
+  });
+}
+
+// 列表响应：按响应体生成 ETag，请求带着相同的 If-None-Match 时返回 304，不再传输响应体。
+// 响应可能被压缩后再发出，所以用弱 ETag；Cache-Control: no-cache 让浏览器每次都带 If-None-Match 回来验证
+export function cachedJsonResponse(request: Request, body: unknown, init: ResponseInit = {}): NextResponse {
+  const text = serialize(body);
+  const etag = `W/"${createHash("sha1").update(text).digest("base64url")}"`;
+  const headers = new Headers(init.headers);
+  headers.set("etag", etag);
+  headers.set("cache-control", "private, no-cache");
+
+  if (matchesETag(request.headers.get("if-none-match"), etag)) {
+    return new NextResponse(null, { ...init, status: 304, headers });
+  }
+  headers.set("content-type", "application/json");
+  return new NextResponse(text, { ...init, headers });
+}
+
+function serverTimingHeader(phases: Map<string, number>, total: number): string {
+  return [...phases, ["total", total] as const]
+    .map(([phase, duration]) => `${phase};dur=${duration.toFixed(1)}`)
+    .join(", ");
+}
+
+// 包装路由处理函数：建立计时上下文，结束时写 Server-Timing 头并记录指标
+export function instrumentRoute(route: string, handler: RouteHandler): RouteHandler {
+  return async (request, context) => {
+    const timing: RequestTiming = { route, method: request.method, started: performance.now(), phases: new Map() };
+    let status = 500;
+    try {
+      const response = await storage.run(timing, () => handler(request, context));
+      status = response.status;
+      const total = performance.now() - timing.started;
+      response.headers.set("Server-Timing", serverTimingHeader(timing.phases, total));
+      return response;
+    } finally {
+      const total = performance.now() - timing.started;
+      observe(metrics.requests, { route, method: timing.method, status: String(status) }, total);
+      for (const [phase, duration] of timing.phases) {
+        observe(metrics.phases, { route, phase }, duration);
+      }
+    }
+  };
+}
+
+function formatLabels(labels: Record<string, string>, extra?: Record<string, string>): string {
+  const pairs = Object.entries({ ...labels, ...extra }).map(
+    ([name, value]) => `${name}="${value.replace(/\\/g, "\\\\").replace(/"/g, '\\"')}"`
+  );
+  return `{${pairs.join(",")}}`;
+}
+
+function formatHistogram(name: string, help: string, series: Map<string, Histogram>): string[] {
+  const lines = [`# HELP ${name} ${help}`, `# TYPE ${name} histogram`];
+  for (const histogram of series.values()) {
+    // observe() 已经按 le 累计计数
+    BUCKETS_MS.forEach((limit, i) => {
+      lines.push(`${name}_bucket${formatLabels(histogram.labels, { le: String(limit) })} ${histogram.buckets[i]}`);
+    });
+    lines.push(`${name}_bucket${formatLabels(histogram.labels, { le: "+Inf" })} ${histogram.count}`);
+    lines.push(`${name}_sum${formatLabels(histogram.labels)} ${histogram.sum.toFixed(3)}`);
+    lines.push(`${name}_count${formatLabels(histogram.labels)} ${histogram.count}`);
+  }
+  return lines;
+}
+
+// Prometheus 文本格式（text/plain; version=0.0.4）
+export function renderMetrics(extra: Record<string, number> = {}): string {
+  const lines = [
+    ...formatHistogram("comments_http_request_duration_ms", "Comment API request duration in milliseconds", metrics.requests),
+    ...formatHistogram("comments_http_phase_duration_ms", "Comment API per-phase duration in milliseconds", metrics.phases)
+  ];
+  for (const [name, value] of Object.entries(extra)) {
+    lines.push(`# TYPE ${name} ${name.endsWith("_total") ? "counter" : "gauge"}`, `${name} ${value}`);
+  }
+  return `${lines.join("\n")}\n`;
+}
@@ -0,0 +1,50 @@
+import { currentRoute } from "./instrumentation";
+
+// 评论接口的分级结构化日志：每条一行 JSON，低于 COMMENTS_LOG_LEVEL 的级别直接丢弃
+// 默认生产环境 info，开发环境 debug；设为 silent 关闭全部日志
+
+type Level = "debug" | "info" | "warn" | "error";
+
+const LEVELS: Record<Level | "silent", number> = { debug: 10, info: 20, warn: 30, error: 40, silent: 100 };
+
+const threshold =
+  LEVELS[process.env.COMMENTS_LOG_LEVEL as Level] ??
+  (process.env.NODE_ENV === "production" ? LEVELS.info : LEVELS.debug);
+
+function serialize(value: unknown): unknown {
+  if (value instanceof Error) {
+    return { name: value.name, message: value.message, ...(value.cause ? { cause: serialize(value.cause) } : {}) };
+  }
+  if (value && typeof value === "object" && "message" in value) {
+    // PostgrestError 等普通对象
+    const { message, code, details, hint } = value as Record<string, unknown>;
+    return { message, code, details, hint };
+  }
+  return value;
+}
+
+function write(level: Level, message: string, fields?: Record<string, unknown>) {
+  if (LEVELS[level] < threshold) {
+    return;
+  }
+  const entry: Record<string, unknown> = { time: new Date().toISOString(), level, msg: message };
+  const route = currentRoute();
+  if (route) {
+    entry.route = route;
+  }
+  for (const [key, value] of Object.entries(fields ?? {})) {
+    entry[key] = serialize(value);
+  }
+  const line = JSON.stringify(entry);
+  if (level === "error") console.error(line);
+  else if (level === "warn") console.warn(line);
+  else console.log(line);
+}
+
+export const logger = {
+  enabled: (level: Level) => LEVELS[level] >= threshold,
+  debug: (message: string, fields?: Record<string, unknown>) => write("debug", message, fields),
+  info: (message: string, fields?: Record<string, unknown>) => write("info", message, fields),
+  warn: (message: string, fields?: Record<string, unknown>) => write("warn", message, fields),
+  error: (message: string, fields?: Record<string, unknown>) => write("error", message, fields)
+};
@@ -0,0 +1,75 @@
+import type { NewComment } from "./service";
+
+// 排队写入模式下的自动审核：明显的垃圾评论标为 spam，可疑的标为 pending 等人工审核，其余直接 approved
+// 规则都是廉价的字符串检查，整批评论在写入前同步跑完
+
+export type ModerationStatus = "approved" | "pending" | "spam";
+
+export interface ModerationResult {
+  status: ModerationStatus;
+  reason?: string;
+}
+
+const URL_PATTERN = /(https?:\/\/|www\.)\S+/gi;
+const REPEATED_CHARS = /(.)\1{11,}/u;
+
+// 默认屏蔽词，可以用 COMMENTS_BLOCKLIST（逗号分隔）追加
+const BLOCKLIST = [
+  "casino",
+  "viagra",
+  "free robux",
+  "robux generator",
+  "crypto giveaway",
+  ...(process.env.COMMENTS_BLOCKLIST ?? "").split(",")
+]
+  .map((word) => word.trim().toLowerCase())
+  .filter(Boolean);
+
+// 同一邮箱短时间内重复发同样的内容视为刷屏
+const DUPLICATE_WINDOW_MS = 10 * 60_000;
+
+// 开发环境下 HMR 会重新执行本模块，挂在 globalThis 上保留最近的评论指纹
+const STATE_KEY = Symbol.for("comments.moderation");
+const recent: Map<string, number> = ((globalThis as typeof globalThis & { [STATE_KEY]?: Map<string, number> })[
+  STATE_KEY
+] ??= new Map());
+
+function fingerprint(comment: NewComment) {
+  return `${comment.email.toLowerCase().trim()}|${comment.content.trim().toLowerCase().replace(/\s+/g, " ")}`;
+}
+
+function isDuplicate(comment: NewComment, now: number) {
+  for (const [key, seenAt] of recent) {
+    if (seenAt > now - DUPLICATE_WINDOW_MS) break;
+    recent.delete(key);
+  }
+  const key = fingerprint(comment);
+  const duplicate = recent.has(key);
+  // 删除再插入，保持 Map 按最近出现时间排序
+  recent.delete(key);
+  recent.set(key, now);
+  return duplicate;
+}
+
+export function moderateComment(comment: NewComment, now = Date.now()): ModerationResult {
+  const content = comment.content.toLowerCase();
+  const links = content.match(URL_PATTERN)?.length ?? 0;
+
+  const blocked = BLOCKLIST.find((word) => content.includes(word) || comment.author.toLowerCase().includes(word));
+  if (blocked) {
+    return { status: "spam", reason: `blocklist:${blocked}` };
+  }
+  if (links > 2) {
+    return { status: "spam", reason: "too_many_links" };
+  }
+  if (isDuplicate(comment, now)) {
+    return { status: "spam", reason: "duplicate" };
+  }
+  if (REPEATED_CHARS.test(comment.content)) {
+    return { status: "pending", reason: "repeated_characters" };
+  }
+  if (links > 0 || comment.author.match(URL_PATTERN)) {
+    return { status: "pending", reason: "contains_link" };
+  }
+  return { status: "approved" };
+}
@@ -0,0 +1,137 @@
+// 评论列表的乐观更新：投票先在本地加一，发表评论先插入占位评论（负数 id，pending 为 true），
+// 接口返回或推送到达后换成服务器的数据，失败时撤销
+
+export interface CommentNode<T> {
+  id: number;
+  author: string;
+  content: string;
+  parent_id: number;
+  like_count: number;
+  dislike_count: number;
+  replies?: T[];
+  reply_count?: number;
+  repliesCursor?: string | null;
+  pending?: boolean;
+}
+
+let lastPendingId = 0;
+
+// 占位评论的临时 id，和服务器的自增 id 不会冲突
+export function nextPendingId() {
+  lastPendingId -= 1;
+  return lastPendingId;
+}
+
+export function findComment<T extends CommentNode<T>>(items: T[], id: number): T | null {
+  for (const item of items) {
+    if (item.id === id) return item;
+    const reply = item.replies ? findComment(item.replies, id) : null;
+    if (reply) return reply;
+  }
+  return null;
+}
+
+export function applyVoteCounts<T extends CommentNode<T>>(items: T[], commentId: number, like: number, dislike: number): T[] {
+  return items.map((item) => {
+    if (item.id === commentId) {
+      return { ...item, like_count: like, dislike_count: dislike };
+    }
+    if (item.replies?.length) {
+      return { ...item, replies: applyVoteCounts(item.replies, commentId, like, dislike) };
+    }
+    return item;
+  });
+}
+
+// 乐观投票：delta 为 1 时先加一，接口失败时用 -1 撤销；成功后由 applyVoteCounts 换成服务器的计数
+export function shiftVote<T extends CommentNode<T>>(items: T[], commentId: number, type: "like" | "dislike", delta: number): T[] {
+  const target = findComment(items, commentId);
+  if (!target) return items;
+  return applyVoteCounts(
+    items,
+    commentId,
+    target.like_count + (type === "like" ? delta : 0),
+    target.dislike_count + (type === "dislike" ? delta : 0)
+  );
+}
+
+function replaceComment<T extends CommentNode<T>>(items: T[], id: number, next: T): T[] {
+  return items.map((item) => {
+    if (item.id === id) return next;
+    if (item.replies?.some((reply) => reply.id === id)) {
+      return { ...item, replies: item.replies.map((reply) => (reply.id === id ? next : reply)) };
+    }
+    return item;
+  });
+}
+
+function removeComment<T extends CommentNode<T>>(items: T[], id: number): T[] {
+  if (items.some((item) => item.id === id)) {
+    return items.filter((item) => item.id !== id);
+  }
+  return items.map((item) =>
+    item.replies?.some((reply) => reply.id === id)
+      ? {
+          ...item,
+          replies: item.replies.filter((reply) => reply.id !== id),
+          reply_count: Math.max(0, (item.reply_count ?? item.replies.length) - 1)
+        }
+      : item
+  );
+}
+
+// 推送到达的评论对应哪一条占位评论（服务器分配 id 之前只能按作者和内容匹配）
+function findPlaceholder<T extends CommentNode<T>>(items: T[], comment: T): T | null {
+  for (const item of items) {
+    if (item.pending && item.parent_id === comment.parent_id && item.author === comment.author && item.content === comment.content) {
+      return item;
+    }
+    const reply = item.replies ? findPlaceholder(item.replies, comment) : null;
+    if (reply) return reply;
+  }
+  return null;
+}
+
+// 插入占位评论：顶级评论放在最前面，回复追加到父评论末尾（父评论还有未加载的回复时也显示出来）
+export function insertPending<T extends CommentNode<T>>(items: T[], placeholder: T, limit: number): T[] {
+  if (!placeholder.parent_id) {
+    return [placeholder, ...items].slice(0, limit);
+  }
+  return items.map((item) =>
+    item.id === placeholder.parent_id
+      ? {
+          ...item,
+          reply_count: (item.reply_count ?? item.replies?.length ?? 0) + 1,
+          replies: [...(item.replies ?? []), placeholder]
+        }
+      : item
+  );
+}
+
+// 插入服务器的评论（接口返回或推送）：已存在时不变；有对应的占位评论时替换它；
+// 回复追加到父评论下，父评论还有未加载的回复时只增加计数，由“加载更多”按顺序取回
+export function upsertComment<T extends CommentNode<T>>(items: T[], comment: T, limit: number): T[] {
+  if (findComment(items, comment.id)) return items;
+  const placeholder = findPlaceholder(items, comment);
+  if (placeholder) return replaceComment(items, placeholder.id, comment);
+  if (!comment.parent_id) {
+    return [comment, ...items].slice(0, limit);
+  }
+  return items.map((item) =>
+    item.id === comment.parent_id
+      ? {
+          ...item,
+          reply_count: (item.reply_count ?? item.replies?.length ?? 0) + 1,
+          replies: item.repliesCursor ? item.replies : [...(item.replies ?? []), comment]
+        }
+      : item
+  );
+}
+
+// 提交结束：成功时把占位评论换成服务器的评论，失败（created 为 null）时撤销；
+// 占位评论已经被推送替换，或者这一页里本来就没有它时不变
+export function settlePending<T extends CommentNode<T>>(items: T[], placeholderId: number, created: T | null): T[] {
+  if (!findComment(items, placeholderId)) return items;
+  if (created && !findComment(items, created.id)) return replaceComment(items, placeholderId, created);
+  return removeComment(items, placeholderId);
+}
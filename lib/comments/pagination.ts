@@ -0,0 +1,96 @@
+import type { SupabaseClient } from "@supabase/supabase-js";
+
+export type CommentSort = "newest" | "oldest" | "popular";
+
+// cursor：键集分页，从游标位置（null 为第一页）往后取；offset：按页码 range 取
+export type CommentPagination = "cursor" | "offset";
+
+interface SortKey {
+  column: "created_at" | "popular_score";
+  ascending: boolean;
+}
+
+const SORT_KEYS: Record<CommentSort, SortKey> = {
+  newest: { column: "created_at", ascending: false },
+  oldest: { column: "created_at", ascending: true },
+  // popular_score 由数据库触发器在写入和投票时维护（见 FINAL_SQL_TO_RUN.sql 的 comment_popular_score）
+  popular: { column: "popular_score", ascending: false }
+};
+
+// 总数只用于显示页数，允许短时间内不精确
+const TOTAL_TTL_MS = 60_000;
+const totalCache = new Map<string, { total: number; expiresAt: number }>();
+
+export interface CursorPosition {
+  value: string | number;
+  id: number;
+}
+
+export function normalizeSort(sort: string | null): CommentSort {
+  return sort && sort in SORT_KEYS ? (sort as CommentSort) : "newest";
+}
+
+export function encodeCursor(sort: CommentSort, row: Record<string, unknown>): string {
+  const { column } = SORT_KEYS[sort];
+  return Buffer.from(JSON.stringify([row[column], row.id])).toString("base64url");
+}
+
+export function decodeCursor(cursor: string | null): CursorPosition | null {
+  if (!cursor) return null;
+  try {
+    const [value, id] = JSON.parse(Buffer.from(cursor, "base64url").toString("utf8"));
+    if ((typeof value !== "string" && typeof value !== "number") || !Number.isInteger(id)) {
+      return null;
+    }
+    return { value, id };
+  } catch {
+    return null;
+  }
+}
+
+// 排序列之外再按 id 排序，保证同一时间/同一热门度的评论顺序稳定
+export function applySortOrder<Q extends { order: (column: string, options: { ascending: boolean }) => Q }>(
+  query: Q,
+  sort: CommentSort
+): Q {
+  const { column, ascending } = SORT_KEYS[sort];
+  return query.order(column, { ascending }).order("id", { ascending });
+}
+
+// (column, id) 元组比较：跳过游标之前的所有行，走 (game_id, parent_id, column, id) 索引
+export function applyKeyset<Q extends { or: (filters: string) => Q }>(
+  query: Q,
+  sort: CommentSort,
+  position: CursorPosition
+): Q {
+  const { column, ascending } = SORT_KEYS[sort];
+  const op = ascending ? "gt" : "lt";
+  const value = typeof position.value === "string" ? `"${position.value.replace(/"/g, '\\"')}"` : position.value;
+  return query.or(`${column}.${op}.${value},and(${column}.eq.${value},id.${op}.${position.id})`);
+}
+
+export async function getCommentTotal(client: SupabaseClient, gameId: string): Promise<number> {
+  const cached = totalCache.get(gameId);
+  if (cached && cached.expiresAt > Date.now()) {
+    return cached.total;
+  }
+
+  const { count, error } = await client
+    .from("comments")
+    .select("id", { count: "estimated", head: true })
+    .eq("game_id", gameId)
+    .eq("parent_id", 0)
+    .eq("status", "approved");
+
+  if (error) {
+    throw new Error(error.message);
+  }
+
+  const total = count ?? 0;
+  totalCache.set(gameId, { total, expiresAt: Date.now() + TOTAL_TTL_MS });
+  return total;
+}
+
+export function invalidateCommentTotal(gameId: string) {
+  totalCache.delete(gameId);
+}
@@ -0,0 +1,52 @@
+import type { CommentRow } from "./service";
+
+// 评论接口返回给浏览器的字段。邮箱、IP、审核状态、更新时间等只在服务端使用，查询时就不选出来；
+// 日期只给 created_at，由客户端按本地格式显示
+
+export const COMMENT_FIELDS = ["id", "author", "content", "parent_id", "like_count", "dislike_count", "created_at"] as const;
+export const COMMENT_COLUMNS = COMMENT_FIELDS.join(", ");
+
+export type PublicCommentRow = Pick<CommentRow, (typeof COMMENT_FIELDS)[number]>;
+
+export interface PublicThread extends PublicCommentRow {
+  replies: PublicCommentRow[];
+  reply_count: number;
+  repliesCursor: string | null;
+}
+
+// 紧凑格式（format=compact）：每条评论是按 fields 顺序排列的数组，顶级评论的 replies 是同样按 reply_fields 排列的数组
+export const THREAD_FIELDS = [...COMMENT_FIELDS, "reply_count", "repliesCursor", "replies"] as const;
+
+export type ResponseFormat = "full" | "compact";
+
+export function normalizeFormat(format: string | null): ResponseFormat {
+  return format === "compact" ? "compact" : "full";
+}
+
+export function projectComment(row: PublicCommentRow): PublicCommentRow {
+  return {
+    id: row.id,
+    author: row.author,
+    content: row.content,
+    parent_id: row.parent_id ?? 0,
+    like_count: row.like_count ?? 0,
+    dislike_count: row.dislike_count ?? 0,
+    created_at: row.created_at
+  };
+}
+
+function toTuple(row: PublicCommentRow) {
+  return COMMENT_FIELDS.map((field) => row[field]);
+}
+
+export function compactComments(rows: PublicCommentRow[]) {
+  return { fields: COMMENT_FIELDS, rows: rows.map(toTuple) };
+}
+
+export function compactThreads(threads: PublicThread[]) {
+  return {
+    fields: THREAD_FIELDS,
+    reply_fields: COMMENT_FIELDS,
+    rows: threads.map((thread) => [...toTuple(thread), thread.reply_count, thread.repliesCursor, thread.replies.map(toTuple)])
+  };
+}
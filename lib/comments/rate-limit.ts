@@ -0,0 +1,252 @@
+import { logger } from "./logger";
+import { isRedisConfigured, redis } from "./redis";
+
+// 写接口（发评论、投票）的限流和投票去重：
+// - 令牌桶：每个接口按 IP、发评论再按邮箱各一个桶，容量等于每分钟上限（允许一次突发），之后匀速补充
+// - 投票去重：同一浏览器（投票 cookie）在滑动窗口内对同一条评论只计一票；不按 IP 去重，共用出口 IP 的访客（NAT、学校、公司网络）
+//   各自都能投票，同一 IP 的刷票由上面的令牌桶限制
+// 状态默认在进程内存里；配置了 Upstash Redis 时放到共享存储，多个实例共用同一份计数，Redis 不可用时退回进程内存。
+// 访客 IP 只信任平台提供的地址（request.ip）或可信代理追加的 X-Forwarded-For 条目，见 clientIp
+
+export type WriteEndpoint = "make-comment" | "comment-vote";
+
+export interface RateLimitResult {
+  allowed: boolean;
+  retryAfterMs: number;
+  scope?: "ip" | "email";
+}
+
+// 可替换的状态存储，默认按是否配置了 Redis 选择 redisStore 或 memoryStore
+export interface RateLimitStore {
+  // 从 key 的桶里取一个令牌；capacity 为桶容量，refillPerMs 为每毫秒补充的令牌数
+  take(key: string, capacity: number, refillPerMs: number, now: number): Promise<{ allowed: boolean; retryAfterMs: number }>;
+  // windowMs 内第一次出现时记下并返回 true，已经记过返回 false
+  remember(key: string, windowMs: number, now: number): Promise<boolean>;
+  forget(key: string): Promise<void>;
+}
+
+// 设为 0 关闭对应的限制
+function envLimit(name: string, fallback: number) {
+  const value = process.env[name];
+  return value ? Number(value) : fallback;
+}
+
+const WINDOW_MS = 60_000;
+// 每分钟上限
+const LIMITS: Record<WriteEndpoint, { ip: number; email?: number }> = {
+  "make-comment": {
+    ip: envLimit("COMMENTS_RATE_COMMENT_IP", 5),
+    email: envLimit("COMMENTS_RATE_COMMENT_EMAIL", 3)
+  },
+  "comment-vote": {
+    ip: envLimit("COMMENTS_RATE_VOTE_IP", 60)
+  }
+};
+const VOTE_DEDUP_WINDOW_MS = envLimit("COMMENTS_VOTE_DEDUP_WINDOW_MS", 24 * 60 * 60_000);
+// 部署在几层反向代理后面（Vercel 为 1）；为 0 时不读 X-Forwarded-For
+const TRUSTED_PROXY_HOPS = Number(process.env.COMMENTS_TRUSTED_PROXY_HOPS) || 0;
+// 进程内最多保留的桶和投票记录数，超出时淘汰最久没有更新的
+const MAX_KEYS = Number(process.env.COMMENTS_RATE_LIMIT_MAX_KEYS) || 100_000;
+
+interface Bucket {
+  tokens: number;
+  updatedAt: number;
+}
+
+interface LimiterState {
+  buckets: Map<string, Bucket>;
+  votes: Map<string, number>;
+  counters: { limitedComments: number; limitedVotes: number; duplicateVotes: number };
+}
+
+// 开发环境下 HMR 会重新执行本模块，挂在 globalThis 上保留桶和投票记录
+const STATE_KEY = Symbol.for("comments.rate-limit");
+const state: LimiterState = ((globalThis as typeof globalThis & { [STATE_KEY]?: LimiterState })[STATE_KEY] ??= {
+  buckets: new Map(),
+  votes: new Map(),
+  counters: { limitedComments: 0, limitedVotes: 0, duplicateVotes: 0 }
+});
+
+function evictOldest(map: Map<string, unknown>) {
+  while (map.size > MAX_KEYS) {
+    map.delete(map.keys().next().value as string);
+  }
+}
+
+export const memoryStore: RateLimitStore = {
+  async take(key, capacity, refillPerMs, now) {
+    // Map 按最后更新时间排列；任何桶在 WINDOW_MS 内都会补满，补满的桶和不存在没有区别，直接删掉
+    for (const [bucketKey, bucket] of state.buckets) {
+      if (bucket.updatedAt > now - WINDOW_MS) break;
+      state.buckets.delete(bucketKey);
+    }
+    const bucket = state.buckets.get(key);
+    const tokens = bucket ? Math.min(capacity, bucket.tokens + (now - bucket.updatedAt) * refillPerMs) : capacity;
+    const allowed = tokens >= 1;
+    state.buckets.delete(key);
+    state.buckets.set(key, { tokens: allowed ? tokens - 1 : tokens, updatedAt: now });
+    evictOldest(state.buckets);
+    return { allowed, retryAfterMs: allowed ? 0 : Math.ceil((1 - tokens) / refillPerMs) };
+  },
+
+  async remember(key, windowMs, now) {
+    // 窗口长度固定，Map 的插入顺序就是过期顺序
+    for (const [voteKey, expiresAt] of state.votes) {
+      if (expiresAt > now) break;
+      state.votes.delete(voteKey);
+    }
+    if (state.votes.has(key)) return false;
+    state.votes.set(key, now + windowMs);
+    evictOldest(state.votes);
+    return true;
+  },
+
+  async forget(key) {
+    state.votes.delete(key);
+  }
+};
+
+// SET NX 成功返回 1、已存在返回 0，其余回复（null、错误）都说明 Redis 没有正常执行
+const REMEMBER_SCRIPT = `
+if redis.call('SET', KEYS[1], 1, 'NX', 'PX', ARGV[1]) then
+  return 1
+end
+return 0
+`;
+
+// 在 Redis 里原子地补充并取出令牌，返回 [是否允许, 剩余令牌数]；令牌数是小数，按字符串返回以免被截断成整数
+const TOKEN_BUCKET_SCRIPT = `
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 't', 'u')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 't', tostring(tokens), 'u', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, tostring(tokens)}
+`;
+
+export const redisStore: RateLimitStore = {
+  async take(key, capacity, refillPerMs, now) {
+    const results = await redis([["EVAL", TOKEN_BUCKET_SCRIPT, 1, `comments:rate:${key}`, capacity, refillPerMs, now]]);
+    const reply = results?.[0];
+    if (!Array.isArray(reply)) return memoryStore.take(key, capacity, refillPerMs, now);
+    const [allowed, tokens] = reply as [number, string];
+    return { allowed: allowed === 1, retryAfterMs: allowed === 1 ? 0 : Math.ceil((1 - Number(tokens)) / refillPerMs) };
+  },
+
+  async remember(key, windowMs, now) {
+    const results = await redis([["EVAL", REMEMBER_SCRIPT, 1, `comments:${key}`, windowMs]]);
+    const reply = results?.[0];
+    if (reply !== 0 && reply !== 1) return memoryStore.remember(key, windowMs, now);
+    return reply === 1;
+  },
+
+  async forget(key) {
+    // remember 可能退回过进程内存，两边都删
+    await memoryStore.forget(key);
+    await redis([["DEL", `comments:${key}`]]);
+  }
+};
+
+let store: RateLimitStore = isRedisConfigured() ? redisStore : memoryStore;
+
+export function setRateLimitStore(next: RateLimitStore) {
+  store = next;
+}
+
+// 访客 IP：优先用平台提供的 request.ip；否则只认可信代理追加的 X-Forwarded-For 条目——
+// 每层代理在末尾追加它看到的对端地址，从右数第 TRUSTED_PROXY_HOPS 个是最外层代理看到的客户端，更左边的由客户端自己填写。
+// 两者都没有（本地直连、没有配置代理层数）时返回 null，只按邮箱限流
+export function clientIp(request: Request & { ip?: string }): string | null {
+  if (request.ip) return request.ip;
+  if (!TRUSTED_PROXY_HOPS) return null;
+  const hops = (request.headers.get("x-forwarded-for") ?? "")
+    .split(",")
+    .map((hop) => hop.trim())
+    .filter(Boolean);
+  return hops[hops.length - TRUSTED_PROXY_HOPS] ?? null;
+}
+
+// Retry-After 头的秒数，至少 1
+export function retryAfterSeconds(result: RateLimitResult) {
+  return String(Math.max(1, Math.ceil(result.retryAfterMs / 1000)));
+}
+
+// 依次从 IP 和邮箱的桶里取令牌，任一耗尽即拒绝；拿不到 IP（本地直连）时只按邮箱限制
+export async function checkRateLimit(
+  endpoint: WriteEndpoint,
+  identity: { ip: string | null; email?: string | null },
+  now = Date.now()
+): Promise<RateLimitResult> {
+  const limits = LIMITS[endpoint];
+  const checks = [
+    ["ip", identity.ip, limits.ip],
+    ["email", identity.email?.trim().toLowerCase(), limits.email]
+  ] as const;
+
+  for (const [scope, id, limit] of checks) {
+    if (!id || !limit) continue;
+    const result = await store.take(`${endpoint}:${scope}:${id}`, limit, limit / WINDOW_MS, now);
+    if (!result.allowed) {
+      if (endpoint === "make-comment") state.counters.limitedComments += 1;
+      else state.counters.limitedVotes += 1;
+      // 不记录 IP 和邮箱
+      logger.debug("写接口限流", { endpoint, scope, retryAfterMs: result.retryAfterMs });
+      return { allowed: false, retryAfterMs: result.retryAfterMs, scope };
+    }
+  }
+  return { allowed: true, retryAfterMs: 0 };
+}
+
+const VOTER_COOKIE = "comment_voter";
+const VOTER_TOKEN_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/;
+
+// 浏览器的投票 cookie；没有或格式不对时签发一个新的，issued 为 true 时需要在响应里用 voterCookie 写回
+export function voterToken(request: Request): { token: string; issued: boolean } {
+  const match = (request.headers.get("cookie") ?? "").match(/(?:^|;\s*)comment_voter=([^;]+)/);
+  const existing = match?.[1].trim();
+  if (existing && VOTER_TOKEN_PATTERN.test(existing)) return { token: existing, issued: false };
+  return { token: crypto.randomUUID(), issued: true };
+}
+
+export function voterCookie(token: string) {
+  const secure = process.env.NODE_ENV === "production" ? "; Secure" : "";
+  return `${VOTER_COOKIE}=${token}; Path=/; Max-Age=${Math.ceil(VOTE_DEDUP_WINDOW_MS / 1000) || 86400}; HttpOnly; SameSite=Lax${secure}`;
+}
+
+function voteKey(commentId: number | string, token: string) {
+  return `vote:${commentId}:${token}`;
+}
+
+// 记下这一票；这个浏览器在去重窗口内已经给这条评论投过票（不论赞还是踩）时返回 false
+export async function claimVote(commentId: number | string, token: string, now = Date.now()) {
+  if (!VOTE_DEDUP_WINDOW_MS) return true;
+  const fresh = await store.remember(voteKey(commentId, token), VOTE_DEDUP_WINDOW_MS, now);
+  if (!fresh) state.counters.duplicateVotes += 1;
+  return fresh;
+}
+
+// 投票没有写进数据库（评论不存在、写入失败）时撤销记录，允许重试
+export async function releaseVote(commentId: number | string, token: string) {
+  await store.forget(voteKey(commentId, token));
+}
+
+export function getRateLimitStats() {
+  return {
+    ...state.counters,
+    buckets: state.buckets.size,
+    votes: state.votes.size,
+    limits: LIMITS,
+    voteDedupWindowMs: VOTE_DEDUP_WINDOW_MS,
+    trustedProxyHops: TRUSTED_PROXY_HOPS,
+    sharedBackend: store === redisStore
+  };
+}
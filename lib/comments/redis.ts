@@ -0,0 +1,29 @@
+import { logger } from "./logger";
+
+// 评论列表缓存和写接口限流共用的 Upstash Redis REST 客户端，没有配置时所有调用返回 null
+
+const redisUrl = process.env.UPSTASH_REDIS_REST_URL;
+const redisToken = process.env.UPSTASH_REDIS_REST_TOKEN;
+
+export function isRedisConfigured() {
+  return Boolean(redisUrl && redisToken);
+}
+
+// 一次往返执行一组命令，返回每条命令的结果；未配置或请求失败时返回 null，由调用方退化为进程内状态
+export async function redis(commands: (string | number)[][]): Promise<unknown[] | null> {
+  if (!redisUrl || !redisToken) return null;
+  try {
+    const response = await fetch(`${redisUrl}/pipeline`, {
+      method: "POST",
+      headers: { Authorization: `Bearer ${redisToken}` },
+      body: JSON.stringify(commands),
+      cache: "no-store"
+    });
+    if (!response.ok) return null;
+    const results = (await response.json()) as { result?: unknown }[];
+    return results.map((item) => item.result ?? null);
+  } catch (error) {
+    logger.warn("评论共享存储不可用", { error });
+    return null;
+  }
+}
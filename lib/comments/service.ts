@@ -1,88 +1,387 @@
-﻿import { createClient } from "@supabase/supabase-js";
+﻿import type { SupabaseClient } from "@supabase/supabase-js";
+import { supabaseAdmin } from "@/lib/supabase-admin";
 import { HOMEPAGE_GAME_ID } from "./constants";
+import { type CacheStatus, invalidateCommentList, readThrough } from "./cache";
+import { publishCommentEvent } from "./events";
+import { timed } from "./instrumentation";
+import { logger } from "./logger";
+import { COMMENT_COLUMNS, type PublicCommentRow, type PublicThread, projectComment } from "./projection";
+import {
+  type CommentPagination,
+  type CommentSort,
+  type CursorPosition,
+  applyKeyset,
+  applySortOrder,
+  decodeCursor,
+  encodeCursor,
+  getCommentTotal,
+  invalidateCommentTotal
+} from "./pagination";
 
-const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL;
-const serviceKey = process.env.SUPABASE_SERVICE_ROLE_KEY;
-let cachedClient: ReturnType<typeof createClient> | null = null;
+// 评论的唯一数据访问层：*.ajax 接口和 /api/comments 都经过这里，
+// 共用 lib/supabase-admin 的服务端客户端、comments 表结构、查询、缓存和失效逻辑
 
-function getSupabase() {
-  if (!supabaseUrl || !serviceKey) {
-    throw new Error("Missing Supabase credentials. Set NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY.");
-  }
-  if (!cachedClient) {
-    cachedClient = createClient(supabaseUrl, serviceKey, {
-      auth: {
-        autoRefreshToken: false,
-        persistSession: false
-      }
-    });
-  }
-  return cachedClient;
-}
+export const DEFAULT_GAME_ID = "steal-brainrot";
+export const EMAIL_REGEX = /^[^\s@]+@[^\s@]+\.[^\s@]+$/;
+export const NOT_CONFIGURED_MESSAGE =
+  "Supabase is not configured. Set the required environment variables to enable comments.";
 
-interface CommentRow {
-  id: string;
-  game_id: string;
+// 每个插入语句最多的行数
+const INSERT_CHUNK_SIZE = 250;
+// 插入后取回的列：足够生成实时推送的事件，不包含邮箱和 IP
+const INSERTED_COLUMNS = `${COMMENT_COLUMNS}, game_id, status`;
+// 列表查询的列：公开字段 + 游标用的排序列 + 视图嵌套好的回复
+const THREAD_COLUMNS = `${COMMENT_COLUMNS}, popular_score, replies, reply_count`;
+
+export interface CommentRow {
+  id: number;
   author: string;
   email: string;
-  body: string;
+  content: string;
+  parent_id: number;
+  game_id: string;
+  status: string;
+  ip_address?: string | null;
+  like_count: number;
+  dislike_count: number;
+  // 热门排序键，数据库触发器维护
+  popular_score?: number;
   created_at: string;
+  updated_at?: string;
 }
 
-export interface PublicComment {
-  id: string;
+// comment_threads 视图：顶级评论 + 前几条回复 + 回复总数
+export interface CommentThreadRow extends CommentRow {
+  replies: PublicCommentRow[] | null;
+  reply_count: number;
+}
+
+export interface NewComment {
   author: string;
-  body: string;
-  createdAt: string;
+  email: string;
+  content: string;
+  parentId?: number;
+  gameId?: string;
+  status?: string;
+  ipAddress?: string | null;
+  createdAt?: string;
 }
 
-const mapRow = (row: CommentRow): PublicComment => ({
-  id: row.id,
-  author: row.author,
-  body: row.body,
-  createdAt: row.created_at
-});
+export interface CommentPageQuery {
+  gameId: string;
+  sort: CommentSort;
+  pagination: CommentPagination;
+  page: number;
+  limit: number;
+  // 游标模式下的起始位置，null 表示第一页；offset 模式忽略
+  cursor: string | null;
+}
 
-export async function fetchComments(limit: number, cursor?: string | null) {
-  let query = getSupabase()
-    .from<CommentRow>("comments")
-    .select("*")
-    .eq("game_id", HOMEPAGE_GAME_ID)
-    .order("created_at", { ascending: false })
-    .limit(limit);
-
-  if (cursor) {
-    query = query.lt("created_at", cursor);
+export type InsertResult =
+  | { index: number; success: true; id: number }
+  | { index: number; success: false; error: string };
+
+export class CommentServiceError extends Error {
+  constructor(message: string, cause?: unknown) {
+    super(message);
+    this.name = "CommentServiceError";
+    this.cause = cause;
+  }
+}
+
+export function isCommentServiceConfigured(): boolean {
+  return Boolean(supabaseAdmin);
+}
+
+function getClient(): SupabaseClient {
+  if (!supabaseAdmin) {
+    throw new CommentServiceError(NOT_CONFIGURED_MESSAGE);
+  }
+  return supabaseAdmin;
+}
+
+function toRow(input: NewComment) {
+  return {
+    author: input.author.trim(),
+    email: input.email.toLowerCase().trim(),
+    content: input.content.trim(),
+    parent_id: input.parentId ?? 0,
+    game_id: input.gameId ?? DEFAULT_GAME_ID,
+    ...(input.status ? { status: input.status } : {}),
+    ...(input.ipAddress ? { ip_address: input.ipAddress } : {}),
+    ...(input.createdAt ? { created_at: input.createdAt } : {})
+  };
+}
+
+// 写入后清掉该游戏的列表缓存；顶级评论数量变化时同时清掉总数缓存
+async function invalidateGame(gameId: string, topLevelChanged: boolean) {
+  if (topLevelChanged) {
+    invalidateCommentTotal(gameId);
   }
+  await timed("invalidate", () => invalidateCommentList(gameId));
+}
+
+// 已批准的新评论推送给该游戏的订阅者：顶级评论为 comment 事件，回复为 reply 事件（不包含邮箱和 IP）
+function notifyInserted(row: CommentRow) {
+  if (row.status !== "approved") {
+    return;
+  }
+  publishCommentEvent(row.game_id, row.parent_id ? "reply" : "comment", { ...projectComment(row) });
+}
+
+// 查询一页评论（不经过缓存）
+async function loadCommentPage({ gameId, sort, pagination: mode, page, limit, cursor }: CommentPageQuery) {
+  const client = getClient();
+  const cursorMode = mode === "cursor";
+  const position: CursorPosition | null = decodeCursor(cursor);
+  const offset = (page - 1) * limit;
+
+  // comment_threads 视图只包含顶级评论，每条已带上前几条回复和回复总数
+  let query = applySortOrder(client.from("comment_threads").select(THREAD_COLUMNS).eq("game_id", gameId), sort);
+  if (cursorMode && position) {
+    query = applyKeyset(query, sort, position);
+  }
+
+  // 分页：游标模式多取一条用来判断是否还有下一页（两个查询并行，分别计时）
+  const [{ data, error }, count] = await Promise.all([
+    timed("db", () => (cursorMode ? query.limit(limit + 1) : query.range(offset, offset + limit - 1))),
+    timed("count", () => getCommentTotal(client, gameId)).catch(() => null)
+  ]);
+
+  logger.debug("评论查询", {
+    gameId,
+    sort,
+    limit,
+    offset: cursorMode ? null : offset,
+    rowCount: data?.length ?? 0,
+    total: count,
+    error
+  });
 
-  const { data, error } = await query;
   if (error) {
-    throw new Error(error.message);
+    throw new CommentServiceError("加载评论失败", error);
   }
 
-  const sanitized = (data ?? []).map(mapRow);
-  const nextCursor = sanitized.length === limit ? sanitized[sanitized.length - 1].createdAt : null;
+  const rows = (data ?? []) as CommentThreadRow[];
+  const hasMore = cursorMode && rows.length > limit;
+  const comments = hasMore ? rows.slice(0, limit) : rows;
+
+  // 回复已经由视图嵌套好，超出预览条数的部分给出加载更多的游标
+  const commentsWithReplies = comments.map((comment): PublicThread => {
+    const replies = (comment.replies || []).map(projectComment);
+    return {
+      ...projectComment(comment),
+      replies,
+      reply_count: comment.reply_count,
+      repliesCursor: comment.reply_count > replies.length
+        ? encodeCursor("oldest", replies[replies.length - 1])
+        : null
+    };
+  });
+
+  const total = count || 0;
+  const pagination = cursorMode
+    ? {
+      limit,
+      total,
+      totalPages: Math.ceil(total / limit),
+      hasMore,
+      nextCursor: hasMore ? encodeCursor(sort, comments[comments.length - 1]) : null
+    }
+    : {
+      page,
+      limit,
+      total,
+      totalPages: Math.max(page, Math.ceil(total / limit))
+    };
+
+  return { comments: commentsWithReplies, pagination };
+}
+
+export type CommentPage = Awaited<ReturnType<typeof loadCommentPage>>;
 
-  return { data: sanitized, nextCursor };
+// 读穿缓存：命中时不访问数据库；本模块的写入函数会按游戏失效
+export function listCommentPage(query: CommentPageQuery): Promise<{ value: CommentPage; status: CacheStatus }> {
+  return readThrough(
+    {
+      gameId: query.gameId,
+      sort: query.sort,
+      pagination: query.pagination,
+      page: query.page,
+      cursor: query.cursor,
+      limit: query.limit
+    },
+    () => loadCommentPage(query)
+  );
 }
 
-export async function createComment(input: { name: string; email: string; body: string }) {
-  const payload = {
-    author: input.name.trim(),
-    email: input.email.trim(),
-    body: input.body.trim(),
-    game_id: HOMEPAGE_GAME_ID
+// 一条评论的回复，按时间顺序从游标之后开始
+export async function listReplies(commentId: number, limit: number, position: CursorPosition | null) {
+  let query = applySortOrder(
+    getClient().from("comments").select(COMMENT_COLUMNS).eq("parent_id", commentId).eq("status", "approved"),
+    "oldest"
+  );
+  if (position) {
+    query = applyKeyset(query, "oldest", position);
+  }
+
+  const { data, error } = await timed("replies", () => query.limit(limit + 1));
+  if (error) {
+    throw new CommentServiceError("加载回复失败", error);
+  }
+
+  const rows = (data ?? []) as CommentRow[];
+  const hasMore = rows.length > limit;
+  const replies = (hasMore ? rows.slice(0, limit) : rows).map(projectComment);
+
+  return {
+    replies,
+    hasMore,
+    nextCursor: hasMore ? encodeCursor("oldest", replies[replies.length - 1]) : null
   };
+}
 
-  const { data, error } = await getSupabase()
-    .from<CommentRow>("comments")
-    .insert(payload)
-    .select("*")
-    .single();
+export async function createComment(input: NewComment): Promise<CommentRow> {
+  const { data, error } = await timed("db", () => getClient()
+    .from("comments")
+    .insert(toRow(input))
+    .select()
+    .single());
 
   if (error || !data) {
-    throw new Error(error?.message ?? "Unable to save comment");
+    throw new CommentServiceError("保存评论失败", error);
+  }
+
+  const row = data as CommentRow;
+  // 回复也会改变列表里的 replies / reply_count
+  await invalidateGame(row.game_id, !row.parent_id);
+  notifyInserted(row);
+  return row;
+}
+
+// 分块多行插入；某一块失败时逐行重试，把出错的行找出来，其余行照常写入。
+// notify 为 true 时把已批准的行推送给订阅者（排队写入需要，批量导入历史评论时不推送）
+export async function insertComments(
+  inputs: { index: number; comment: NewComment }[],
+  { notify = false }: { notify?: boolean } = {}
+): Promise<InsertResult[]> {
+  const client = getClient();
+  const results: InsertResult[] = [];
+  const insertedRows: CommentRow[] = [];
+
+  for (let start = 0; start < inputs.length; start += INSERT_CHUNK_SIZE) {
+    const chunk = inputs.slice(start, start + INSERT_CHUNK_SIZE);
+    const { data, error } = await timed("db", () => client
+      .from("comments")
+      .insert(chunk.map(({ comment }) => toRow(comment)))
+      .select(INSERTED_COLUMNS));
+
+    if (!error) {
+      const rows = data as CommentRow[];
+      chunk.forEach(({ index }, i) => results.push({ index, success: true, id: rows[i]?.id }));
+      insertedRows.push(...rows);
+      continue;
+    }
+
+    logger.warn("批量插入失败，逐行重试", { rows: chunk.length, error });
+    for (const { index, comment } of chunk) {
+      const { data: single, error: rowError } = await timed("db", () => client
+        .from("comments")
+        .insert(toRow(comment))
+        .select(INSERTED_COLUMNS)
+        .single());
+      if (rowError) {
+        results.push({ index, success: false, error: rowError.message });
+      } else {
+        results.push({ index, success: true, id: (single as CommentRow).id });
+        insertedRows.push(single as CommentRow);
+      }
+    }
+  }
+
+  // 每个涉及的游戏只失效一次
+  const inserted = new Set(results.filter((result) => result.success).map((result) => result.index));
+  const touched = new Set(
+    inputs.filter(({ index }) => inserted.has(index)).map(({ comment }) => comment.gameId ?? DEFAULT_GAME_ID)
+  );
+  for (const gameId of touched) {
+    await invalidateGame(gameId, true);
+  }
+  if (notify) {
+    insertedRows.forEach(notifyInserted);
+  }
+  return results;
+}
+
+// 在数据库里原子地自增计数并返回最新值（一次往返，不会丢失并发投票）；评论不存在时返回 null
+export async function voteComment(commentId: number, voteType: "like" | "dislike") {
+  const { data, error } = await timed("db", () => getClient()
+    .rpc("increment_comment_vote", { p_comment_id: commentId, p_vote_type: voteType })
+    .maybeSingle());
+
+  if (error) {
+    throw new CommentServiceError("处理投票失败", error);
+  }
+  if (!data) {
+    return null;
   }
 
-  return mapRow(data);
+  const row = data as CommentRow;
+  await invalidateGame(row.game_id, false);
+  publishCommentEvent(row.game_id, "vote", { id: commentId, like_count: row.like_count, dislike_count: row.dislike_count });
+  return { like: row.like_count, dislike: row.dislike_count };
+}
+
+// /api/comments 的公开格式：只暴露必要字段，正文字段名为 body。
+// 这个接口保持原来的约定：id 为字符串，游标是上一页最后一条的 createdAt（不是 *.ajax 的不透明游标）
+export interface PublicComment {
+  id: string;
+  author: string;
+  body: string;
+  createdAt: string;
+}
+
+type PublicSource = Pick<PublicCommentRow, "id" | "author" | "content" | "created_at">;
+
+const toPublic = (row: PublicSource): PublicComment => ({
+  id: String(row.id),
+  author: row.author,
+  body: row.content,
+  createdAt: row.created_at
+});
+
+// 合法的 /api/comments 游标：一个时间戳
+export function isPublicCursor(cursor: string) {
+  return !Number.isNaN(Date.parse(cursor));
+}
+
+export async function fetchComments(limit: number, cursor?: string | null) {
+  // createdAt 游标换成 (created_at, id) 键集位置；id 取 0 时等价于 created_at < cursor
+  const { value } = await listCommentPage({
+    gameId: HOMEPAGE_GAME_ID,
+    sort: "newest",
+    pagination: "cursor",
+    page: 1,
+    limit,
+    cursor: cursor ? encodeCursor("newest", { created_at: cursor, id: 0 }) : null
+  });
+
+  const data = value.comments.map(toPublic);
+  const hasMore = "hasMore" in value.pagination && value.pagination.hasMore;
+  return {
+    data,
+    nextCursor: hasMore ? data[data.length - 1].createdAt : null
+  };
+}
+
+export async function createPublicComment(input: { name: string; email: string; body: string }) {
+  const row = await createComment({
+    author: input.name,
+    email: input.email,
+    content: input.body,
+    gameId: HOMEPAGE_GAME_ID,
+    // 列表只显示已批准的评论，公开接口与 make-comment.ajax 同样直接批准
+    status: "approved"
+  });
+  return toPublic(row);
 }
@@ -0,0 +1,158 @@
+import { randomUUID } from "node:crypto";
+import { logger } from "./logger";
+import { type ModerationStatus, moderateComment } from "./moderation";
+import { DEFAULT_GAME_ID, type NewComment, insertComments } from "./service";
+
+// 排队写入：make-comment.ajax 校验后把评论放进进程内队列立即返回 202，
+// 后台按批做自动审核并多行插入；提交状态通过 comment-status.ajax 查询。
+// 队列在进程内存里，进程退出时尚未写入的评论会丢失，对可靠性有要求时继续使用同步模式
+
+const BATCH_SIZE = Number(process.env.COMMENTS_QUEUE_BATCH_SIZE) || 100;
+const FLUSH_INTERVAL_MS = Number(process.env.COMMENTS_QUEUE_FLUSH_MS) || 200;
+const MAX_QUEUE_LENGTH = Number(process.env.COMMENTS_QUEUE_MAX_LENGTH) || 5000;
+// 提交状态保留多久，过期后查询返回 404
+const SUBMISSION_TTL_MS = 10 * 60_000;
+
+export type SubmissionStatus = "queued" | ModerationStatus | "failed";
+
+export interface Submission {
+  id: string;
+  status: SubmissionStatus;
+  gameId: string;
+  commentId?: number;
+  reason?: string;
+  error?: string;
+  submittedAt: number;
+  processedAt?: number;
+}
+
+interface QueueState {
+  pending: { submission: Submission; comment: NewComment }[];
+  submissions: Map<string, Submission>;
+  timer: ReturnType<typeof setTimeout> | null;
+  flushing: Promise<void> | null;
+  counters: { enqueued: number; rejected: number; inserted: number; failed: number; batches: number };
+}
+
+export class QueueFullError extends Error {
+  constructor() {
+    super("评论队列已满，请稍后再试");
+    this.name = "QueueFullError";
+  }
+}
+
+// 开发环境下 HMR 会重新执行本模块，队列和定时器挂在 globalThis 上，避免丢失或重复处理
+const STATE_KEY = Symbol.for("comments.write-queue");
+const state: QueueState = ((globalThis as typeof globalThis & { [STATE_KEY]?: QueueState })[STATE_KEY] ??= {
+  pending: [],
+  submissions: new Map(),
+  timer: null,
+  flushing: null,
+  counters: { enqueued: 0, rejected: 0, inserted: 0, failed: 0, batches: 0 }
+});
+
+function sweepSubmissions(now: number) {
+  // Map 按提交顺序排列，遇到第一个未过期的就可以停止
+  for (const [id, submission] of state.submissions) {
+    if (submission.submittedAt > now - SUBMISSION_TTL_MS) break;
+    if (submission.status !== "queued") state.submissions.delete(id);
+  }
+}
+
+async function processBatch(batch: QueueState["pending"]) {
+  const now = Date.now();
+  // 审核结果随评论一起写入；写入完成前提交状态保持 queued，approved 即表示已经可见
+  const verdicts = batch.map(({ comment }) => moderateComment(comment, now));
+  const inputs = batch.map(({ comment }, index) => ({ index, comment: { ...comment, status: verdicts[index].status } }));
+
+  try {
+    for (const result of await insertComments(inputs, { notify: true })) {
+      const { submission } = batch[result.index];
+      if (result.success) {
+        submission.status = verdicts[result.index].status;
+        submission.reason = verdicts[result.index].reason;
+        submission.commentId = result.id;
+        state.counters.inserted += 1;
+      } else {
+        submission.status = "failed";
+        submission.error = result.error;
+        state.counters.failed += 1;
+      }
+    }
+  } catch (error) {
+    logger.error("排队评论写入失败", { rows: batch.length, error });
+    for (const { submission } of batch) {
+      submission.status = "failed";
+      submission.error = "保存评论失败";
+    }
+    state.counters.failed += batch.length;
+  }
+
+  for (const { submission } of batch) {
+    submission.processedAt = Date.now();
+  }
+  state.counters.batches += 1;
+}
+
+// 依次处理队列直到清空；同一时间只有一个 flush 在运行
+function flush(): Promise<void> {
+  if (state.timer) {
+    clearTimeout(state.timer);
+    state.timer = null;
+  }
+  state.flushing ??= (async () => {
+    try {
+      while (state.pending.length > 0) {
+        await processBatch(state.pending.splice(0, BATCH_SIZE));
+      }
+    } finally {
+      state.flushing = null;
+    }
+  })();
+  return state.flushing;
+}
+
+function scheduleFlush() {
+  if (state.pending.length >= BATCH_SIZE) {
+    void flush();
+  } else if (!state.timer && !state.flushing) {
+    state.timer = setTimeout(() => void flush(), FLUSH_INTERVAL_MS);
+  }
+}
+
+// 放入队列并返回提交记录；队列已满时抛出 QueueFullError
+export function enqueueComment(comment: NewComment): Submission {
+  if (state.pending.length >= MAX_QUEUE_LENGTH) {
+    state.counters.rejected += 1;
+    throw new QueueFullError();
+  }
+
+  const now = Date.now();
+  sweepSubmissions(now);
+  const submission: Submission = {
+    id: randomUUID(),
+    status: "queued",
+    gameId: comment.gameId ?? DEFAULT_GAME_ID,
+    submittedAt: now
+  };
+  state.submissions.set(submission.id, submission);
+  state.pending.push({ submission, comment });
+  state.counters.enqueued += 1;
+  scheduleFlush();
+  return submission;
+}
+
+export function getSubmission(id: string): Submission | null {
+  return state.submissions.get(id) ?? null;
+}
+
+export function getQueueStats() {
+  return {
+    ...state.counters,
+    depth: state.pending.length,
+    tracked: state.submissions.size,
+    batchSize: BATCH_SIZE,
+    flushIntervalMs: FLUSH_INTERVAL_MS,
+    maxLength: MAX_QUEUE_LENGTH
+  };
+}
@@ -1,4 +1,5 @@
-﻿import fs from "node:fs/promises";
+﻿import { watch } from "node:fs";
+import fs from "node:fs/promises";
 import path from "node:path";
 import type {
   FAQData,
@@ -9,9 +10,37 @@ import type {
 } from "./types";
 
 const DATA_DIR = path.join(process.cwd(), "data", "homepage-optimization");
+const SITE_CONFIG_PATH = path.join(process.cwd(), "data", "site-config.json");
 
-async function loadJson<T>(file: string): Promise<T> {
-  const filePath = path.join(DATA_DIR, file);
+const SOURCE_FILES = [
+  path.join(DATA_DIR, "stats.json"),
+  path.join(DATA_DIR, "recommended.json"),
+  path.join(DATA_DIR, "faq.json"),
+  path.join(DATA_DIR, "content.mdx"),
+  SITE_CONFIG_PATH
+];
+
+// static：首次加载后常驻（生产环境默认，启动时预加载）
+// watch：fs.watch 监听数据文件，变更时失效（开发环境默认）
+// mtime：每次调用比较文件 mtime，适用于 fs.watch 不可用的环境
+type CacheMode = "static" | "watch" | "mtime";
+
+const CACHE_MODE: CacheMode =
+  (process.env.HOMEPAGE_DATA_CACHE as CacheMode | undefined) ??
+  (process.env.NODE_ENV === "production" ? "static" : "watch");
+
+interface CacheState {
+  entry: { signature: string; data: Promise<HomepageData> } | null;
+  watching?: "active" | "failed";
+}
+
+// 开发环境下 HMR 会重新执行本模块，缓存和监听器挂在 globalThis 上，避免重复注册和失效不到
+const STATE_KEY = Symbol.for("homepage-data.cache");
+const state: CacheState = ((globalThis as typeof globalThis & { [STATE_KEY]?: CacheState })[STATE_KEY] ??= {
+  entry: null
+});
+
+async function loadJson<T>(filePath: string): Promise<T> {
   const raw = await fs.readFile(filePath, "utf8");
   const sanitized = raw.replace(/^\uFEFF/, "").trim();
   return JSON.parse(sanitized) as T;
@@ -31,15 +60,12 @@ function extractToc(markdown: string): TocItem[] {
   return toc;
 }
 
-export async function getHomepageData(): Promise<HomepageData> {
+async function readHomepageData(): Promise<HomepageData> {
   const [{ hero, stats }, recommended, faq, site, content] = await Promise.all([
-    loadJson<{ hero: HomepageData["hero"]; stats: HomepageData["stats"] }>("stats.json"),
-    loadJson<RecommendedGame[]>("recommended.json"),
-    loadJson<FAQData>("faq.json"),
-    (async () => {
-      const raw = await fs.readFile(path.join(process.cwd(), "data", "site-config.json"), "utf8");
-      return JSON.parse(raw.replace(/^\uFEFF/, "").trim()) as SiteConfig;
-    })(),
+    loadJson<{ hero: HomepageData["hero"]; stats: HomepageData["stats"] }>(path.join(DATA_DIR, "stats.json")),
+    loadJson<RecommendedGame[]>(path.join(DATA_DIR, "recommended.json")),
+    loadJson<FAQData>(path.join(DATA_DIR, "faq.json")),
+    loadJson<SiteConfig>(SITE_CONFIG_PATH),
     fs.readFile(path.join(DATA_DIR, "content.mdx"), "utf8")
   ]);
 
@@ -53,3 +79,55 @@ export async function getHomepageData(): Promise<HomepageData> {
     toc: extractToc(content)
   };
 }
+
+async function sourceSignature(): Promise<string> {
+  const stats = await Promise.all(SOURCE_FILES.map((file) => fs.stat(file)));
+  return stats.map((stat) => `${stat.mtimeMs}:${stat.size}`).join("|");
+}
+
+export function invalidateHomepageData() {
+  state.entry = null;
+}
+
+function ensureWatching(): boolean {
+  if (!state.watching) {
+    try {
+      const watched = new Set(SOURCE_FILES);
+      for (const dir of new Set(SOURCE_FILES.map((file) => path.dirname(file)))) {
+        // 监听目录而不是文件：编辑器保存时常常是“写临时文件再改名”
+        watch(dir, (_event, filename) => {
+          if (!filename || watched.has(path.join(dir, filename.toString()))) {
+            invalidateHomepageData();
+          }
+        }).unref();
+      }
+      state.watching = "active";
+    } catch (error) {
+      console.warn("⚠️ 无法监听首页数据目录，改为按 mtime 校验:", error);
+      state.watching = "failed";
+    }
+  }
+  return state.watching === "active";
+}
+
+export async function getHomepageData(): Promise<HomepageData> {
+  const checkMtime = CACHE_MODE === "mtime" || (CACHE_MODE === "watch" && !ensureWatching());
+  const signature = checkMtime ? await sourceSignature() : "";
+  if (state.entry && state.entry.signature === signature) {
+    return state.entry.data;
+  }
+
+  const entry = { signature, data: readHomepageData() };
+  state.entry = entry;
+  // 读取失败时不缓存，下次调用重试
+  entry.data.catch(() => {
+    if (state.entry === entry) state.entry = null;
+  });
+  return entry.data;
+}
+
+if (CACHE_MODE === "static") {
+  getHomepageData().catch((error) => {
+    console.error("❌ 预加载首页数据失败:", error);
+  });
+}
@@ -1,11 +1,56 @@
 import fs from 'fs';
 import path from 'path';
+import { once } from 'events';
 import { fileURLToPath } from 'url';
 import { SitemapEntry } from './types';
 
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
-const projectRoot = path.dirname(__dirname);
+// lib/seo -> 项目根目录
+const projectRoot = path.dirname(path.dirname(__dirname));
+
+// 单个 sitemap 文件最多 50,000 个 URL，超过后拆分并用 sitemap index 汇总
+export const MAX_URLS_PER_SITEMAP = 50000;
+const INDEX_VERSION = 1;
+const DEFAULT_INDEX_PATH = path.join(projectRoot, '.sitemap-index.json');
+
+const URLSET_OPEN = `<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+        xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
+        http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">
+`;
+
+interface DirectoryNode {
+  mtimeMs: number;
+  subdirs: string[];
+  pageFile: string | null;
+}
+
+// 持久化的页面索引：目录 -> mtime/子目录，路由 -> lastmod
+export interface SitemapPageIndex {
+  version: number;
+  generatedAt: string;
+  dirs: Record<string, DirectoryNode>;
+  pages: Record<string, string>;
+  files?: string[];
+  urlCount?: number;
+}
+
+export interface IncrementalSitemapOptions {
+  indexPath?: string;
+  outputDir?: string;
+  force?: boolean;
+}
+
+export interface IncrementalSitemapResult {
+  files: string[];
+  urlCount: number;
+  split: boolean;
+  written: boolean;
+  rescanned: number;
+  reused: number;
+}
 
 export class SitemapGenerator {
   private appDir: string;
@@ -80,6 +125,105 @@ export class SitemapGenerator {
     return pages.sort();
   }
 
+  // 增量生成：只重新扫描 mtime 变化过的目录，输出以流的方式写入，超过 50k URL 时拆分
+  async generateIncremental(
+    baseUrl: string = 'https://www.stealabrainrot.quest',
+    options: IncrementalSitemapOptions = {}
+  ): Promise<IncrementalSitemapResult> {
+    const indexPath = options.indexPath || DEFAULT_INDEX_PATH;
+    const outputDir = options.outputDir || this.publicDir;
+    const previous = this.loadIndex(indexPath);
+    const { index, stats } = this.scanPagesIncremental(previous);
+
+    const previousFiles = previous?.files || [];
+    const unchanged = previous !== null &&
+      previousFiles.length > 0 &&
+      JSON.stringify(previous.pages) === JSON.stringify(index.pages) &&
+      previousFiles.every(file => fs.existsSync(path.join(outputDir, file)));
+    if (unchanged && !options.force) {
+      console.log(`Sitemap unchanged (${stats.reused} directories reused), skipping write`);
+      fs.writeFileSync(indexPath, JSON.stringify({ ...index, files: previousFiles, urlCount: previous.urlCount }));
+      return {
+        files: previousFiles,
+        urlCount: previous.urlCount || 0,
+        split: previousFiles.length > 1,
+        written: false,
+        ...stats
+      };
+    }
+
+    const routes = Object.keys(index.pages);
+    this.addStaticPages(routes);
+    const entries = routes.sort().map(route => this.createSitemapEntry(route, baseUrl, index.pages[route]));
+    const result = await this.writeSitemapStream(entries, outputDir, baseUrl);
+
+    fs.writeFileSync(indexPath, JSON.stringify({ ...index, files: result.files, urlCount: result.urlCount }));
+    console.log(
+      `Generated sitemap with ${result.urlCount} entries in ${result.files.length} file(s), ` +
+      `rescanned ${stats.rescanned} directories, reused ${stats.reused}`
+    );
+    return { ...result, written: true, ...stats };
+  }
+
+  private loadIndex(indexPath: string): SitemapPageIndex | null {
+    try {
+      const index = JSON.parse(fs.readFileSync(indexPath, 'utf8')) as SitemapPageIndex;
+      return index.version === INDEX_VERSION ? index : null;
+    } catch {
+      return null;
+    }
+  }
+
+  // 目录的 mtime 只在增删改名子项时变化：未变化的目录直接复用索引里的子目录列表，不再 readdir
+  private scanPagesIncremental(previous: SitemapPageIndex | null): {
+    index: SitemapPageIndex;
+    stats: { rescanned: number; reused: number };
+  } {
+    const previousDirs = previous ? previous.dirs : {};
+    const dirs: Record<string, DirectoryNode> = {};
+    const pages: Record<string, string> = {};
+    const stats = { rescanned: 0, reused: 0 };
+
+    const visit = (dir: string, relativePath: string): void => {
+      const key = relativePath || '.';
+      const mtimeMs = fs.statSync(dir).mtimeMs;
+      let node = previousDirs[key];
+
+      if (node && node.mtimeMs === mtimeMs) {
+        stats.reused += 1;
+      } else {
+        const items = fs.readdirSync(dir, { withFileTypes: true });
+        const pageFile = items.find(item => item.isFile() && (item.name === 'page.tsx' || item.name === 'page.ts'));
+        node = {
+          mtimeMs,
+          subdirs: items.filter(item => item.isDirectory()).map(item => item.name).sort(),
+          pageFile: pageFile ? pageFile.name : null
+        };
+        stats.rescanned += 1;
+      }
+      dirs[key] = node;
+
+      if (node.pageFile) {
+        const routePath = relativePath === '' ? '/' : `/${relativePath}`;
+        if (!this.shouldExclude(routePath)) {
+          // 页面文件内容变化不会改变目录 mtime，lastmod 仍按页面文件自身的 mtime
+          pages[routePath] = fs.statSync(path.join(dir, node.pageFile)).mtime.toISOString().split('T')[0];
+        }
+      }
+
+      for (const subdir of node.subdirs) {
+        visit(path.join(dir, subdir), relativePath ? `${relativePath}/${subdir}` : subdir);
+      }
+    };
+
+    visit(this.appDir, '');
+
+    return {
+      index: { version: INDEX_VERSION, generatedAt: new Date().toISOString(), dirs, pages },
+      stats
+    };
+  }
+
   private shouldExclude(path: string): boolean {
     return this.excludePatterns.some(pattern => pattern.test(path));
   }
@@ -117,24 +261,26 @@ export class SitemapGenerator {
     return entries;
   }
 
-  private createSitemapEntry(pagePath: string, baseUrl: string): SitemapEntry | null {
+  private createSitemapEntry(pagePath: string, baseUrl: string, knownLastmod?: string): SitemapEntry {
     // Determine priority based on page path
     const priority = this.getPriority(pagePath);
     const changefreq = this.getChangeFrequency(pagePath);
 
-    // Get last modified date
-    let lastmod = new Date().toISOString().split('T')[0];
+    // Get last modified date (incremental scans already know it from the page index)
+    let lastmod = knownLastmod || new Date().toISOString().split('T')[0];
 
-    try {
-      // Try to get file modification time
-      const pageFile = this.getPageFilePath(pagePath);
-      if (fs.existsSync(pageFile)) {
-        const stats = fs.statSync(pageFile);
-        lastmod = stats.mtime.toISOString().split('T')[0];
+    if (!knownLastmod) {
+      try {
+        // Try to get file modification time
+        const pageFile = this.getPageFilePath(pagePath);
+        if (fs.existsSync(pageFile)) {
+          const stats = fs.statSync(pageFile);
+          lastmod = stats.mtime.toISOString().split('T')[0];
+        }
+      } catch (error) {
+        // Use current date if file doesn't exist or error occurs
+        console.warn(`Could not get modification date for ${pagePath}:`, error);
       }
-    } catch (error) {
-      // Use current date if file doesn't exist or error occurs
-      console.warn(`Could not get modification date for ${pagePath}:`, error);
     }
 
     return {
@@ -204,15 +350,71 @@ export class SitemapGenerator {
   private generateSitemapXML(entries: SitemapEntry[]): string {
     const urlEntries = entries.map(entry => this.formatURLEntry(entry)).join('\n');
 
-    return `<?xml version="1.0" encoding="UTF-8"?>
-<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
-        xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-        xsi:schemaLocation="http://www.sitemaps.org/schemas/sitemap/0.9
-        http://www.sitemaps.org/schemas/sitemap/0.9/sitemap.xsd">
-${urlEntries}
+    return `${URLSET_OPEN}${urlEntries}
 </urlset>`;
   }
 
+  // 按块写入文件而不是拼出整个 XML 字符串；写到临时文件后改名，避免读到写了一半的 sitemap
+  private async writeXMLStream(filePath: string, header: string, chunks: string[], footer: string): Promise<void> {
+    const tmpPath = `${filePath}.tmp`;
+    const stream = fs.createWriteStream(tmpPath, 'utf8');
+    const write = async (chunk: string): Promise<void> => {
+      if (!stream.write(chunk)) {
+        await once(stream, 'drain');
+      }
+    };
+
+    await write(header);
+    for (const chunk of chunks) {
+      await write(chunk);
+    }
+    await write(footer);
+    stream.end();
+    await once(stream, 'finish');
+    fs.renameSync(tmpPath, filePath);
+  }
+
+  async writeSitemapStream(
+    entries: SitemapEntry[],
+    outputDir: string = this.publicDir,
+    baseUrl: string = 'https://www.stealabrainrot.quest'
+  ): Promise<{ files: string[]; urlCount: number; split: boolean }> {
+    fs.mkdirSync(outputDir, { recursive: true });
+    const split = entries.length > MAX_URLS_PER_SITEMAP;
+    const files: string[] = [];
+
+    for (let start = 0; start === 0 || start < entries.length; start += MAX_URLS_PER_SITEMAP) {
+      const name = split ? `sitemap-${files.length + 1}.xml` : 'sitemap.xml';
+      const chunk = entries.slice(start, start + MAX_URLS_PER_SITEMAP);
+      await this.writeXMLStream(
+        path.join(outputDir, name),
+        URLSET_OPEN,
+        chunk.map(entry => `${this.formatURLEntry(entry)}\n`),
+        '</urlset>\n'
+      );
+      files.push(name);
+    }
+
+    if (split) {
+      const lastmod = new Date().toISOString().split('T')[0];
+      const indexXml = this.generateSitemapIndex(files.map(name => ({ loc: `${baseUrl}/${name}`, lastmod })));
+      fs.writeFileSync(path.join(outputDir, 'sitemap.xml'), indexXml, 'utf8');
+    }
+
+    // 删除上一次拆分留下、这次已经不需要的 sitemap-N.xml
+    for (const name of fs.readdirSync(outputDir)) {
+      if (/^sitemap-\d+\.xml$/.test(name) && !files.includes(name)) {
+        fs.unlinkSync(path.join(outputDir, name));
+      }
+    }
+
+    return {
+      files: split ? ['sitemap.xml', ...files] : files,
+      urlCount: entries.length,
+      split
+    };
+  }
+
   private formatURLEntry(entry: SitemapEntry): string {
     return `  <url>
     <loc>${this.escapeXML(entry.loc)}</loc>
@@ -0,0 +1,13 @@
+import fs from "node:fs";
+import path from "node:path";
+
+const DATA_DIR = path.join(process.cwd(), "data");
+// scripts/optimizeBodies.js 的输出（npm run build 前自动执行）
+const OPTIMIZED_DIR = path.join(DATA_DIR, "optimized");
+
+// 读取页面正文：优先用构建阶段压缩过的版本，没有运行过构建脚本时（例如刚 clone 下来直接 next dev）退回原始文件
+export function getPageBody(slug: string): string {
+  const file = `${slug}-body.html`;
+  const optimized = path.join(OPTIMIZED_DIR, file);
+  return fs.readFileSync(fs.existsSync(optimized) ? optimized : path.join(DATA_DIR, file), "utf8");
+}
@@ -19,6 +19,17 @@ const nextConfig = {
     maxInactiveAge: 25 * 1000,
     pagesBufferLength: 2,
   },
+  // scripts/optimizeBodies.js 生成的脚本文件名带内容哈希，内容变化时文件名也会变，可以永久缓存
+  async headers() {
+    return [
+      {
+        source: '/static-bodies/:path*',
+        headers: [
+          { key: 'Cache-Control', value: 'public, max-age=31536000, immutable' }
+        ]
+      }
+    ];
+  },
   images: {
     remotePatterns: [
       {
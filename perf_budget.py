@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+性能预算与回归门禁
+
+用 perf_budget.json 中的上限检查 perf_trace.py 生成的汇总（页面指标、每个接口的 p95、
+每个步骤的耗时），并与保存的基线比较。超出预算或相对基线明显变慢时退出码为 1。
+
+    python perf_budget.py check perf_runs/20250101_120000
+    python perf_budget.py check perf_runs/20250101_120000 --baseline perf_baseline.json
+    python perf_budget.py check perf_runs/20250101_120000 --update-baseline
+
+comment_e2e_runner.py 的 --budget / --baseline 参数在运行结束后做同样的检查。
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from perf_trace import (
+    PAGE_METRICS,
+    SUMMARY_FILE,
+    diff_summaries,
+    load_summary,
+    percentile,
+    summarize_calls
+)
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUDGET = os.path.join(ROOT_DIR, "perf_budget.json")
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, "perf_baseline.json")
+
+DEFAULT_REGRESSION = {"max_increase_pct": 20, "min_increase_ms": 25, "min_increase_cls": 0.02}
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def find_summaries(paths):
+    """接受运行目录或 perf_summary.json 路径，目录会递归查找（e2e 运行器每个场景一个子目录）"""
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(path)
+            continue
+        for root, _, files in os.walk(path):
+            if SUMMARY_FILE in files:
+                found.append(os.path.join(root, SUMMARY_FILE))
+    return sorted(found)
+
+
+def aggregate_summaries(summaries):
+    """把多个场景的汇总合并成一份：接口按全部请求重新算 p95，页面指标和步骤取各场景的 p95"""
+    if len(summaries) == 1:
+        return summaries[0]
+
+    calls = [call for summary in summaries for call in summary.get("calls", [])]
+    page, steps = {}, {}
+    for key in PAGE_METRICS:
+        values = [s["page"][key] for s in summaries if s.get("page", {}).get(key) is not None]
+        if values:
+            page[key] = percentile(values, 95)
+    for summary in summaries:
+        for name, value in summary.get("steps", {}).items():
+            steps.setdefault(name, []).append(value)
+
+    return {
+        "created": datetime.now().isoformat(),
+        "runs": len(summaries),
+        "page": page,
+        "api": summarize_calls(calls),
+        "steps": {name: percentile(values, 95) for name, values in steps.items()},
+        "calls": calls
+    }
+
+
+def check_budget(summary, budget):
+    """返回所有超出预算的指标"""
+    violations = []
+
+    def check(metric, value, limit):
+        if value is not None and value > limit:
+            violations.append({"metric": metric, "value": value, "limit": limit})
+
+    for key, limit in budget.get("page", {}).items():
+        check(f"page.{key}", summary.get("page", {}).get(key), limit)
+    for path, limits in budget.get("api", {}).items():
+        data = summary.get("api", {}).get(path)
+        if data:
+            for key, limit in limits.items():
+                check(f"api.{path}.{key}", data.get(key), limit)
+    for name, limit in budget.get("steps", {}).items():
+        check(f"step.{name}", summary.get("steps", {}).get(name), limit)
+    return violations
+
+
+def check_regressions(summary, baseline, rules=None):
+    """与基线相比变慢超过阈值的指标：既要超过百分比，也要超过绝对值，避免毫秒级抖动误报"""
+    rules = {**DEFAULT_REGRESSION, **(rules or {})}
+    regressions = []
+    for row in diff_summaries(baseline, summary):
+        if row["delta"] is None or row["delta"] <= 0 or row["metric"].endswith(".bytes"):
+            continue
+        minimum = rules["min_increase_cls"] if row["metric"] == "page.cls" else rules["min_increase_ms"]
+        too_slow = row["delta_pct"] is None or row["delta_pct"] > rules["max_increase_pct"]
+        if row["delta"] >= minimum and too_slow:
+            regressions.append(row)
+    return regressions
+
+
+def baseline_snapshot(summary):
+    return {
+        "created": datetime.now().isoformat(),
+        "page": summary.get("page", {}),
+        "api": summary.get("api", {}),
+        "steps": summary.get("steps", {})
+    }
+
+
+def evaluate(summary, budget, baseline=None):
+    violations = check_budget(summary, budget)
+    regressions = check_regressions(summary, baseline, budget.get("regression")) if baseline else []
+    return {
+        "passed": not violations and not regressions,
+        "violations": violations,
+        "regressions": regressions,
+        "baseline": bool(baseline)
+    }
+
+
+def print_result(result):
+    for violation in result["violations"]:
+        print(f"❌ 超出预算 {violation['metric']}: {violation['value']} > {violation['limit']}")
+    for row in result["regressions"]:
+        print(
+            f"❌ 相对基线变慢 {row['metric']}: {row['before']} -> {row['after']} "
+            f"(+{row['delta']}, {row['delta_pct'] if row['delta_pct'] is not None else '-'}%)"
+        )
+    if result["passed"]:
+        print(f"✅ 性能预算通过{'，未发现回归' if result['baseline'] else '（没有基线，未做回归比较）'}")
+
+
+def run_gate(summary, budget_path=DEFAULT_BUDGET, baseline_path=None, update_baseline=False):
+    """检查预算和基线；update_baseline 时把本次结果写成新的基线"""
+    budget = load_json(budget_path)
+    baseline = load_json(baseline_path) if baseline_path and os.path.exists(baseline_path) else None
+    result = evaluate(summary, budget, baseline)
+    if update_baseline:
+        path = baseline_path or DEFAULT_BASELINE
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(baseline_snapshot(summary), f, ensure_ascii=False, indent=2)
+        result["baseline_updated"] = path
+    return result
+
+
+def command_check(args):
+    paths = find_summaries(args.runs)
+    if not paths:
+        print(f"❌ 没有找到 {SUMMARY_FILE}")
+        return 2
+    summary = aggregate_summaries([load_summary(path) for path in paths])
+    result = run_gate(summary, args.budget, args.baseline, args.update_baseline)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        print_result(result)
+        if result.get("baseline_updated"):
+            print(f"基线已更新: {result['baseline_updated']}")
+    return 0 if result["passed"] else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="性能预算与回归门禁")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    check = subparsers.add_parser("check", help="检查运行结果是否满足预算、是否相对基线变慢")
+    check.add_argument("runs", nargs="+", help="perf_runs 下的运行目录或 perf_summary.json")
+    check.add_argument("--budget", default=DEFAULT_BUDGET, help="预算文件")
+    check.add_argument("--baseline", default=None, help="基线文件，不存在时只检查预算")
+    check.add_argument("--update-baseline", action="store_true", help="把本次结果写成新的基线")
+    check.add_argument("--json", action="store_true", help="以 JSON 输出检查结果")
+    check.set_defaults(handler=command_check)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
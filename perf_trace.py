@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Playwright 性能时间线采集
+
+每次测试运行在 perf_runs/<运行名>/ 下保存：
+  - trace.zip         Playwright trace（npx playwright show-trace 打开）
+  - network.har       完整的 HAR（不含响应体）
+  - perf_summary.json 汇总：Navigation Timing、LCP、CLS，以及每个 /api/ 请求的耗时、大小、状态码
+                      和服务端 Server-Timing 各阶段耗时（评论接口会返回 db / count / serialize 等阶段）
+
+两次运行的汇总可以直接比较，首页或评论加载变慢会以差异的形式出现：
+
+    python perf_trace.py summarize perf_runs/20250101_120000
+    python perf_trace.py diff perf_runs/基线/perf_summary.json perf_runs/本次/perf_summary.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_RUNS_DIR = os.path.join(ROOT_DIR, "perf_runs")
+API_PREFIX = "/api/"
+
+TRACE_FILE = "trace.zip"
+HAR_FILE = "network.har"
+SUMMARY_FILE = "perf_summary.json"
+PAGE_METRICS = ("ttfb_ms", "dom_content_loaded_ms", "load_ms", "lcp_ms", "first_comment_ms", "cls")
+SUMMARY_KEYS = {"created", "page", "api", "steps", "calls", "artifacts"}
+
+# 在页面脚本之前注入：LCP 和 CLS 只能通过 PerformanceObserver 拿到
+PERF_INIT_SCRIPT = """
+(() => {
+  const metrics = { lcp: null, cls: 0 };
+  window.__perfMetrics = metrics;
+  try {
+    new PerformanceObserver((list) => {
+      const entries = list.getEntries();
+      const last = entries[entries.length - 1];
+      metrics.lcp = last.renderTime || last.loadTime || last.startTime;
+    }).observe({ type: "largest-contentful-paint", buffered: true });
+    new PerformanceObserver((list) => {
+      for (const entry of list.getEntries()) {
+        if (!entry.hadRecentInput) metrics.cls += entry.value;
+      }
+    }).observe({ type: "layout-shift", buffered: true });
+  } catch (e) {
+    // 非 Chromium 浏览器可能不支持这些条目类型
+  }
+})();
+"""
+
+PAGE_METRICS_JS = """
+() => {
+  const nav = performance.getEntriesByType("navigation")[0];
+  const metrics = window.__perfMetrics || {};
+  return {
+    url: location.href,
+    ttfb_ms: nav ? nav.responseStart : null,
+    dom_content_loaded_ms: nav ? nav.domContentLoadedEventEnd : null,
+    load_ms: nav && nav.loadEventEnd ? nav.loadEventEnd : null,
+    transfer_bytes: nav ? nav.transferSize : null,
+    lcp_ms: metrics.lcp ?? null,
+    cls: metrics.cls ?? null
+  };
+}
+"""
+
+
+def new_run_dir(name=None, base_dir=DEFAULT_RUNS_DIR):
+    """创建本次运行的输出目录"""
+    run_dir = os.path.join(base_dir, name or datetime.now().strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir
+
+
+def context_options(run_dir):
+    """传给 browser.new_context() 的 HAR 录制参数（HAR 在 context.close() 时写出）"""
+    return {"record_har_path": os.path.join(run_dir, HAR_FILE), "record_har_content": "omit"}
+
+
+def start_tracing(context):
+    context.add_init_script(PERF_INIT_SCRIPT)
+    context.tracing.start(screenshots=True, snapshots=True)
+
+
+async def async_start_tracing(context):
+    await context.add_init_script(PERF_INIT_SCRIPT)
+    await context.tracing.start(screenshots=True, snapshots=True)
+
+
+def stop_tracing(context, run_dir):
+    context.tracing.stop(path=os.path.join(run_dir, TRACE_FILE))
+
+
+async def async_stop_tracing(context, run_dir):
+    await context.tracing.stop(path=os.path.join(run_dir, TRACE_FILE))
+
+
+def collect_page_metrics(page):
+    """读取当前页面的 Navigation Timing、LCP、CLS（毫秒，相对导航开始）"""
+    return _round_metrics(page.evaluate(PAGE_METRICS_JS))
+
+
+async def async_collect_page_metrics(page):
+    return _round_metrics(await page.evaluate(PAGE_METRICS_JS))
+
+
+def _round_metrics(metrics):
+    return {
+        key: round(value, 4 if key == "cls" else 1) if isinstance(value, float) else value
+        for key, value in metrics.items()
+    }
+
+
+def percentile(values, pct):
+    """最近秩法计算百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _response_bytes(response):
+    for key in ("_transferSize", "bodySize"):
+        if isinstance(response.get(key), int) and response[key] >= 0:
+            return response[key]
+    size = response.get("content", {}).get("size")
+    return size if isinstance(size, int) and size >= 0 else None
+
+
+def parse_server_timing(value):
+    """解析 Server-Timing 响应头，返回 {阶段: 毫秒}；没有 dur 的条目忽略"""
+    phases = {}
+    for item in (value or "").split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        for param in params:
+            key, _, duration = param.partition("=")
+            if name and key.strip() == "dur":
+                try:
+                    phases[name] = float(duration.strip().strip('"'))
+                except ValueError:
+                    pass
+    return phases
+
+
+def _header(response, name):
+    for header in response.get("headers", []):
+        if header.get("name", "").lower() == name:
+            return header.get("value")
+    return None
+
+
+def summarize_har(har_path, api_prefix=API_PREFIX):
+    """从 HAR 中提取每个 /api/ 请求，并按接口路径汇总"""
+    with open(har_path, encoding="utf-8") as f:
+        entries = json.load(f)["log"]["entries"]
+
+    calls = []
+    for entry in entries:
+        path = urlsplit(entry["request"]["url"]).path
+        if not path.startswith(api_prefix):
+            continue
+        timings = entry.get("timings", {})
+        calls.append({
+            "method": entry["request"]["method"],
+            "path": path,
+            "url": entry["request"]["url"],
+            "status": entry["response"]["status"],
+            "started": entry["startedDateTime"],
+            "duration_ms": round(entry["time"], 1),
+            "wait_ms": round(timings["wait"], 1) if timings.get("wait", -1) >= 0 else None,
+            "bytes": _response_bytes(entry["response"]),
+            "server_timing": parse_server_timing(_header(entry["response"], "server-timing"))
+        })
+    calls.sort(key=lambda call: call["started"])
+    return {"api": summarize_calls(calls), "calls": calls}
+
+
+def summarize_calls(calls):
+    """按接口路径汇总请求次数、p50/p95 耗时、总字节数、状态码和服务端各阶段的 p95"""
+    endpoints = {}
+    for call in calls:
+        endpoint = endpoints.setdefault(call["path"], {"durations": [], "bytes": 0, "status_codes": {}, "server": {}})
+        endpoint["durations"].append(call["duration_ms"])
+        endpoint["bytes"] += call["bytes"] or 0
+        status = str(call["status"])
+        endpoint["status_codes"][status] = endpoint["status_codes"].get(status, 0) + 1
+        for phase, duration in (call.get("server_timing") or {}).items():
+            endpoint["server"].setdefault(phase, []).append(duration)
+
+    return {
+        path: {
+            "count": len(data["durations"]),
+            "p50_ms": percentile(data["durations"], 50),
+            "p95_ms": percentile(data["durations"], 95),
+            "max_ms": max(data["durations"]),
+            "bytes": data["bytes"],
+            "status_codes": data["status_codes"],
+            "server_p95_ms": {phase: round(percentile(values, 95), 1) for phase, values in data["server"].items()}
+        }
+        for path, data in endpoints.items()
+    }
+
+
+def write_summary(run_dir, page_metrics=None, latency=None, **meta):
+    """在 context 关闭（HAR 已写出）之后调用，生成 perf_summary.json 并返回汇总"""
+    har_path = os.path.join(run_dir, HAR_FILE)
+    network = summarize_har(har_path) if os.path.exists(har_path) else {"api": {}, "calls": []}
+    summary = {
+        "created": datetime.now().isoformat(),
+        **meta,
+        "page": page_metrics or {},
+        "api": network["api"],
+        "steps": {step["name"]: step["latency_ms"] for step in (latency or {}).get("steps", [])},
+        "calls": network["calls"],
+        "artifacts": {
+            name: os.path.join(run_dir, filename)
+            for name, filename in (("trace", TRACE_FILE), ("har", HAR_FILE))
+            if os.path.exists(os.path.join(run_dir, filename))
+        }
+    }
+    with open(os.path.join(run_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def flatten_metrics(summary):
+    """把汇总展开成 {指标名: 数值}，便于两次运行逐项比较"""
+    metrics = {}
+    for key in PAGE_METRICS:
+        if summary.get("page", {}).get(key) is not None:
+            metrics[f"page.{key}"] = summary["page"][key]
+    for path, data in summary.get("api", {}).items():
+        for key in ("p50_ms", "p95_ms", "bytes"):
+            metrics[f"api.{path}.{key}"] = data[key]
+        for phase, value in data.get("server_p95_ms", {}).items():
+            metrics[f"api.{path}.server.{phase}_p95"] = value
+    for name, value in summary.get("steps", {}).items():
+        metrics[f"step.{name}"] = value
+    return metrics
+
+
+def diff_summaries(before, after):
+    """逐项比较两次运行，返回 [{metric, before, after, delta, delta_pct}]"""
+    old, new = flatten_metrics(before), flatten_metrics(after)
+    rows = []
+    for metric in sorted(set(old) | set(new)):
+        a, b = old.get(metric), new.get(metric)
+        delta = b - a if a is not None and b is not None else None
+        rows.append({
+            "metric": metric,
+            "before": a,
+            "after": b,
+            "delta": round(delta, 4) if delta is not None else None,
+            "delta_pct": round(delta / a * 100, 1) if delta is not None and a else None
+        })
+    return rows
+
+
+def load_summary(path):
+    if os.path.isdir(path):
+        path = os.path.join(path, SUMMARY_FILE)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def print_diff(rows):
+    print(f"{'指标':<48}{'之前':>10}{'之后':>10}{'变化':>10}{'%':>8}")
+    for row in rows:
+        print(
+            f"{row['metric']:<48}{_fmt(row['before'])}{_fmt(row['after'])}{_fmt(row['delta'])}"
+            f"{(str(row['delta_pct']) + '%') if row['delta_pct'] is not None else '-':>8}"
+        )
+
+
+def _fmt(value):
+    return f"{value:>10}" if value is not None else f"{'-':>10}"
+
+
+def load_existing(run_dir):
+    """重新汇总时保留已有 perf_summary.json 里的页面指标、步骤耗时和运行信息"""
+    path = os.path.join(run_dir, SUMMARY_FILE)
+    if not os.path.exists(path):
+        return {}
+    existing = load_summary(path)
+    meta = {key: value for key, value in existing.items() if key not in SUMMARY_KEYS}
+    steps = [{"name": name, "latency_ms": value} for name, value in existing.get("steps", {}).items()]
+    return {**meta, "page_metrics": existing.get("page"), "latency": {"steps": steps}}
+
+
+def command_summarize(args):
+    summary = write_summary(args.run_dir, **load_existing(args.run_dir))
+    print(json.dumps({key: summary[key] for key in ("page", "api", "steps")}, ensure_ascii=False, indent=2))
+    return 0
+
+
+def command_diff(args):
+    rows = diff_summaries(load_summary(args.before), load_summary(args.after))
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_diff(rows)
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Playwright 性能时间线汇总与比较")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    summarize = subparsers.add_parser("summarize", help="从运行目录的 HAR 重新生成 perf_summary.json")
+    summarize.add_argument("run_dir")
+    summarize.set_defaults(handler=command_summarize)
+
+    diff = subparsers.add_parser("diff", help="比较两次运行的汇总")
+    diff.add_argument("before", help="基线运行目录或 perf_summary.json")
+    diff.add_argument("after", help="本次运行目录或 perf_summary.json")
+    diff.add_argument("--json", action="store_true", help="以 JSON 输出差异")
+    diff.set_defaults(handler=command_diff)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
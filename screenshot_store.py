@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+测试脚本的截图存储
+
+截图按内容哈希保存在 screenshots/objects/ 下，和 scripts/visualRegression.js 共用同一个对象目录，
+screenshots/tests.json 记录 "<分组>/<名称>" 最近一次对应的对象，相同的截图只存一份。
+不再被引用的对象由 node scripts/visualRegression.js prune 清理。
+页面 HTML 之类的非图片内容按名称保存在 screenshots/artifacts/<分组>/ 下。
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCREENSHOT_DIR = os.path.join(ROOT_DIR, "screenshots")
+OBJECT_DIR = os.path.join(SCREENSHOT_DIR, "objects")
+ARTIFACT_DIR = os.path.join(SCREENSHOT_DIR, "artifacts")
+TESTS_INDEX = os.path.join(SCREENSHOT_DIR, "tests.json")
+
+
+def object_path(digest):
+    return os.path.join(OBJECT_DIR, digest[:2], f"{digest}.png")
+
+
+def put_object(data):
+    """写入对象目录，返回内容哈希；已经存在的对象不重复写"""
+    digest = hashlib.sha256(data).hexdigest()
+    target = object_path(digest)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp = f"{target}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, target)
+    return digest
+
+
+def _update_index(key, record):
+    index = {}
+    if os.path.exists(TESTS_INDEX):
+        with open(TESTS_INDEX, encoding="utf-8") as f:
+            index = json.load(f)
+    index[key] = record
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    with open(TESTS_INDEX, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(index.items())), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def save_screenshot(page, group, name):
+    """整页截图，返回保存后的文件路径（sync_api 页面）"""
+    data = page.screenshot(full_page=True)
+    digest = put_object(data)
+    _update_index(f"{group}/{name}", {
+        "object": digest,
+        "url": page.url,
+        # PNG 的宽高在 IHDR 块里
+        "width": int.from_bytes(data[16:20], "big"),
+        "height": int.from_bytes(data[20:24], "big"),
+        "capturedAt": datetime.now(timezone.utc).isoformat(),
+    })
+    return object_path(digest)
+
+
+def save_page_content(page, group, name):
+    """保存当前页面的 HTML，返回文件路径"""
+    target = os.path.join(ARTIFACT_DIR, group, f"{name}.html")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(page.content())
+    return target
@@ -0,0 +1,394 @@
+#!/usr/bin/env node
+import crypto from 'crypto';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { isMainThread, parentPort } from 'worker_threads';
+import { fileURLToPath } from 'url';
+import { runPool } from './workerPool.js';
+
+// 按 scripts/pages.json 批量提取页面片段，替代原来每个游戏一份的 extractHtml*.js / updateOriginalHtml*.js：
+//   - 源文件（抓取下来的整页 HTML）流式分词，取出 <head> / <body> 内容写到 data/<slug>-head.html、data/<slug>-body.html
+//   - 根相对地址改写到源站，canonical / og:url / twitter:url / domain_url 改写到克隆站
+//   - 配置了 snapshot 的页面同时生成 public/ 下用于截图对比的整页快照
+// 多个页面在 worker 线程池里并行处理；源文件和页面配置都没变的页面直接跳过，
+// 哈希记录在 scripts/pages.lock.json（随仓库提交，避免新 clone 后第一次运行覆盖手工改过的片段）
+//
+// 用法: node scripts/extractPages.js [slug ...] [--force] [--jobs N]
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const projectRoot = path.dirname(__dirname);
+
+const MANIFEST_PATH = path.join(__dirname, 'pages.json');
+const LOCK_PATH = path.join(__dirname, 'pages.lock.json');
+const DATA_DIR = path.join(projectRoot, 'data');
+// 提取逻辑有改动时加一，让所有页面重新生成
+const EXTRACTOR_VERSION = 1;
+
+// ---------------------------------------------------------------------------
+// 流式 HTML 分词：按块喂入，产出 text / open / close / comment / declaration 记号。
+// 记号跨块时把未完成的部分留到下一块；script、style 等元素的内容按原始文本处理，
+// 其中出现的 "</body>" 之类字符串不会被当成标签
+
+const RAW_TEXT_ELEMENTS = new Set(['script', 'style', 'textarea', 'title']);
+const TAG = /<(\/?)([A-Za-z][^\s/>]*)(?:[^>"']|"[^"]*"|'[^']*')*>/y;
+const MAX_TAG_LENGTH = 64 * 1024;
+
+class HtmlTokenizer {
+  constructor(onToken) {
+    this.onToken = onToken;
+    this.buffer = '';
+    this.rawText = null;
+  }
+
+  write(chunk) {
+    this.buffer += chunk;
+    this.buffer = this.buffer.slice(this.scan(false));
+  }
+
+  end() {
+    this.scan(true);
+    if (this.buffer) this.onToken({ type: 'text', raw: this.buffer });
+    this.buffer = '';
+  }
+
+  text(start, end) {
+    if (end > start) this.onToken({ type: 'text', raw: this.buffer.slice(start, end) });
+  }
+
+  // 处理缓冲区，返回已消费到的位置；final 为 false 时不完整的记号留在缓冲区里
+  scan(final) {
+    const buffer = this.buffer;
+    let cursor = 0;
+
+    while (cursor < buffer.length) {
+      if (this.rawText) {
+        const close = new RegExp(`</${this.rawText}[\\s/>]`, 'ig');
+        close.lastIndex = cursor;
+        const match = close.exec(buffer);
+        if (!match) {
+          // 结束标签可能被切在块尾，保留最后几个字符
+          const keep = final ? buffer.length : Math.max(cursor, buffer.length - this.rawText.length - 3);
+          this.text(cursor, keep);
+          return keep;
+        }
+        this.text(cursor, match.index);
+        cursor = match.index;
+        this.rawText = null;
+      }
+
+      const lt = buffer.indexOf('<', cursor);
+      if (lt === -1) {
+        this.text(cursor, buffer.length);
+        return buffer.length;
+      }
+      this.text(cursor, lt);
+      cursor = lt;
+
+      const token = this.readMarkup(buffer, lt, final);
+      if (token === null) return cursor;
+      if (!token) {
+        // 不是标签的 "<"，按文本处理
+        this.text(lt, lt + 1);
+        cursor = lt + 1;
+        continue;
+      }
+
+      this.onToken(token);
+      cursor = lt + token.raw.length;
+      if (token.type === 'open' && RAW_TEXT_ELEMENTS.has(token.name)) {
+        this.rawText = token.name;
+      }
+    }
+    return cursor;
+  }
+
+  // 返回 lt 处的记号；不是标签时返回 false，需要更多数据时返回 null
+  readMarkup(buffer, lt, final) {
+    const incomplete = final ? false : null;
+    if (buffer.length - lt < 4) return incomplete;
+
+    if (buffer.startsWith('<!--', lt)) {
+      const end = buffer.indexOf('-->', lt + 4);
+      if (end === -1) return incomplete;
+      return { type: 'comment', raw: buffer.slice(lt, end + 3) };
+    }
+    if (buffer[lt + 1] === '!' || buffer[lt + 1] === '?') {
+      const end = buffer.indexOf('>', lt);
+      if (end === -1) return incomplete;
+      return { type: 'declaration', raw: buffer.slice(lt, end + 1) };
+    }
+
+    if (!/[A-Za-z]/.test(buffer[buffer[lt + 1] === '/' ? lt + 2 : lt + 1])) return false;
+
+    TAG.lastIndex = lt;
+    let match = TAG.exec(buffer);
+    if (!match) {
+      // 可能是属性值里的引号被切在了块尾，先等更多数据；确实不成对时退回到第一个 ">"
+      if (!final && buffer.length - lt < MAX_TAG_LENGTH) return null;
+      const end = buffer.indexOf('>', lt);
+      if (end === -1) return incomplete;
+      match = /^<(\/?)([A-Za-z][^\s/>]*)/.exec(buffer.slice(lt, end + 1));
+      if (!match) return false;
+      match[0] = buffer.slice(lt, end + 1);
+    }
+    return { type: match[1] ? 'close' : 'open', name: match[2].toLowerCase(), raw: match[0] };
+  }
+}
+
+// 从记号流里取出 <html> 之前的内容、<html> 的属性、<head> 和 <body> 的内容。
+// head 取第一个 <head> 到第一个 </head>；body 取第一个 <body> 到最后一个 </body>，没有 </body> 时到文件末尾
+async function splitDocument(filePath) {
+  const doc = { preamble: '', htmlAttributes: '', head: null, body: null };
+  const prelude = [];
+  const head = [];
+  const body = [];
+  let bodyLength = 0;
+  let bodyEnd = -1;
+  let phase = 'prelude';
+
+  const tokenizer = new HtmlTokenizer((token) => {
+    if (phase === 'body') {
+      if (token.type === 'close' && token.name === 'body') bodyEnd = bodyLength;
+      body.push(token.raw);
+      bodyLength += token.raw.length;
+    } else if (phase === 'head') {
+      if (token.type === 'close' && token.name === 'head') phase = 'between';
+      else head.push(token.raw);
+    } else if (token.type === 'open' && token.name === 'body') {
+      phase = 'body';
+    } else if (token.type === 'open' && token.name === 'head' && doc.head === null) {
+      doc.head = '';
+      phase = 'head';
+    } else if (token.type === 'open' && token.name === 'html' && phase === 'prelude') {
+      doc.preamble = prelude.join('').trim();
+      doc.htmlAttributes = token.raw.slice('<html'.length, -1).trim();
+      phase = 'document';
+    } else if (phase === 'prelude') {
+      prelude.push(token.raw);
+    }
+  });
+
+  for await (const chunk of fs.createReadStream(filePath, { encoding: 'utf8', highWaterMark: 64 * 1024 })) {
+    tokenizer.write(chunk);
+  }
+  tokenizer.end();
+
+  if (doc.head !== null && phase !== 'head') doc.head = head.join('');
+  else doc.head = null;
+  if (phase === 'body') {
+    const content = body.join('');
+    doc.body = bodyEnd === -1 ? content : content.slice(0, bodyEnd);
+  }
+  return doc;
+}
+
+// ---------------------------------------------------------------------------
+// 片段改写
+
+const escapeRegExp = (value) => value.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+
+function rewriteRootRelative(fragment, remoteOrigin) {
+  return fragment
+    .replace(
+      /\b(href|src|data-src|data-href|data-url|data-image|data-bg|data-background|content)=["']\/(?!\/)([^"'?#]+(?:[?#][^"']*)?)["']/gi,
+      (_match, attr, rest) => `${attr}="${remoteOrigin}/${rest.replace(/^\/+/, '')}"`
+    )
+    .replace(/url\((['"]?)\/(?!\/)([^)'"]+)\1\)/gi, (_match, quote, rest) => {
+      return `url(${quote}${remoteOrigin}/${rest.replace(/^\/+/, '')}${quote})`;
+    });
+}
+
+// canonical / og:url / twitter:url 以及页面脚本里的 domain_url 指向克隆站；
+// seoPath / domainUrlPath 是个别页面额外拼在克隆站域名后面的路径
+function updateSeoLinks(fragment, page, remoteOrigin, cloneOrigin) {
+  const remote = escapeRegExp(remoteOrigin);
+  const seoTarget = `$1${cloneOrigin}${page.seoPath ?? ''}`;
+  let next = fragment;
+
+  for (const regex of [
+    new RegExp(`(<link\\s[^>]*rel=["']canonical["'][^>]*href=["'])${remote}`, 'gi'),
+    new RegExp(`(<meta\\s[^>]*property=["']og:url["'][^>]*content=["'])${remote}`, 'gi'),
+    new RegExp(`(<meta\\s[^>]*name=["']twitter:url["'][^>]*content=["'])${remote}`, 'gi')
+  ]) {
+    next = next.replace(regex, seoTarget);
+  }
+
+  return next.replace(new RegExp(`(domain_url\\s*=\\s*['"])${remote}`, 'g'), `$1${cloneOrigin}${page.domainUrlPath ?? ''}`);
+}
+
+function renderSnapshot(snapshot, doc, headHtml, bodyHtml) {
+  if (snapshot.template === 'source') {
+    // 沿用源文件的 doctype 和 <html> 属性
+    return [
+      doc.preamble || '<!DOCTYPE html>',
+      `<html${doc.htmlAttributes ? ` ${doc.htmlAttributes}` : ''}>`,
+      '<head>',
+      headHtml,
+      '</head>',
+      '<body>',
+      bodyHtml,
+      '</body>',
+      '</html>',
+      ''
+    ].join('\n');
+  }
+  return `<!DOCTYPE html>
+<html lang="${snapshot.lang ?? 'en'}">
+<head>
+${headHtml}
+</head>
+<body>
+${bodyHtml}
+</body>
+</html>`;
+}
+
+// ---------------------------------------------------------------------------
+// 单个页面的处理（在 worker 里执行）
+
+function hashFile(filePath) {
+  return new Promise((resolve, reject) => {
+    const hash = crypto.createHash('sha256');
+    fs.createReadStream(filePath)
+      .on('data', (chunk) => hash.update(chunk))
+      .on('error', reject)
+      .on('end', () => resolve(hash.digest('hex')));
+  });
+}
+
+function outputPaths(page) {
+  const outputs = [path.join(DATA_DIR, `${page.slug}-head.html`), path.join(DATA_DIR, `${page.slug}-body.html`)];
+  if (page.snapshot) outputs.push(path.join(projectRoot, page.snapshot.path));
+  return outputs;
+}
+
+async function processPage({ page, remoteOrigin, cloneOrigin, configHash, previous, force }) {
+  const started = performance.now();
+  const sourcePath = path.join(projectRoot, page.source);
+  if (!fs.existsSync(sourcePath)) {
+    return { slug: page.slug, status: 'missing', error: `缺少源文件 ${page.source}，请先抓取页面` };
+  }
+
+  const sourceHash = await hashFile(sourcePath);
+  const unchanged = previous && previous.source === sourceHash && previous.config === configHash;
+  if (!force && unchanged && outputPaths(page).every((file) => fs.existsSync(file))) {
+    return { slug: page.slug, status: 'skipped', lock: previous };
+  }
+
+  const doc = await splitDocument(sourcePath);
+  if (doc.head === null) return { slug: page.slug, status: 'failed', error: '没有找到 <head> 块' };
+  if (doc.body === null) return { slug: page.slug, status: 'failed', error: '没有找到 <body> 块' };
+
+  const headHtml = updateSeoLinks(rewriteRootRelative(doc.head, remoteOrigin), page, remoteOrigin, cloneOrigin);
+  const bodyHtml = rewriteRootRelative(doc.body, remoteOrigin);
+
+  fs.mkdirSync(DATA_DIR, { recursive: true });
+  fs.writeFileSync(path.join(DATA_DIR, `${page.slug}-head.html`), headHtml, 'utf8');
+  fs.writeFileSync(path.join(DATA_DIR, `${page.slug}-body.html`), bodyHtml, 'utf8');
+  if (page.snapshot) {
+    const snapshotPath = path.join(projectRoot, page.snapshot.path);
+    fs.mkdirSync(path.dirname(snapshotPath), { recursive: true });
+    fs.writeFileSync(snapshotPath, renderSnapshot(page.snapshot, doc, headHtml, bodyHtml), 'utf8');
+  }
+
+  return {
+    slug: page.slug,
+    status: 'extracted',
+    headChars: headHtml.length,
+    bodyChars: bodyHtml.length,
+    ms: performance.now() - started,
+    lock: { source: sourceHash, config: configHash }
+  };
+}
+
+if (!isMainThread) {
+  parentPort.on('message', async (job) => {
+    try {
+      parentPort.postMessage(await processPage(job));
+    } catch (error) {
+      parentPort.postMessage({ slug: job.page.slug, status: 'failed', error: error.message });
+    }
+  });
+}
+
+// ---------------------------------------------------------------------------
+// 主线程：读取清单，分发任务，更新哈希记录
+
+function parseArgs(argv) {
+  const options = { slugs: [], force: false, jobs: os.availableParallelism() };
+  for (let i = 0; i < argv.length; i += 1) {
+    const arg = argv[i];
+    if (arg === '--force') options.force = true;
+    else if (arg === '--jobs') options.jobs = Math.max(1, Number(argv[++i]) || 1);
+    else options.slugs.push(arg);
+  }
+  return options;
+}
+
+function readJson(filePath, fallback) {
+  return fs.existsSync(filePath) ? JSON.parse(fs.readFileSync(filePath, 'utf8')) : fallback;
+}
+
+async function main() {
+  const options = parseArgs(process.argv.slice(2));
+  const manifest = readJson(MANIFEST_PATH, null);
+  const lock = readJson(LOCK_PATH, {});
+  const remoteOrigin = manifest.remoteOrigin.replace(/\/$/, '');
+  const cloneOrigin = (process.env.CLONE_ORIGIN ?? 'https://www.stealabrainrot.quest').replace(/\/$/, '');
+
+  const unknown = options.slugs.filter((slug) => !manifest.pages.some((page) => page.slug === slug));
+  if (unknown.length > 0) {
+    console.error(`❌ scripts/pages.json 里没有这些页面: ${unknown.join(', ')}`);
+    process.exit(1);
+  }
+  const pages = options.slugs.length > 0 ? manifest.pages.filter((page) => options.slugs.includes(page.slug)) : manifest.pages;
+
+  const jobs = pages.map(({ route, ...page }) => ({
+    page,
+    remoteOrigin,
+    cloneOrigin,
+    // 页面配置、两个域名或提取逻辑变了都要重新生成；route 只给截图对比用，不影响提取结果
+    configHash: crypto
+      .createHash('sha256')
+      .update(JSON.stringify([EXTRACTOR_VERSION, page, remoteOrigin, cloneOrigin]))
+      .digest('hex'),
+    previous: lock[page.slug],
+    force: options.force
+  }));
+
+  const started = performance.now();
+  const results = await runPool(__filename, jobs, options.jobs);
+  const elapsed = performance.now() - started;
+
+  for (const result of results) {
+    if (result.lock) lock[result.slug] = result.lock;
+  }
+  const sortedLock = Object.fromEntries(Object.keys(lock).sort().map((slug) => [slug, lock[slug]]));
+  fs.writeFileSync(LOCK_PATH, `${JSON.stringify(sortedLock, null, 2)}\n`);
+
+  const bySlug = new Map(results.map((result) => [result.slug, result]));
+  const counts = { extracted: 0, skipped: 0, missing: 0, failed: 0 };
+  for (const page of pages) {
+    const result = bySlug.get(page.slug);
+    counts[result.status] += 1;
+    if (result.status === 'extracted') {
+      console.log(`✅ ${page.slug}: head ${result.headChars} 字符, body ${result.bodyChars} 字符 (${result.ms.toFixed(0)}ms)`);
+    } else if (result.status === 'missing') {
+      console.warn(`⚠️ ${page.slug}: ${result.error}`);
+    } else if (result.status === 'failed') {
+      console.error(`❌ ${page.slug}: ${result.error}`);
+    }
+  }
+
+  console.log(
+    `\n📄 ${pages.length} 个页面: 提取 ${counts.extracted}, 未变化跳过 ${counts.skipped}, 缺少源文件 ${counts.missing}, 失败 ${counts.failed}` +
+      `（${options.jobs} 个线程, ${(elapsed / 1000).toFixed(2)}s）`
+  );
+  if (counts.failed > 0) process.exit(1);
+}
+
+if (isMainThread) {
+  await main();
+}
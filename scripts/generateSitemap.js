@@ -8,8 +8,10 @@ const __dirname = path.dirname(__filename);
 const projectRoot = path.dirname(__dirname);
 
 class SitemapScript {
-  constructor() {
+  constructor(options = {}) {
     this.config = this.loadConfig();
+    this.incremental = Boolean(options.incremental);
+    this.force = Boolean(options.force);
   }
 
   loadConfig() {
@@ -78,6 +80,46 @@ class SitemapScript {
     }
   }
 
+  // 增量模式：复用 .sitemap-index.json，只重新扫描变化过的目录；超过 50k URL 时拆分成多个文件
+  async generateSitemapIncremental() {
+    console.log('🗺️  Starting incremental sitemap generation...');
+    console.log(`📍 Base URL: ${this.config.siteUrl}`);
+
+    const outputDir = path.join(projectRoot, 'public');
+    const result = await sitemapGenerator.generateIncremental(this.config.siteUrl, {
+      outputDir,
+      force: this.force
+    });
+
+    console.log('\n📊 Sitemap Statistics:');
+    console.log(`   - Total URLs: ${result.urlCount}`);
+    console.log(`   - Files: ${result.files.join(', ')}`);
+    console.log(`   - Directories rescanned: ${result.rescanned}, reused: ${result.reused}`);
+
+    if (result.written) {
+      // 拆分时 sitemap.xml 是索引文件，只校验各个 urlset 文件
+      const urlsetFiles = result.split ? result.files.slice(1) : result.files;
+      for (const file of urlsetFiles) {
+        const validation = await this.validateSitemap(path.join(outputDir, file));
+        if (validation.valid) {
+          console.log(`✅ ${file} validation passed`);
+        } else {
+          console.warn(`⚠️  ${file} validation warnings:`);
+          validation.errors.forEach(error => console.log(`   - ${error}`));
+        }
+      }
+    } else {
+      console.log('✅ No page changes since last run, sitemap left untouched');
+    }
+
+    return {
+      success: true,
+      path: path.join(outputDir, 'sitemap.xml'),
+      url: `${this.config.siteUrl}/sitemap.xml`,
+      stats: result
+    };
+  }
+
   async getSitemapStats(sitemapXml) {
     const urlMatches = sitemapXml.match(/<loc>/g);
     const urlCount = urlMatches ? urlMatches.length : 0;
@@ -160,7 +202,9 @@ Crawl-delay: 1
       console.log('🚀 Starting sitemap generation process...\n');
 
       // Generate sitemap
-      const sitemapResult = await this.generateSitemap();
+      const sitemapResult = this.incremental
+        ? await this.generateSitemapIncremental()
+        : await this.generateSitemap();
 
       // Generate robots.txt
       await this.generateRobotsTxt();
@@ -182,5 +226,10 @@ Crawl-delay: 1
 }
 
 // Run the script
-const sitemapScript = new SitemapScript();
+// --incremental 使用持久化的页面索引，--force 在页面没有变化时也重写文件
+const args = process.argv.slice(2);
+const sitemapScript = new SitemapScript({
+  incremental: args.includes('--incremental'),
+  force: args.includes('--force')
+});
 sitemapScript.run().catch(console.error);
\ No newline at end of file
@@ -0,0 +1,289 @@
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+import vm from 'vm';
+import zlib from 'zlib';
+import { fileURLToPath } from 'url';
+
+// 构建前处理 data/*-body.html：
+//   - 去掉注释、空的 <script>，合并空白，压缩内联 <style> 和 JSON-LD
+//   - 连续的内联脚本（中间只有空白或注释）合并成一个带内容哈希的外部文件 public/static-bodies/<hash>.js，
+//     在原位置用 <script src> 引用；被标记或外部脚本隔开的内联脚本各自成组，每段脚本相对标记和外部脚本的执行位置不变。
+//     合并后不到 INLINE_MAX_BYTES 的组（adsbygoogle 的 push 之类）仍然内联，单独一个请求不划算
+//   - 合并后每段包在 try/catch 里，异常改到 setTimeout 里重新抛出：和分开的 <script> 一样，一段出错不影响后面的段，
+//     错误照样报到 window.onerror。顶层有 let/const/class 或 "use strict" 的段包进块里会改变作用域，只能放在组的最后、不包装；
+//     解析不了的脚本不合并，原样留在原位置（浏览器里它本来也只会让自己失败）
+//   - 外部文件同时生成 .br / .gz 预压缩版本，供 CDN 或反向代理直接返回
+// 处理后的正文写入 data/optimized/，页面通过 lib/site/getPageBody.ts 读取；
+// data/optimized/manifest.json 记录每个页面的哈希和处理前后的字节数
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const projectRoot = path.dirname(__dirname);
+
+const DATA_DIR = path.join(projectRoot, 'data');
+const OUTPUT_DIR = path.join(DATA_DIR, 'optimized');
+const ASSET_DIR = path.join(projectRoot, 'public', 'static-bodies');
+const ASSET_URL = '/static-bodies';
+const BODY_SUFFIX = '-body.html';
+
+// 注释或原样保留内容的元素，按出现顺序匹配，先出现的优先（注释里的 <script> 不会被当成脚本）
+const TOKEN = /<!--[\s\S]*?-->|<(script|style|pre|textarea)\b([^>]*)>([\s\S]*?)<\/\1\s*>/gi;
+const EXECUTABLE_TYPES = new Set(['', 'text/javascript', 'application/javascript']);
+const INLINE_MAX_BYTES = 512;
+
+function contentHash(content) {
+  return crypto.createHash('sha256').update(content).digest('hex').slice(0, 10);
+}
+
+function attribute(attrs, name) {
+  const match = attrs.match(new RegExp(`\\b${name}\\s*=\\s*(?:"([^"]*)"|'([^']*)'|([^\\s>]+))`, 'i'));
+  return match ? (match[1] ?? match[2] ?? match[3]) : null;
+}
+
+function collapseWhitespace(markup) {
+  return markup.replace(/\s+/g, ' ');
+}
+
+function minifyCss(css) {
+  return css
+    .replace(/\/\*[\s\S]*?\*\//g, '')
+    .replace(/\s+/g, ' ')
+    .replace(/\s*([{}:;,])\s*/g, '$1')
+    .replace(/;}/g, '}')
+    .trim();
+}
+
+// 能否作为独立的经典脚本解析（只编译不执行）
+function parses(code) {
+  try {
+    new vm.Script(code);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
+const USE_STRICT = /^\s*(?:(?:\/\/[^\n]*|\/\*[\s\S]*?\*\/)\s*)*(['"])use strict\1/;
+const REGEX_AFTER_WORD = new Set(['return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'do', 'else']);
+const LEXICAL = new Set(['let', 'const', 'class']);
+
+// 包进 try { } 后语义不变：没有 "use strict" 指令，顶层（不在任何括号里）没有 let / const / class 声明。
+// 只跳过字符串、模板、注释和正则字面量，扫描不确定（括号不配对）时按不安全处理
+function blockSafe(code) {
+  if (USE_STRICT.test(code)) return false;
+  let depth = 0;
+  let prev = '';
+  let i = 0;
+  const skipQuoted = (quote) => {
+    for (i += 1; i < code.length && code[i] !== quote; i += 1) {
+      if (code[i] === '\\') i += 1;
+      else if (quote === '`' && code[i] === '$' && code[i + 1] === '{') {
+        let braces = 1;
+        for (i += 2; i < code.length && braces; i += 1) {
+          if (code[i] === '{') braces += 1;
+          else if (code[i] === '}') braces -= 1;
+        }
+        i -= 1;
+      }
+    }
+    i += 1;
+  };
+
+  while (i < code.length) {
+    const char = code[i];
+    if (/\s/.test(char)) {
+      i += 1;
+    } else if (code.startsWith('//', i)) {
+      const end = code.indexOf('\n', i);
+      i = end < 0 ? code.length : end;
+    } else if (code.startsWith('/*', i)) {
+      const end = code.indexOf('*/', i + 2);
+      if (end < 0) return false;
+      i = end + 2;
+    } else if (char === '"' || char === "'" || char === '`') {
+      skipQuoted(char);
+      prev = 'literal';
+    } else if (char === '/' && (!prev || REGEX_AFTER_WORD.has(prev) || '(,=:[!&|?{};+-*%<>~^'.includes(prev))) {
+      let inClass = false;
+      for (i += 1; i < code.length && (inClass || code[i] !== '/'); i += 1) {
+        if (code[i] === '\\') i += 1;
+        else if (code[i] === '[') inClass = true;
+        else if (code[i] === ']') inClass = false;
+        else if (code[i] === '\n') return false;
+      }
+      for (i += 1; /\w/.test(code[i] || ''); i += 1);
+      prev = 'literal';
+    } else if (/[\w$]/.test(char)) {
+      const word = code.slice(i).match(/^[\w$]+/)[0];
+      if (depth === 0 && LEXICAL.has(word)) return false;
+      i += word.length;
+      prev = /^\d/.test(word) ? 'literal' : word;
+    } else {
+      if ('{(['.includes(char)) depth += 1;
+      else if ('})]'.includes(char) && --depth < 0) return false;
+      i += 1;
+      prev = char;
+    }
+  }
+  return depth === 0;
+}
+
+// 一组里的脚本拼成一个文件：除了最后一段，每段都包上 try/catch，异常异步重新抛出，不拦住后面的段
+function joinRun(scripts) {
+  return scripts.map((script, index) => (index === scripts.length - 1
+    ? script
+    : `try {\n${script}\n} catch (e) { setTimeout(function () { throw e; }); }`
+  )).join('\n') + '\n';
+}
+
+function minifyJsonLd(json) {
+  try {
+    return JSON.stringify(JSON.parse(json));
+  } catch {
+    return json.trim();
+  }
+}
+
+// 返回 parts（处理后的片段）和 runs（连续的内联脚本组，每组在 parts 里占一个空位 part，由 optimizeAll 填入）
+function optimizeBody(html) {
+  const parts = [];
+  const runs = [];
+  // 当前还能继续追加脚本的组；遇到非空白的标记、外部脚本或其他元素时结束
+  let run = null;
+  let cursor = 0;
+
+  for (const match of html.matchAll(TOKEN)) {
+    const between = collapseWhitespace(html.slice(cursor, match.index));
+    if (between.trim()) run = null;
+    parts.push(between);
+    cursor = match.index + match[0].length;
+
+    const [token, tag, attrs = '', content = ''] = match;
+    if (!tag) {
+      // 保留 IE 条件注释，其余注释丢弃
+      if (token.startsWith('<!--[if')) {
+        parts.push(token);
+        run = null;
+      }
+      continue;
+    }
+
+    const name = tag.toLowerCase();
+    const type = (attribute(attrs, 'type') || '').toLowerCase();
+    const inlineScript = name === 'script' && !attribute(attrs, 'src') && EXECUTABLE_TYPES.has(type);
+    if (!inlineScript) run = null;
+
+    if (name === 'style') {
+      parts.push(`<style${attrs}>${minifyCss(content)}</style>`);
+    } else if (name !== 'script') {
+      parts.push(token);
+    } else if (attribute(attrs, 'src')) {
+      parts.push(`<script${collapseWhitespace(attrs)}></script>`);
+    } else if (type === 'application/ld+json') {
+      parts.push(`<script${attrs}>${minifyJsonLd(content)}</script>`);
+    } else if (!inlineScript) {
+      parts.push(token);
+    } else if (!parses(content)) {
+      // 语法错误的脚本原样保留，不和其他脚本合并
+      parts.push(token);
+      run = null;
+    } else if (content.trim()) {
+      if (!run) {
+        run = { scripts: [], part: parts.length };
+        runs.push(run);
+        parts.push('');
+      }
+      run.scripts.push(content.trim());
+      // 不能包进块的脚本只能是组里的最后一段
+      if (!blockSafe(content.trim())) run = null;
+    }
+  }
+  parts.push(collapseWhitespace(html.slice(cursor)));
+
+  return {
+    parts,
+    runs: runs.map((group) => ({ part: group.part, script: joinRun(group.scripts) }))
+  };
+}
+
+function compressedSizes(buffer) {
+  return {
+    gzip: zlib.gzipSync(buffer, { level: 9 }).length,
+    brotli: zlib.brotliCompressSync(buffer, {
+      params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 11 }
+    }).length
+  };
+}
+
+function writePrecompressed(filePath, buffer) {
+  fs.writeFileSync(filePath, buffer);
+  fs.writeFileSync(`${filePath}.gz`, zlib.gzipSync(buffer, { level: 9 }));
+  fs.writeFileSync(`${filePath}.br`, zlib.brotliCompressSync(buffer, {
+    params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 11 }
+  }));
+}
+
+function optimizeAll() {
+  fs.rmSync(OUTPUT_DIR, { recursive: true, force: true });
+  fs.rmSync(ASSET_DIR, { recursive: true, force: true });
+  fs.mkdirSync(OUTPUT_DIR, { recursive: true });
+  fs.mkdirSync(ASSET_DIR, { recursive: true });
+
+  const files = fs.readdirSync(DATA_DIR).filter((name) => name.endsWith(BODY_SUFFIX)).sort();
+  const manifest = {};
+  let sourceTotal = 0;
+  let bodyTotal = 0;
+
+  for (const file of files) {
+    const slug = file.slice(0, -BODY_SUFFIX.length);
+    const source = fs.readFileSync(path.join(DATA_DIR, file), 'utf8');
+    const { parts, runs } = optimizeBody(source);
+
+    const scripts = [];
+    let scriptBytes = 0;
+    for (const { part, script } of runs) {
+      if (!parses(script)) {
+        throw new Error(`${file}: 合并后的脚本无法解析`);
+      }
+      const bytes = Buffer.byteLength(script);
+      if (bytes < INLINE_MAX_BYTES) {
+        parts[part] = `<script>${script.trim()}</script>`;
+        continue;
+      }
+      // 文件名只取内容哈希，多个页面相同的脚本共用一个文件和浏览器缓存
+      const scriptFile = `${contentHash(script)}.js`;
+      const scriptUrl = `${ASSET_URL}/${scriptFile}`;
+      if (!fs.existsSync(path.join(ASSET_DIR, scriptFile))) {
+        writePrecompressed(path.join(ASSET_DIR, scriptFile), Buffer.from(script));
+      }
+      parts[part] = `<script src="${scriptUrl}"></script>`;
+      scripts.push(scriptUrl);
+      scriptBytes += bytes;
+    }
+
+    const body = parts.join('').trim();
+    const bodyBuffer = Buffer.from(body);
+    fs.writeFileSync(path.join(OUTPUT_DIR, file), body);
+
+    const sourceBytes = Buffer.byteLength(source);
+    manifest[slug] = {
+      hash: contentHash(body),
+      scripts,
+      scriptBytes,
+      sourceBytes,
+      bytes: bodyBuffer.length,
+      ...compressedSizes(bodyBuffer)
+    };
+    sourceTotal += sourceBytes;
+    bodyTotal += bodyBuffer.length;
+  }
+
+  fs.writeFileSync(path.join(OUTPUT_DIR, 'manifest.json'), JSON.stringify(manifest, null, 2));
+  return { count: files.length, sourceTotal, bodyTotal };
+}
+
+const { count, sourceTotal, bodyTotal } = optimizeAll();
+const saved = sourceTotal ? ((1 - bodyTotal / sourceTotal) * 100).toFixed(1) : '0.0';
+console.log(`✅ 已处理 ${count} 个页面正文: ${(sourceTotal / 1024).toFixed(0)} KB → ${(bodyTotal / 1024).toFixed(0)} KB（减少 ${saved}%）`);
+console.log(`   正文: ${path.relative(projectRoot, OUTPUT_DIR)}/  脚本: ${path.relative(projectRoot, ASSET_DIR)}/`);
@@ -0,0 +1,582 @@
+#!/usr/bin/env node
+import crypto from 'crypto';
+import fs from 'fs';
+import os from 'os';
+import path from 'path';
+import { parseArgs } from 'util';
+import { isMainThread, parentPort } from 'worker_threads';
+import { fileURLToPath } from 'url';
+import pixelmatch from 'pixelmatch';
+import { PNG } from 'pngjs';
+import { runPool } from './workerPool.js';
+
+// 整站截图对比，替代原来每个页面一份的 captureScreenshots*.js / compareScreenshots*.js：
+//   capture   截取本地克隆站 scripts/pages.json 里的每个页面；还没有基准图的页面顺便截取基准图
+//   baseline  重新截取基准图（默认源站，--baseline snapshot 时用本地 public/ 下的静态快照）
+//   approve   把当前截图设为基准图（克隆站有意改动之后）
+//   compare   并行对比基准图和当前截图
+//   run       capture + compare
+//   prune     删除不再被引用的截图和对比结果
+//
+// 截图、差异图都按内容哈希存放在 screenshots/objects/ 下，baselines.json / captures.json 记录每个路由对应的对象；
+// 两张图哈希相同直接判定一致，同一对图片用同样参数比较过的结果缓存在 comparisons.json 里。
+// 对比在 worker 线程里按图块进行：逐行内存比较完全一致的图块直接跳过，感知哈希（dHash）相同的图块也跳过，
+// 其余图块才交给 pixelmatch；差异超过 --max-diff 后提前结束（--full 时比较完整张图）
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+const projectRoot = path.dirname(__dirname);
+
+const MANIFEST_PATH = path.join(__dirname, 'pages.json');
+const SCREENSHOT_DIR = path.join(projectRoot, 'screenshots');
+const OBJECT_DIR = path.join(SCREENSHOT_DIR, 'objects');
+const INDEX_FILES = {
+  baselines: 'baselines.json',
+  captures: 'captures.json',
+  comparisons: 'comparisons.json',
+  // Python 测试脚本（screenshot_store.py）保存的截图，只在 prune 时用来判断引用
+  tests: 'tests.json'
+};
+const REPORT_PATH = path.join(SCREENSHOT_DIR, 'report.json');
+// 对比算法有改动时加一，让缓存的结果失效
+const COMPARE_VERSION = 1;
+
+const VIEWPORT = { width: 1440, height: 900 };
+const NAVIGATION_TIMEOUT_MS = 45_000;
+const SETTLE_MS = 1_000;
+
+// pixelmatch 画相同像素时的淡化程度，跳过的图块按同样方式绘制
+const DIFF_ALPHA = 0.1;
+const DIFF_COLOR = [255, 0, 0];
+// dHash 网格：每个图块缩成 17×16 的灰度格子，比较左右相邻格子得到 256 位
+const HASH_COLUMNS = 17;
+const HASH_ROWS = 16;
+
+// ---------------------------------------------------------------------------
+// 内容寻址存储
+
+function objectPath(hash) {
+  return path.join(OBJECT_DIR, hash.slice(0, 2), `${hash}.png`);
+}
+
+function putObject(buffer) {
+  const hash = crypto.createHash('sha256').update(buffer).digest('hex');
+  const target = objectPath(hash);
+  if (!fs.existsSync(target)) {
+    fs.mkdirSync(path.dirname(target), { recursive: true });
+    const temp = `${target}.${process.pid}.tmp`;
+    fs.writeFileSync(temp, buffer);
+    fs.renameSync(temp, target);
+  }
+  return hash;
+}
+
+function readIndex(name) {
+  const file = path.join(SCREENSHOT_DIR, INDEX_FILES[name]);
+  return fs.existsSync(file) ? JSON.parse(fs.readFileSync(file, 'utf8')) : {};
+}
+
+function writeIndex(name, index) {
+  fs.mkdirSync(SCREENSHOT_DIR, { recursive: true });
+  const sorted = Object.fromEntries(Object.keys(index).sort().map((key) => [key, index[key]]));
+  fs.writeFileSync(path.join(SCREENSHOT_DIR, INDEX_FILES[name]), `${JSON.stringify(sorted, null, 2)}\n`);
+}
+
+// PNG 的宽高在 IHDR 块里，不用解码整张图
+function pngSize(buffer) {
+  return { width: buffer.readUInt32BE(16), height: buffer.readUInt32BE(20) };
+}
+
+// ---------------------------------------------------------------------------
+// 图块对比（在 worker 里执行）
+
+function tileEqual(a, b, x, y, width, height) {
+  const rowBytes = width * 4;
+  for (let row = y; row < y + height; row += 1) {
+    const offsetA = (row * a.width + x) * 4;
+    const offsetB = (row * b.width + x) * 4;
+    if (!a.data.subarray(offsetA, offsetA + rowBytes).equals(b.data.subarray(offsetB, offsetB + rowBytes))) {
+      return false;
+    }
+  }
+  return true;
+}
+
+function luminance(data, offset) {
+  return data[offset] * 0.29889531 + data[offset + 1] * 0.58662247 + data[offset + 2] * 0.11448223;
+}
+
+// 图块的差值哈希：格子平均亮度左右比较，抗锯齿、压缩噪声之类的细微差别不会改变结果
+function tileHash(image, x, y, width, height) {
+  const sums = new Float64Array(HASH_COLUMNS * HASH_ROWS);
+  const counts = new Uint32Array(HASH_COLUMNS * HASH_ROWS);
+  const columnCells = new Uint8Array(width);
+  for (let px = 0; px < width; px += 1) {
+    columnCells[px] = Math.floor((px * HASH_COLUMNS) / width);
+  }
+  const data = image.data;
+  for (let py = 0; py < height; py += 1) {
+    const cellRow = Math.floor((py * HASH_ROWS) / height) * HASH_COLUMNS;
+    let offset = ((y + py) * image.width + x) * 4;
+    for (let px = 0; px < width; px += 1, offset += 4) {
+      const cell = cellRow + columnCells[px];
+      sums[cell] += data[offset] * 0.29889531 + data[offset + 1] * 0.58662247 + data[offset + 2] * 0.11448223;
+      counts[cell] += 1;
+    }
+  }
+
+  const bits = Buffer.alloc((HASH_ROWS * (HASH_COLUMNS - 1)) / 8);
+  let bit = 0;
+  for (let row = 0; row < HASH_ROWS; row += 1) {
+    for (let column = 0; column < HASH_COLUMNS - 1; column += 1, bit += 1) {
+      const cell = row * HASH_COLUMNS + column;
+      if (sums[cell] / counts[cell] < sums[cell + 1] / counts[cell + 1]) {
+        bits[bit >> 3] |= 1 << (bit & 7);
+      }
+    }
+  }
+  return bits;
+}
+
+function copyTile(image, x, y, width, height) {
+  const tile = Buffer.allocUnsafe(width * height * 4);
+  for (let row = 0; row < height; row += 1) {
+    const offset = ((y + row) * image.width + x) * 4;
+    image.data.copy(tile, row * width * 4, offset, offset + width * 4);
+  }
+  return tile;
+}
+
+function blend(value, alpha) {
+  return 255 + (value - 255) * alpha;
+}
+
+// 差异图：重叠区域先画成淡化的基准图，再贴上 pixelmatch 比较过的图块；只有一边有的区域整块标红
+function renderDiff(baseline, size, overlap, diffTiles) {
+  const diff = new PNG({ width: size.width, height: size.height });
+  for (let y = 0; y < size.height; y += 1) {
+    for (let x = 0; x < size.width; x += 1) {
+      const offset = (y * size.width + x) * 4;
+      if (x < overlap.width && y < overlap.height) {
+        const source = (y * baseline.width + x) * 4;
+        const value = blend(luminance(baseline.data, source), (DIFF_ALPHA * baseline.data[source + 3]) / 255);
+        diff.data[offset] = diff.data[offset + 1] = diff.data[offset + 2] = value;
+      } else {
+        [diff.data[offset], diff.data[offset + 1], diff.data[offset + 2]] = DIFF_COLOR;
+      }
+      diff.data[offset + 3] = 255;
+    }
+  }
+  for (const tile of diffTiles) {
+    for (let row = 0; row < tile.height; row += 1) {
+      tile.data.copy(diff.data, ((tile.y + row) * size.width + tile.x) * 4, row * tile.width * 4, (row + 1) * tile.width * 4);
+    }
+  }
+  return PNG.sync.write(diff);
+}
+
+function extendBox(box, x, y) {
+  if (!box) return { left: x, top: y, right: x, bottom: y };
+  box.left = Math.min(box.left, x);
+  box.top = Math.min(box.top, y);
+  box.right = Math.max(box.right, x);
+  box.bottom = Math.max(box.bottom, y);
+  return box;
+}
+
+function compareImages({ route, baseline: baselineRecord, current: currentRecord, options }) {
+  const started = performance.now();
+  const baseline = PNG.sync.read(fs.readFileSync(objectPath(baselineRecord.object)));
+  const current = PNG.sync.read(fs.readFileSync(objectPath(currentRecord.object)));
+
+  const overlap = { width: Math.min(baseline.width, current.width), height: Math.min(baseline.height, current.height) };
+  const size = { width: Math.max(baseline.width, current.width), height: Math.max(baseline.height, current.height) };
+  const totalPixels = size.width * size.height;
+  const limit = options.full ? Infinity : Math.floor(totalPixels * options.maxDiff);
+
+  // 尺寸不同时只有一边有的区域都算作差异
+  let differingPixels = totalPixels - overlap.width * overlap.height;
+  let bbox = null;
+  if (differingPixels > 0) {
+    const widthDiffers = overlap.width < size.width;
+    const heightDiffers = overlap.height < size.height;
+    bbox = extendBox(null, heightDiffers ? 0 : overlap.width, widthDiffers ? 0 : overlap.height);
+    bbox = extendBox(bbox, size.width - 1, size.height - 1);
+  }
+
+  const tiles = { total: 0, exact: 0, perceptual: 0, compared: 0, unchecked: 0 };
+  const diffTiles = [];
+  for (let y = 0; y < overlap.height; y += options.tile) {
+    for (let x = 0; x < overlap.width; x += options.tile) {
+      const width = Math.min(options.tile, overlap.width - x);
+      const height = Math.min(options.tile, overlap.height - y);
+      tiles.total += 1;
+
+      if (differingPixels > limit) {
+        tiles.unchecked += 1;
+        continue;
+      }
+      if (tileEqual(baseline, current, x, y, width, height)) {
+        tiles.exact += 1;
+        continue;
+      }
+      if (
+        !options.exact &&
+        width >= HASH_COLUMNS &&
+        height >= HASH_ROWS &&
+        tileHash(baseline, x, y, width, height).equals(tileHash(current, x, y, width, height))
+      ) {
+        tiles.perceptual += 1;
+        continue;
+      }
+
+      const output = Buffer.alloc(width * height * 4);
+      const count = pixelmatch(copyTile(baseline, x, y, width, height), copyTile(current, x, y, width, height), output, width, height, {
+        threshold: options.threshold,
+        includeAA: true,
+        alpha: DIFF_ALPHA,
+        diffColor: DIFF_COLOR
+      });
+      tiles.compared += 1;
+      if (count === 0) continue;
+
+      differingPixels += count;
+      diffTiles.push({ x, y, width, height, data: output });
+      for (let offset = 0; offset < output.length; offset += 4) {
+        if (output[offset] === DIFF_COLOR[0] && output[offset + 1] === DIFF_COLOR[1] && output[offset + 2] === DIFF_COLOR[2]) {
+          const pixel = offset / 4;
+          bbox = extendBox(bbox, x + (pixel % width), y + Math.floor(pixel / width));
+        }
+      }
+    }
+  }
+
+  const ratio = differingPixels / totalPixels;
+  return {
+    route,
+    status: ratio > options.maxDiff ? 'fail' : 'pass',
+    differingPixels,
+    totalPixels,
+    ratio,
+    exceeded: tiles.unchecked > 0,
+    baselineSize: [baseline.width, baseline.height],
+    currentSize: [current.width, current.height],
+    bbox,
+    tiles,
+    diff: differingPixels > 0 ? putObject(renderDiff(baseline, size, overlap, diffTiles)) : null,
+    ms: Math.round(performance.now() - started)
+  };
+}
+
+if (!isMainThread) {
+  parentPort.on('message', (job) => {
+    try {
+      parentPort.postMessage(compareImages(job));
+    } catch (error) {
+      parentPort.postMessage({ route: job.route, status: 'error', error: error.message });
+    }
+  });
+}
+
+// ---------------------------------------------------------------------------
+// 截图（主线程，一个浏览器里开多个上下文并行截取）
+
+function loadRoutes(filters) {
+  const manifest = JSON.parse(fs.readFileSync(MANIFEST_PATH, 'utf8'));
+  const routes = manifest.pages.map((page) => ({
+    slug: page.slug,
+    route: page.route ?? (page.slug === 'home' ? '/' : `/${page.slug}`),
+    // public/ 下的静态快照在本地服务器上的地址
+    snapshot: page.snapshot ? `/${path.posix.relative('public', page.snapshot.path)}` : null
+  }));
+  const unknown = filters.filter((filter) => !routes.some((entry) => entry.slug === filter || entry.route === filter));
+  if (unknown.length > 0) {
+    throw new Error(`scripts/pages.json 里没有这些页面: ${unknown.join(', ')}`);
+  }
+  const selected = filters.length > 0 ? routes.filter((entry) => filters.includes(entry.slug) || filters.includes(entry.route)) : routes;
+  return { remoteOrigin: manifest.remoteOrigin.replace(/\/$/, ''), routes: selected };
+}
+
+function baselineUrl(entry, remoteOrigin, options) {
+  if (options.baseline === 'snapshot') {
+    return entry.snapshot ? `${options.baseUrl}${entry.snapshot}` : null;
+  }
+  return `${remoteOrigin}${entry.route}`;
+}
+
+async function captureTargets(targets, concurrency) {
+  const { chromium } = await import('playwright');
+  const browser = await chromium.launch({ headless: true });
+  const queue = [...targets];
+  const records = [];
+
+  const captureNext = async () => {
+    for (let target = queue.shift(); target; target = queue.shift()) {
+      const started = performance.now();
+      const context = await browser.newContext({ viewport: VIEWPORT, javaScriptEnabled: false, deviceScaleFactor: 1 });
+      try {
+        const page = await context.newPage();
+        await page.goto(target.url, { waitUntil: 'networkidle', timeout: NAVIGATION_TIMEOUT_MS });
+        await page.waitForTimeout(SETTLE_MS);
+        const buffer = await page.screenshot({ fullPage: true });
+        const record = { object: putObject(buffer), url: target.url, ...pngSize(buffer), capturedAt: new Date().toISOString() };
+        records.push({ ...target, record });
+        console.log(`📸 ${target.kind === 'baseline' ? '基准' : '当前'} ${target.route} (${((performance.now() - started) / 1000).toFixed(1)}s)`);
+      } catch (error) {
+        records.push({ ...target, error: error.message });
+        console.error(`❌ 截图失败 ${target.url}: ${error.message}`);
+      } finally {
+        await context.close();
+      }
+    }
+  };
+
+  try {
+    await Promise.all(Array.from({ length: Math.min(concurrency, queue.length) }, captureNext));
+  } finally {
+    await browser.close();
+  }
+  return records;
+}
+
+async function capture(filters, options, { clone, baselines: baselineMode }) {
+  const { remoteOrigin, routes } = loadRoutes(filters);
+  const baselines = readIndex('baselines');
+  const captures = readIndex('captures');
+  const targets = [];
+
+  for (const entry of routes) {
+    if (clone) {
+      targets.push({ kind: 'capture', route: entry.route, url: `${options.baseUrl}${entry.route}` });
+    }
+    if (baselineMode === 'all' || (baselineMode === 'missing' && !baselines[entry.route])) {
+      const url = baselineUrl(entry, remoteOrigin, options);
+      if (url) targets.push({ kind: 'baseline', route: entry.route, url });
+      else console.warn(`⚠️ ${entry.route} 没有静态快照，跳过基准图`);
+    }
+  }
+
+  const records = await captureTargets(targets, options.concurrency);
+  for (const { kind, route, record } of records) {
+    if (!record) continue;
+    (kind === 'baseline' ? baselines : captures)[route] = record;
+  }
+  writeIndex('baselines', baselines);
+  writeIndex('captures', captures);
+  return records.filter((entry) => entry.error).length;
+}
+
+function approve(filters) {
+  const { routes } = loadRoutes(filters);
+  const baselines = readIndex('baselines');
+  const captures = readIndex('captures');
+  let approved = 0;
+  for (const { route } of routes) {
+    if (!captures[route]) continue;
+    baselines[route] = captures[route];
+    approved += 1;
+  }
+  writeIndex('baselines', baselines);
+  console.log(`✅ 已把 ${approved} 个页面的当前截图设为基准图`);
+}
+
+// ---------------------------------------------------------------------------
+// 对比（主线程分发，worker 计算）
+
+function formatPercent(value) {
+  return `${(value * 100).toFixed(2)}%`;
+}
+
+function describe(result) {
+  if (result.status === 'missing') return `⚠️ ${result.route}  缺少${result.missing}`;
+  if (result.status === 'error') return `❌ ${result.route}  对比出错: ${result.error}`;
+  if (result.status === 'identical') return `✅ ${result.route}  完全一致`;
+
+  const icon = result.status === 'pass' ? '✅' : '❌';
+  const { tiles } = result;
+  const parts = [
+    `${icon} ${result.route}  ${formatPercent(result.ratio)}${result.exceeded ? '+（超过阈值，提前结束）' : ''}`,
+    `图块 ${tiles.total}: 一致 ${tiles.exact}, 感知哈希跳过 ${tiles.perceptual}, 逐像素 ${tiles.compared}` +
+      (tiles.unchecked ? `, 未检查 ${tiles.unchecked}` : ''),
+    result.cached ? '缓存' : `${result.ms}ms`
+  ];
+  if (result.baselineSize.join() !== result.currentSize.join()) {
+    parts.push(`尺寸 ${result.baselineSize.join('×')} → ${result.currentSize.join('×')}`);
+  }
+  let line = parts.join('  |  ');
+  if (result.diff) {
+    const { left, top, right, bottom } = result.bbox;
+    line += `\n     差异区域 (${left}, ${top}) - (${right}, ${bottom})  ${path.relative(projectRoot, objectPath(result.diff))}`;
+  }
+  return line;
+}
+
+async function compare(filters, options) {
+  const { routes } = loadRoutes(filters);
+  const baselines = readIndex('baselines');
+  const captures = readIndex('captures');
+  const comparisons = readIndex('comparisons');
+  const compareOptions = {
+    threshold: options.threshold,
+    maxDiff: options.maxDiff,
+    full: options.full,
+    exact: options.exact,
+    tile: options.tile
+  };
+
+  const started = performance.now();
+  const results = new Map();
+  const jobs = [];
+  for (const { route } of routes) {
+    const baseline = baselines[route];
+    const current = captures[route];
+    if (!baseline || !current) {
+      results.set(route, { route, status: 'missing', missing: baseline ? '当前截图' : '基准图' });
+      continue;
+    }
+    if (baseline.object === current.object) {
+      results.set(route, { route, status: 'identical', ratio: 0, diff: null });
+      continue;
+    }
+
+    const key = crypto
+      .createHash('sha256')
+      .update(JSON.stringify([COMPARE_VERSION, baseline.object, current.object, compareOptions]))
+      .digest('hex');
+    const cached = comparisons[key];
+    if (cached && (!cached.diff || fs.existsSync(objectPath(cached.diff)))) {
+      results.set(route, { ...cached, route, cached: true });
+      continue;
+    }
+    jobs.push({ route, key, baseline, current, options: compareOptions });
+  }
+
+  const keys = new Map(jobs.map((job) => [job.route, job.key]));
+  for (const result of await runPool(__filename, jobs, options.jobs)) {
+    results.set(result.route, result);
+    if (result.status !== 'error') {
+      comparisons[keys.get(result.route)] = { ...result, baseline: baselines[result.route].object, current: captures[result.route].object };
+    }
+  }
+  writeIndex('comparisons', comparisons);
+
+  const ordered = routes.map(({ route }) => results.get(route));
+  fs.writeFileSync(
+    REPORT_PATH,
+    `${JSON.stringify({ generatedAt: new Date().toISOString(), options: compareOptions, results: ordered }, null, 2)}\n`
+  );
+
+  for (const result of ordered) console.log(describe(result));
+  const failed = ordered.filter((result) => !['pass', 'identical'].includes(result.status)).length;
+  console.log(
+    `\n🖼️ ${ordered.length} 个页面: 通过 ${ordered.length - failed}, 未通过 ${failed}` +
+      `（逐像素对比 ${jobs.length} 个, ${options.jobs} 个线程, ${((performance.now() - started) / 1000).toFixed(2)}s）`
+  );
+  console.log(`   报告: ${path.relative(projectRoot, REPORT_PATH)}`);
+  return failed;
+}
+
+// 只保留 baselines / captures / tests 引用的截图，以及这些截图之间的对比结果和差异图
+function prune() {
+  const comparisons = readIndex('comparisons');
+  const live = new Set();
+  for (const name of ['baselines', 'captures', 'tests']) {
+    for (const record of Object.values(readIndex(name))) live.add(record.object);
+  }
+
+  for (const [key, result] of Object.entries(comparisons)) {
+    if (live.has(result.baseline) && live.has(result.current)) {
+      if (result.diff) live.add(result.diff);
+    } else {
+      delete comparisons[key];
+    }
+  }
+  writeIndex('comparisons', comparisons);
+
+  let removed = 0;
+  let freed = 0;
+  if (fs.existsSync(OBJECT_DIR)) {
+    for (const prefix of fs.readdirSync(OBJECT_DIR)) {
+      for (const file of fs.readdirSync(path.join(OBJECT_DIR, prefix))) {
+        if (live.has(path.basename(file, '.png'))) continue;
+        const target = path.join(OBJECT_DIR, prefix, file);
+        freed += fs.statSync(target).size;
+        fs.rmSync(target);
+        removed += 1;
+      }
+    }
+  }
+  console.log(`🧹 删除了 ${removed} 个不再引用的对象 (${(freed / 1024 / 1024).toFixed(1)} MB)`);
+}
+
+// ---------------------------------------------------------------------------
+
+const COMMANDS = ['capture', 'baseline', 'approve', 'compare', 'run', 'prune'];
+
+function parseOptions(argv) {
+  const { values, positionals } = parseArgs({
+    args: argv,
+    allowPositionals: true,
+    options: {
+      'base-url': { type: 'string', default: 'http://127.0.0.1:3000' },
+      baseline: { type: 'string', default: 'remote' },
+      'update-baselines': { type: 'boolean', default: false },
+      concurrency: { type: 'string', default: '4' },
+      jobs: { type: 'string', default: String(os.availableParallelism()) },
+      threshold: { type: 'string', default: '0.1' },
+      'max-diff': { type: 'string', default: '0.01' },
+      tile: { type: 'string', default: '128' },
+      full: { type: 'boolean', default: false },
+      exact: { type: 'boolean', default: false }
+    }
+  });
+  const [command = 'run', ...filters] = positionals;
+  if (!COMMANDS.includes(command)) {
+    throw new Error(`未知命令 ${command}，可用命令: ${COMMANDS.join(', ')}`);
+  }
+  if (!['remote', 'snapshot'].includes(values.baseline)) {
+    throw new Error('--baseline 只能是 remote 或 snapshot');
+  }
+  return {
+    command,
+    filters,
+    options: {
+      baseUrl: values['base-url'].replace(/\/$/, ''),
+      baseline: values.baseline,
+      updateBaselines: values['update-baselines'],
+      concurrency: Math.max(1, Number(values.concurrency) || 1),
+      jobs: Math.max(1, Number(values.jobs) || 1),
+      threshold: Number(values.threshold),
+      maxDiff: Number(values['max-diff']),
+      tile: Math.max(16, Number(values.tile) || 128),
+      full: values.full,
+      exact: values.exact
+    }
+  };
+}
+
+async function main() {
+  const { command, filters, options } = parseOptions(process.argv.slice(2));
+  let failures = 0;
+
+  if (command === 'capture' || command === 'run') {
+    failures += await capture(filters, options, { clone: true, baselines: options.updateBaselines ? 'all' : 'missing' });
+  }
+  if (command === 'baseline') {
+    failures += await capture(filters, options, { clone: false, baselines: 'all' });
+  }
+  if (command === 'approve') approve(filters);
+  if (command === 'compare' || command === 'run') {
+    failures += await compare(filters, options);
+  }
+  if (command === 'prune') prune();
+
+  if (failures > 0) process.exit(1);
+}
+
+if (isMainThread) {
+  main().catch((error) => {
+    console.error(`❌ ${error instanceof Error ? error.message : error}`);
+    process.exit(1);
+  });
+}
@@ -0,0 +1,35 @@
+import { Worker } from 'worker_threads';
+
+// 简单的 worker_threads 线程池：每个线程加载 workerFile，通过 postMessage 一次领取一个任务，
+// 回传一条结果消息后再领取下一个。结果按完成顺序返回，任务里需要自带能对应回去的标识
+export function runPool(workerFile, jobs, size) {
+  return new Promise((resolve, reject) => {
+    const results = [];
+    const queue = [...jobs];
+    const workers = Array.from({ length: Math.min(size, queue.length) }, () => new Worker(workerFile));
+    let active = workers.length;
+
+    if (active === 0) resolve(results);
+    for (const worker of workers) {
+      const next = () => {
+        const job = queue.shift();
+        if (job) {
+          worker.postMessage(job);
+        } else {
+          void worker.terminate();
+          active -= 1;
+          if (active === 0) resolve(results);
+        }
+      };
+      worker.on('message', (result) => {
+        results.push(result);
+        next();
+      });
+      worker.on('error', (error) => {
+        for (const other of workers) void other.terminate();
+        reject(error);
+      });
+      next();
+    }
+  });
+}
@@ -0,0 +1,593 @@
+#!/usr/bin/env python3
+"""
+站点爬取检查
+
+sitemap：读取 sitemap.xml（拆分后的 sitemap index 会继续展开），并发请求其中的每个 URL，
+按页面统计首字节时间和完整下载时间，列出最慢的页面。任何页面返回错误状态码时退出码为 1。
+
+sitemap 里的地址是线上域名，请求时会改写到 --base-url，便于检查本地或预发部署：
+
+    python site_crawler.py sitemap
+    python site_crawler.py sitemap --base-url http://localhost:3000 --samples 3 --concurrency 10
+    python site_crawler.py sitemap --max-ms 1500 --json --output crawl.json
+    python site_crawler.py sitemap --baseline-url http://localhost:3001   # 与改动前的部署比较每页字节数和 TTFB
+
+routes：从 app/*/page.tsx（或 sitemap）找出全部页面，在多个相互隔离的 Playwright context 中
+并发加载，记录每个页面的 TTFB、LCP、传输字节数和请求数，按 --rank-by 从慢到快排序。
+--fast 只用 httpx 测 TTFB，不启动浏览器：
+
+    python site_crawler.py routes --workers 4
+    python site_crawler.py routes --source sitemap --rank-by transfer_bytes --top 10
+    python site_crawler.py routes --fast --samples 5
+
+payload：逐页请求评论列表接口，比较每页的字节数：改动前的部署（--baseline-url）、完整格式、
+format=compact 紧凑格式，以及 gzip 后实际传输的字节数；再带 If-None-Match 重新请求一次，确认返回 304。
+响应里出现邮箱、IP 等内部字段时退出码为 1：
+
+    python site_crawler.py payload --pages 5 --baseline-url http://localhost:3001
+    python site_crawler.py payload --sort popular --limit 20 --json --output payload.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import httpx
+
+from comments_loadgen import COMMENTS_API, DEFAULT_BASE_URL, DEFAULT_GAME_ID, SORTS, LoadStats, measure_page
+from perf_trace import PERF_INIT_SCRIPT, async_collect_page_metrics, percentile
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT_DIR, "app")
+SITEMAP_PATH = "/sitemap.xml"
+SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+PAGE_FILES = ("page.tsx", "page.ts", "page.jsx", "page.js")
+
+VIEWPORT = {"width": 1920, "height": 1080}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+ROUTE_METRICS = ("ttfb_ms", "dom_content_loaded_ms", "lcp_ms", "transfer_bytes", "requests")
+# 评论接口不应该返回给浏览器的字段
+PRIVATE_FIELDS = {"email", "ip_address", "user_agent", "updated_at", "status", "popular_score"}
+
+
+def local_path(url):
+    """把 sitemap 中的绝对地址改写成相对 --base-url 的路径"""
+    parts = urlsplit(url)
+    return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+
+async def fetch_sitemap_paths(client, path=SITEMAP_PATH, seen=None):
+    """返回 sitemap 中的全部页面路径；遇到 sitemapindex 时递归读取子 sitemap"""
+    seen = seen if seen is not None else set()
+    if path in seen:
+        return []
+    seen.add(path)
+
+    response = await client.get(path)
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
+    locs = [loc.text.strip() for loc in root.iter(f"{SITEMAP_NS}loc") if loc.text]
+
+    if root.tag == f"{SITEMAP_NS}sitemapindex":
+        paths = []
+        for loc in locs:
+            paths.extend(await fetch_sitemap_paths(client, local_path(loc), seen))
+        return paths
+    return [local_path(loc) for loc in locs]
+
+
+def discover_app_routes(app_dir=APP_DIR):
+    """列出 app/ 下所有静态页面路由；跳过动态段 [slug]、私有目录 _x 和 api/，路由组 (group) 不计入路径"""
+    routes = []
+    for root, dirs, files in os.walk(app_dir):
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(("_", "[", ".")) and not (root == app_dir and d == "api")
+        )
+        if not any(name in files for name in PAGE_FILES):
+            continue
+        segments = [
+            segment for segment in os.path.relpath(root, app_dir).split(os.sep)
+            if segment != "." and not (segment.startswith("(") and segment.endswith(")"))
+        ]
+        routes.append("/" + "/".join(segments))
+    return sorted(set(routes))
+
+
+async def discover_paths(args, client):
+    if args.source == "sitemap":
+        paths = await fetch_sitemap_paths(client, args.sitemap)
+        paths = [path for path in paths if not any(path.endswith(suffix) for suffix in args.exclude)]
+    else:
+        paths = discover_app_routes()
+    if args.include:
+        paths = [path for path in paths if any(part in path for part in args.include)]
+    return list(dict.fromkeys(paths))
+
+
+def page_rows(report, sizes=None):
+    """把 "<路径> ttfb" / "<路径> total" 两组统计合并成每个页面一行，按完整下载 p95 从慢到快排序"""
+    rows = []
+    for path in report["pages"]:
+        ttfb = report["endpoints"].get(f"{path} ttfb", {})
+        total = report["endpoints"].get(f"{path} total", {})
+        size = (sizes or {}).get(path) or {}
+        rows.append({
+            "path": path,
+            "samples": ttfb.get("requests", 0),
+            "errors": ttfb.get("errors", 0),
+            "status_codes": ttfb.get("status_codes", {}),
+            "ttfb_p50_ms": ttfb.get("latency_ms", {}).get("p50"),
+            "ttfb_p95_ms": ttfb.get("latency_ms", {}).get("p95"),
+            "total_p95_ms": total.get("latency_ms", {}).get("p95"),
+            "bytes": size.get("bytes"),
+            "wire_bytes": size.get("wire_bytes")
+        })
+    rows.sort(key=lambda row: row["total_p95_ms"] if row["total_p95_ms"] is not None else float("inf"), reverse=True)
+    return rows
+
+
+def compare_rows(rows, baseline_rows):
+    """给每一行加上改动前部署的字节数和 TTFB，以及节省的量（正数表示改动后更小/更快）"""
+    baseline = {row["path"]: row for row in baseline_rows}
+    for row in rows:
+        before = baseline.get(row["path"], {})
+        for key in ("bytes", "wire_bytes", "ttfb_p50_ms", "ttfb_p95_ms"):
+            row[f"baseline_{key}"] = before.get(key)
+            row[f"{key}_saved"] = (
+                round(before[key] - row[key], 1)
+                if before.get(key) is not None and row[key] is not None else None
+            )
+    return rows
+
+
+async def run_sitemap(args):
+    targets = {"candidate": args.base_url}
+    if args.baseline_url:
+        targets["baseline"] = args.baseline_url
+    stats = {name: LoadStats() for name in targets}
+    sizes = {name: {} for name in targets}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    clients = {name: httpx.AsyncClient(base_url=url, timeout=args.timeout) for name, url in targets.items()}
+    try:
+        paths = await fetch_sitemap_paths(clients["candidate"], args.sitemap)
+        if args.exclude:
+            paths = [path for path in paths if not any(path.endswith(suffix) for suffix in args.exclude)]
+        paths = list(dict.fromkeys(paths))
+
+        async def crawl(path):
+            async with semaphore:
+                # 有改动前的部署时两边交替请求，避免负载变化只影响一边
+                for _ in range(args.samples):
+                    for name, client in clients.items():
+                        size = await measure_page(client, stats[name], path, path)
+                        if size:
+                            sizes[name][path] = size
+
+        await asyncio.gather(*(crawl(path) for path in paths))
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    for target_stats in stats.values():
+        target_stats.stop()
+    stats, baseline_stats = stats["candidate"], stats.get("baseline")
+
+    report = stats.report(
+        mode="sitemap",
+        base_url=args.base_url,
+        sitemap=args.sitemap,
+        samples=args.samples,
+        max_ms=args.max_ms
+    )
+    report["baseline_url"] = args.baseline_url
+    report["pages"] = paths
+    report["rows"] = page_rows(report, sizes["candidate"])
+    if baseline_stats:
+        baseline_report = baseline_stats.report()
+        baseline_report["pages"] = paths
+        compare_rows(report["rows"], page_rows(baseline_report, sizes["baseline"]))
+    report["slow"] = [
+        row["path"] for row in report["rows"]
+        if args.max_ms is not None and row["total_p95_ms"] is not None and row["total_p95_ms"] > args.max_ms
+    ]
+    return report
+
+
+async def load_route(browser, base_url, path, timeout):
+    """在全新的 context 中加载一个页面（冷缓存），返回 TTFB、LCP、传输字节数和请求数"""
+    context = await browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+    await context.add_init_script(PERF_INIT_SCRIPT)
+    page = await context.new_page()
+    finished, failed = [], []
+    page.on("requestfinished", finished.append)
+    page.on("requestfailed", failed.append)
+    try:
+        response = await page.goto(base_url.rstrip("/") + path, wait_until="load", timeout=timeout * 1000)
+        try:
+            # 等懒加载的图片和接口请求结束，LCP 和字节数才完整
+            await page.wait_for_load_state("networkidle", timeout=5000)
+        except Exception:
+            pass
+        metrics = await async_collect_page_metrics(page)
+        sizes = await asyncio.gather(*(request.sizes() for request in finished), return_exceptions=True)
+        return {
+            "status": response.status if response else None,
+            "ttfb_ms": metrics.get("ttfb_ms"),
+            "dom_content_loaded_ms": metrics.get("dom_content_loaded_ms"),
+            "lcp_ms": metrics.get("lcp_ms"),
+            "document_bytes": metrics.get("transfer_bytes"),
+            "transfer_bytes": sum(
+                size["responseHeadersSize"] + size["responseBodySize"]
+                for size in sizes if isinstance(size, dict)
+            ),
+            "requests": len(finished) + len(failed),
+            "failed_requests": len(failed)
+        }
+    except Exception as e:
+        return {"status": None, "error": str(e)}
+    finally:
+        await context.close()
+
+
+def route_row(path, loads):
+    """多次加载取中位数；任何一次失败或状态码 >= 400 都计入 errors"""
+    ok = [load for load in loads if load.get("status") and load["status"] < 400]
+    row = {
+        "path": path,
+        "samples": len(loads),
+        "errors": len(loads) - len(ok),
+        "status_codes": sorted({str(load.get("status") or "exception") for load in loads})
+    }
+    for key in ROUTE_METRICS + ("failed_requests",):
+        values = [load[key] for load in ok if load.get(key) is not None]
+        row[key] = percentile(values, 50)
+    messages = [load["error"] for load in loads if load.get("error")]
+    if messages:
+        row["error"] = messages[-1]
+    return row
+
+
+def rank_rows(rows, key):
+    return sorted(rows, key=lambda row: row.get(key) if row.get(key) is not None else float("inf"), reverse=True)
+
+
+async def crawl_with_browser(args, paths):
+    # 只有浏览器模式需要 Playwright，--fast 和 sitemap 子命令不依赖它
+    from playwright.async_api import async_playwright
+
+    semaphore = asyncio.Semaphore(args.workers)
+    loads = {path: [] for path in paths}
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=not args.headed)
+        try:
+            async def crawl(path):
+                for _ in range(args.samples):
+                    async with semaphore:
+                        loads[path].append(await load_route(browser, args.base_url, path, args.timeout))
+                ok = all(load.get("status") and load["status"] < 400 for load in loads[path])
+                print(f"{'✅' if ok else '❌'} {path}")
+
+            await asyncio.gather(*(crawl(path) for path in paths))
+        finally:
+            await browser.close()
+
+    return [route_row(path, loads[path]) for path in paths]
+
+
+async def run_routes(args):
+    started = datetime.now()
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        paths = await discover_paths(args, client)
+        if args.fast:
+            stats = LoadStats()
+            sizes = {}
+            semaphore = asyncio.Semaphore(args.workers)
+
+            async def crawl(path):
+                async with semaphore:
+                    for _ in range(args.samples):
+                        sizes[path] = await measure_page(client, stats, path, path) or sizes.get(path)
+
+            await asyncio.gather(*(crawl(path) for path in paths))
+            stats.stop()
+            fast_report = stats.report()
+            fast_report["pages"] = paths
+            rows = page_rows(fast_report, sizes)
+
+    if not args.fast:
+        rows = await crawl_with_browser(args, paths)
+
+    rank_by = args.rank_by or ("ttfb_p95_ms" if args.fast else "lcp_ms")
+    return {
+        "test_time": started.isoformat(),
+        "mode": "routes",
+        "engine": "httpx" if args.fast else "playwright",
+        "base_url": args.base_url,
+        "source": args.source,
+        "samples": args.samples,
+        "elapsed_s": round((datetime.now() - started).total_seconds(), 2),
+        "rank_by": rank_by,
+        "pages": paths,
+        "rows": rank_rows(rows, rank_by),
+        "slow": []
+    }
+
+
+def private_fields(value):
+    """递归找出 JSON 里出现的内部字段名"""
+    found = set()
+    if isinstance(value, dict):
+        found.update(PRIVATE_FIELDS & value.keys())
+        for item in value.values():
+            found |= private_fields(item)
+    elif isinstance(value, list):
+        for item in value:
+            found |= private_fields(item)
+    return found
+
+
+async def measure_payload(client, params):
+    """请求一次评论列表：响应体字节数、实际传输（gzip）字节数、内部字段，以及带 ETag 重新请求是否返回 304"""
+    response = await client.get(COMMENTS_API, params=params, headers={"Accept-Encoding": "gzip"})
+    result = {
+        "status": response.status_code,
+        "bytes": len(response.content),
+        "wire_bytes": response.num_bytes_downloaded,
+        "private_fields": sorted(private_fields(response.json())) if response.status_code < 400 else [],
+        "not_modified": None
+    }
+    etag = response.headers.get("etag")
+    if etag:
+        again = await client.get(COMMENTS_API, params=params, headers={"If-None-Match": etag})
+        result["not_modified"] = again.status_code == 304
+    return result
+
+
+async def run_payload(args):
+    started = datetime.now()
+    targets = {"after": args.base_url}
+    if args.baseline_url:
+        targets["before"] = args.baseline_url
+    clients = {name: httpx.AsyncClient(base_url=url, timeout=args.timeout) for name, url in targets.items()}
+    rows = []
+    try:
+        for page in range(1, args.pages + 1):
+            params = {"game_id": args.game_id, "page": page, "limit": args.limit, "sort": args.sort}
+            after = await measure_payload(clients["after"], params)
+            compact = await measure_payload(clients["after"], {**params, "format": "compact"})
+            before = await measure_payload(clients["before"], params) if "before" in clients else None
+            statuses = [result["status"] for result in (before, after, compact) if result]
+            leaked = sorted(set(after["private_fields"]) | set(compact["private_fields"]))
+            rows.append({
+                "path": f"{COMMENTS_API}?page={page}",
+                "status_codes": sorted({str(status) for status in statuses}),
+                "errors": sum(1 for status in statuses if status >= 400) + (1 if leaked else 0),
+                "before_bytes": before["bytes"] if before else None,
+                "before_wire_bytes": before["wire_bytes"] if before else None,
+                "before_private_fields": before["private_fields"] if before else None,
+                "after_bytes": after["bytes"],
+                "after_wire_bytes": after["wire_bytes"],
+                "compact_bytes": compact["bytes"],
+                "compact_wire_bytes": compact["wire_bytes"],
+                "private_fields": leaked,
+                "not_modified": after["not_modified"]
+            })
+            print(f"{'✅' if not rows[-1]['errors'] else '❌'} 第 {page} 页")
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+    totals = {
+        key: sum(row[key] for row in rows) if all(row[key] is not None for row in rows) else None
+        for key in ("before_bytes", "before_wire_bytes", "after_bytes", "after_wire_bytes", "compact_bytes", "compact_wire_bytes")
+    }
+    return {
+        "test_time": started.isoformat(),
+        "mode": "payload",
+        "base_url": args.base_url,
+        "baseline_url": args.baseline_url,
+        "game_id": args.game_id,
+        "sort": args.sort,
+        "limit": args.limit,
+        "elapsed_s": round((datetime.now() - started).total_seconds(), 2),
+        "pages": [row["path"] for row in rows],
+        "rows": rows,
+        "totals": totals,
+        "slow": []
+    }
+
+
+def print_payload_report(report, top=None):
+    rows = report["rows"][:top] if top else report["rows"]
+    print("=" * 96)
+    print(f"{report['base_url']}  {report['game_id']}  sort={report['sort']}  limit={report['limit']}")
+    if report["baseline_url"]:
+        print(f"改动前: {report['baseline_url']}")
+    print("=" * 96)
+    print(f"{'页面':<40}{'改动前':>10}{'完整':>10}{'紧凑':>10}{'改动前gz':>10}{'完整gz':>10}{'紧凑gz':>10}{'304':>6}")
+    for row in rows + [{"path": "合计", **report["totals"], "not_modified": None}]:
+        not_modified = {True: "✓", False: "✗", None: "-"}[row["not_modified"]]
+        print(
+            f"{row['path']:<40}{_fmt(row['before_bytes'])}{_fmt(row['after_bytes'])}{_fmt(row['compact_bytes'])}"
+            f"{_fmt(row['before_wire_bytes'])}{_fmt(row['after_wire_bytes'])}{_fmt(row['compact_wire_bytes'])}{not_modified:>6}"
+        )
+    totals = report["totals"]
+    if totals["before_bytes"]:
+        saved = 1 - totals["after_bytes"] / totals["before_bytes"]
+        saved_compact = 1 - totals["compact_bytes"] / totals["before_bytes"]
+        print(f"\n响应体比改动前减少 {saved * 100:.1f}%（紧凑格式 {saved_compact * 100:.1f}%）")
+    leaked_before = sorted({field for row in report["rows"] for field in row["before_private_fields"] or []})
+    if leaked_before:
+        print(f"ℹ️  改动前的响应包含内部字段: {', '.join(leaked_before)}")
+
+    failed = [row for row in report["rows"] if row["errors"]]
+    for row in failed:
+        if row["private_fields"]:
+            print(f"❌ {row['path']} 返回了内部字段: {', '.join(row['private_fields'])}")
+        else:
+            print(f"❌ {row['path']} 返回 {row['status_codes']}")
+    if not failed:
+        print("✅ 没有返回内部字段")
+
+
+def print_routes_report(report, top=None):
+    if report["engine"] == "httpx":
+        print_report(report, top)
+        return
+    rows = report["rows"][:top] if top else report["rows"]
+    print("=" * 96)
+    print(f"{report['base_url']}  {len(report['pages'])} 个页面  按 {report['rank_by']} 排序  耗时: {report['elapsed_s']}s")
+    print("=" * 96)
+    print(f"{'页面':<44}{'状态码':>8}{'TTFB':>9}{'DCL':>9}{'LCP':>9}{'KB':>9}{'请求数':>8}")
+    for row in rows:
+        kb = round(row["transfer_bytes"] / 1024, 1) if row["transfer_bytes"] is not None else None
+        print(
+            f"{row['path']:<44}{','.join(row['status_codes']):>8}{_fmt9(row['ttfb_ms'])}"
+            f"{_fmt9(row['dom_content_loaded_ms'])}{_fmt9(row['lcp_ms'])}{_fmt9(kb)}"
+            f"{row['requests'] if row['requests'] is not None else '-':>8}"
+        )
+    failed = [row for row in report["rows"] if row["errors"]]
+    for row in failed:
+        print(f"❌ {row['path']} {row.get('error') or row['status_codes']}")
+    if not failed:
+        print("✅ 全部页面正常")
+
+
+def _fmt9(value):
+    return f"{value:>9}" if value is not None else f"{'-':>9}"
+
+
+def _kb(value):
+    return round(value / 1024, 1) if value is not None else None
+
+
+def print_report(report, top=None):
+    rows = report["rows"][:top] if top else report["rows"]
+    compared = bool(report.get("baseline_url"))
+    width = 128 if compared else 108
+    print("=" * width)
+    print(f"{report['base_url']}  {len(report['pages'])} 个页面  耗时: {report['elapsed_s']}s")
+    if compared:
+        print(f"改动前: {report['baseline_url']}")
+    print("=" * width)
+    header = f"{'页面':<48}{'状态码':>10}{'TTFB p50':>10}{'TTFB p95':>10}{'总耗时 p95':>10}{'KB':>10}"
+    if compared:
+        header += f"{'省 KB':>10}{'省传输 KB':>10}{'省 TTFB':>10}"
+    print(header)
+    for row in rows:
+        codes = ",".join(sorted(row["status_codes"]))
+        line = (
+            f"{row['path']:<48}{codes:>10}{_fmt(row['ttfb_p50_ms'])}"
+            f"{_fmt(row['ttfb_p95_ms'])}{_fmt(row['total_p95_ms'])}{_fmt(_kb(row.get('bytes')))}"
+        )
+        if compared:
+            line += f"{_fmt(_kb(row['bytes_saved']))}{_fmt(_kb(row['wire_bytes_saved']))}{_fmt(row['ttfb_p50_ms_saved'])}"
+        print(line)
+
+    if compared:
+        totals = {
+            key: sum(row[key] for row in report["rows"] if row[key] is not None)
+            for key in ("bytes", "baseline_bytes", "wire_bytes", "baseline_wire_bytes")
+        }
+        if totals["baseline_bytes"]:
+            print(
+                f"\n合计 {_kb(totals['baseline_bytes'])} KB → {_kb(totals['bytes'])} KB，"
+                f"传输 {_kb(totals['baseline_wire_bytes'])} KB → {_kb(totals['wire_bytes'])} KB"
+            )
+
+    failed = [row for row in report["rows"] if row["errors"]]
+    for row in failed:
+        print(f"❌ {row['path']} 返回 {row['status_codes']}")
+    for path in report["slow"]:
+        print(f"⚠️  {path} 超过 {report['max_ms']}ms")
+    if not failed and not report["slow"]:
+        print("✅ 全部页面正常")
+
+
+def _fmt(value):
+    return f"{value:>10}" if value is not None else f"{'-':>10}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="按 sitemap 爬取站点并统计每个页面的延迟和字节数")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sitemap = subparsers.add_parser("sitemap", help="请求 sitemap 中的每个 URL")
+    sitemap.add_argument("--base-url", default=DEFAULT_BASE_URL, help="被测站点地址，sitemap 中的域名会改写到这里")
+    sitemap.add_argument("--baseline-url", default=None, help="改动前的部署地址，给出时逐页比较字节数和 TTFB")
+    sitemap.add_argument("--sitemap", default=SITEMAP_PATH, help="sitemap 路径")
+    sitemap.add_argument("--samples", type=int, default=1, help="每个页面的请求次数")
+    sitemap.add_argument("--concurrency", type=int, default=8, help="同时请求的页面数")
+    sitemap.add_argument("--timeout", type=float, default=30.0, help="单个请求超时（秒）")
+    sitemap.add_argument("--max-ms", type=float, default=None, help="完整下载 p95 超过该值的页面视为失败")
+    sitemap.add_argument(
+        "--exclude", type=lambda v: [s for s in v.split(",") if s], default=[".xml", ".txt"],
+        help="跳过以这些后缀结尾的地址，默认跳过 sitemap.xml / robots.txt"
+    )
+    sitemap.add_argument("--top", type=int, default=None, help="只打印最慢的前 N 个页面")
+    sitemap.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    sitemap.add_argument("--output", default=None, help="把 JSON 结果写入文件")
+    sitemap.set_defaults(handler=run_sitemap, printer=print_report)
+
+    routes = subparsers.add_parser("routes", help="加载全部页面，按 TTFB/LCP/字节数/请求数排序")
+    routes.add_argument("--base-url", default=DEFAULT_BASE_URL, help="被测站点地址")
+    routes.add_argument("--source", choices=("app", "sitemap"), default="app", help="页面来源：app/ 目录或 sitemap")
+    routes.add_argument("--sitemap", default=SITEMAP_PATH, help="--source sitemap 时的 sitemap 路径")
+    routes.add_argument("--include", type=lambda v: [s for s in v.split(",") if s], default=None, help="只加载路径包含这些片段的页面，逗号分隔")
+    routes.add_argument("--exclude", type=lambda v: [s for s in v.split(",") if s], default=[".xml", ".txt"], help="--source sitemap 时跳过的后缀")
+    routes.add_argument("--fast", action="store_true", help="只用 httpx 测 TTFB 和下载时间，不启动浏览器")
+    routes.add_argument("--workers", type=int, default=4, help="同时打开的 browser context（或 httpx 请求）数量")
+    routes.add_argument("--samples", type=int, default=1, help="每个页面的加载次数，结果取中位数")
+    routes.add_argument("--timeout", type=float, default=60.0, help="单个页面超时（秒）")
+    routes.add_argument(
+        "--rank-by", default=None,
+        choices=ROUTE_METRICS + ("ttfb_p50_ms", "ttfb_p95_ms", "total_p95_ms"),
+        help="排序指标，默认浏览器模式按 lcp_ms、--fast 按 ttfb_p95_ms"
+    )
+    routes.add_argument("--headed", action="store_true", help="显示浏览器窗口")
+    routes.add_argument("--top", type=int, default=None, help="只打印最慢的前 N 个页面")
+    routes.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    routes.add_argument("--output", default=None, help="把 JSON 结果写入文件")
+    routes.set_defaults(handler=run_routes, printer=print_routes_report, max_ms=None)
+
+    payload = subparsers.add_parser("payload", help="比较评论列表每页的响应字节数（改动前 / 完整 / 紧凑）")
+    payload.add_argument("--base-url", default=DEFAULT_BASE_URL, help="被测站点地址（改动后）")
+    payload.add_argument("--baseline-url", default=None, help="改动前的部署地址")
+    payload.add_argument("--game-id", default=DEFAULT_GAME_ID)
+    payload.add_argument("--pages", type=int, default=5, help="请求的页数")
+    payload.add_argument("--limit", type=int, default=5, help="每页评论数")
+    payload.add_argument("--sort", choices=SORTS, default="newest")
+    payload.add_argument("--timeout", type=float, default=30.0, help="单个请求超时（秒）")
+    payload.add_argument("--top", type=int, default=None, help="只打印前 N 页")
+    payload.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    payload.add_argument("--output", default=None, help="把 JSON 结果写入文件")
+    payload.set_defaults(handler=run_payload, printer=print_payload_report)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(args.handler(args))
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        args.printer(report, args.top)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if not args.json:
+            print(f"\n结果已保存到: {args.output}")
+    failed = any(row["errors"] for row in report["rows"]) or bool(report["slow"])
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
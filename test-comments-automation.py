@@ -1,21 +1,35 @@
 from playwright.sync_api import sync_playwright
+import json
 import time
 
+from comment_waits import (
+    MAKE_COMMENT_API,
+    VOTE_API,
+    LatencyRecorder,
+    goto_and_wait_for_comments,
+    wait_for_api
+)
+from screenshot_store import save_screenshot
+
+SCREENSHOT_GROUP = "test-comments-automation"
+
 def test_comments_system():
+    recorder = LatencyRecorder()
+
     with sync_playwright() as p:
         browser = p.chromium.launch(headless=False)  # 设置为非 headless 模式以便观察
         page = browser.new_page()
 
         print("🚀 开始测试评论系统...")
 
-        # 访问首页
-        page.goto('http://localhost:3000')
-        page.wait_for_load_state('networkidle')
+        # 访问首页，等待首屏评论接口返回
+        with recorder.step("访问首页"):
+            goto_and_wait_for_comments(page, 'http://localhost:3000')
         print("✅ 首页加载完成")
 
         # 截图查看页面状态
-        page.screenshot(path='test-screenshots/01-homepage.png', full_page=True)
-        print("📸 首页截图已保存")
+        screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "01-homepage")
+        print(f"📸 首页截图已保存: {screenshot_path}")
 
         # 查找评论相关元素
         print("🔍 查找评论系统元素...")
@@ -47,13 +61,13 @@ def test_comments_system():
                     print("✅ 填写评论内容")
 
                 if submit_button.count() > 0:
-                    submit_button.click()
-                    print("✅ 点击提交按钮")
-                    page.wait_for_timeout(2000)
+                    with recorder.step("提交评论"):
+                        response = wait_for_api(page, MAKE_COMMENT_API, submit_button.click)
+                    print(f"✅ 点击提交按钮，接口返回 {response.status}")
 
                     # 截图记录提交后的状态
-                    page.screenshot(path='test-screenshots/02-after-submit.png', full_page=True)
-                    print("📸 提交后截图已保存")
+                    screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "02-after-submit")
+                    print(f"📸 提交后截图已保存: {screenshot_path}")
 
             except Exception as e:
                 print(f"❌ 填写表单时出错: {e}")
@@ -68,11 +82,11 @@ def test_comments_system():
         # 如果找到点赞按钮，测试投票
         if like_buttons:
             try:
-                like_buttons[0].click()
-                print("✅ 点击第一个点赞按钮")
-                page.wait_for_timeout(1000)
-                page.screenshot(path='test-screenshots/03-after-like.png', full_page=True)
-                print("📸 点赞后截图已保存")
+                with recorder.step("点赞"):
+                    response = wait_for_api(page, VOTE_API, like_buttons[0].click)
+                print(f"✅ 点击第一个点赞按钮，接口返回 {response.status}")
+                screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "03-after-like")
+                print(f"📸 点赞后截图已保存: {screenshot_path}")
             except Exception as e:
                 print(f"❌ 点赞时出错: {e}")
 
@@ -83,11 +97,13 @@ def test_comments_system():
         # 如果找到回复按钮，测试回复功能
         if reply_buttons:
             try:
+                textareas_before = page.locator('textarea').count()
                 reply_buttons[0].click()
                 print("✅ 点击第一个回复按钮")
-                page.wait_for_timeout(1000)
 
-                # 查找回复输入框
+                # 等待回复表单渲染出新的输入框
+                with recorder.step("打开回复表单"):
+                    page.locator('textarea').nth(textareas_before).wait_for(timeout=5000)
                 reply_textarea = page.locator('textarea').last
                 if reply_textarea.count() > 0:
                     reply_textarea.fill("这是 Playwright 自动化的回复评论！")
@@ -96,21 +112,16 @@ def test_comments_system():
                     # 查找回复提交按钮
                     reply_submit = page.locator('button:has-text("提交"), button:has-text("发送"), button:has-text("回复")').last
                     if reply_submit.count() > 0:
-                        reply_submit.click()
-                        print("✅ 提交回复")
-                        page.wait_for_timeout(2000)
+                        with recorder.step("提交回复"):
+                            response = wait_for_api(page, MAKE_COMMENT_API, reply_submit.click)
+                        print(f"✅ 提交回复，接口返回 {response.status}")
 
-                        page.screenshot(path='test-screenshots/04-after-reply.png', full_page=True)
-                        print("📸 回复后截图已保存")
+                        screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "04-after-reply")
+                        print(f"📸 回复后截图已保存: {screenshot_path}")
 
             except Exception as e:
                 print(f"❌ 回复时出错: {e}")
 
-        # 检查网络请求
-        print("🔍 检查网络请求...")
-        with page.expect_response("**/api/comments.ajax**") as response_info:
-            pass  # 等待任意评论相关的API请求
-
         # 获取页面内容进行分析
         content = page.content()
         print("📄 页面HTML内容长度:", len(content))
@@ -120,13 +131,14 @@ def test_comments_system():
             print("✅ 页面包含评论相关代码")
 
         # 最终截图
-        page.screenshot(path='test-screenshots/05-final.png', full_page=True)
-        print("📸 最终截图已保存")
+        screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "05-final")
+        print(f"📸 最终截图已保存: {screenshot_path}")
 
         browser.close()
+
+        print("⏱️ 各步骤耗时:")
+        print(json.dumps(recorder.summary(), ensure_ascii=False, indent=2))
         print("✨ 测试完成！")
 
 if __name__ == "__main__":
-    import os
-    os.makedirs("test-screenshots", exist_ok=True)
     test_comments_system()
\ No newline at end of file
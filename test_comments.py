@@ -5,12 +5,23 @@ from playwright.sync_api import sync_playwright
 import time
 import json
 
+from comment_waits import (
+    MAKE_COMMENT_API,
+    LatencyRecorder,
+    goto_and_wait_for_comments,
+    wait_for_api
+)
+from screenshot_store import save_page_content, save_screenshot
+
+SCREENSHOT_GROUP = "test_comments"
+
 def test_comments():
     print("=" * 50)
     print("U0001f310 访问 http://localhost:3001 并测试评论插入功能")
     print("=" * 50)
 
     api_requests = []
+    recorder = LatencyRecorder()
 
     def handle_request(request):
         if 'make-comment.ajax' in request.url or '/api/' in request.url:
@@ -38,8 +49,9 @@ def test_comments():
                 print(f"   响应内容无法解析")
 
     # 启动浏览器
-    browser = sync_playwright.launch(headless=False)
-    context = browser.new_page()
+    playwright = sync_playwright().start()
+    browser = playwright.chromium.launch(headless=False)
+    page = browser.new_page()
 
     # 监听网络请求
     page.on("request", handle_request)
@@ -48,12 +60,12 @@ def test_comments():
     try:
         # 访问页面
         print("🌐 导航到页面...")
-        page.goto('http://localhost:3001')
-        page.wait_for_load_state('networkidle')
+        with recorder.step("访问首页"):
+            goto_and_wait_for_comments(page, 'http://localhost:3001')
 
         # 截图保存初始页面状态
-        page.screenshot(path='E:/code/steal-a-brainrot/test_screenshots/01_initial_page.png', full_page=True)
-        print("📸 已保存初始页面截图")
+        screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "01_initial_page")
+        print(f"📸 已保存初始页面截图: {screenshot_path}")
 
         # 检查页面内容
         page_title = page.title()
@@ -100,7 +112,7 @@ def test_comments():
 
         # 查找邮箱输入框
         email_input = None
-        for selector in ['input[name="email"]', 'input[type="email"]':
+        for selector in ['input[name="email"]', 'input[type="email"]']:
             element = page.locator(selector).first
             if element.count() > 0:
                 email_input = element
@@ -134,20 +146,19 @@ def test_comments():
             print(f"✅ 已填写评论内容: {test_comment}")
 
             # 截图保存填写后的表单
-            page.screenshot(path='E:/code/steal-a-brainrot/test_screenshots/02_form_filled.png', full_page=True)
-            print("📸 已保存填写后的表单截图")
+            screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "02_form_filled")
+            print(f"📸 已保存填写后的表单截图: {screenshot_path}")
 
             # 提交表单
             print("\n🚀 提交评论...")
-            submit_button.click()
-
-            # 等待网络请求完成
             print("⏳ 等待服务器响应...")
-            time.sleep(3)
+            with recorder.step("提交评论"):
+                submit_response = wait_for_api(page, MAKE_COMMENT_API, submit_button.click)
+            print(f"📥 服务器响应: {submit_response.status}")
 
             # 截图保存提交后的页面
-            page.screenshot(path='E:/code/steal-a-brainrot/test_screenshots/03_after_submit.png', full_page=True)
-            print("📸 已保存提交后的页面截图")
+            screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "03_after_submit")
+            print(f"📸 已保存提交后的页面截图: {screenshot_path}")
 
             # 检查是否有成功消息或错误消息
             success_messages = [
@@ -185,8 +196,8 @@ def test_comments():
         print(f"❌ 测试过程中出现错误: {str(e)}")
         # 即使出错也保存截图
         try:
-            page.screenshot(path='E:/code/steal-a-brainrot/test_screenshots/error_screenshot.png', full_page=True)
-            print("📸 已保存错误状态截图")
+            screenshot_path = save_screenshot(page, SCREENSHOT_GROUP, "error_screenshot")
+            print(f"📸 已保存错误状态截图: {screenshot_path}")
         except:
             pass
 
@@ -201,12 +212,15 @@ def test_comments():
             print(f"   数据: {req['post_data']}")
 
     print("\n🔚 保存页面HTML内容")
-    page_content = page.content()
-    with open('E:/code/steal-a-brainrot/test_screens/page_content.html', 'w', encoding='utf-8') as f:
-        f.write(page_content)
-        print("📄 已保存页面HTML内容")
+    content_path = save_page_content(page, SCREENSHOT_GROUP, "page_content")
+    print(f"📄 已保存页面HTML内容: {content_path}")
 
     browser.close()
+    playwright.stop()
+
+    print("\n⏱️ 各步骤耗时:")
+    for step in recorder.steps:
+        print(f"   {step['name']}: {step['latency_ms']} ms")
     print("🔚 测试完成")
     print("=" * 50)
 
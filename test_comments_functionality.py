@@ -4,10 +4,27 @@
 """
 
 from playwright.sync_api import sync_playwright
-import time
 import json
 from datetime import datetime
 
+from comment_waits import (
+    MAKE_COMMENT_API,
+    LatencyRecorder,
+    goto_and_wait_for_comments,
+    wait_for_api,
+    wait_for_count_change,
+    wait_for_first_comment
+)
+from perf_trace import (
+    collect_page_metrics,
+    context_options,
+    new_run_dir,
+    start_tracing,
+    stop_tracing,
+    write_summary
+)
+from screenshot_store import save_screenshot
+
 def log_console_messages(msg):
     """记录控制台消息"""
     timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
@@ -18,21 +35,9 @@ def log_console_messages(msg):
     elif msg.type == "log":
         print(f"[{timestamp}] CONSOLE LOG: {msg.text}")
 
-def log_network_requests(request):
-    """记录网络请求"""
-    if request.resource_type in ["xhr", "fetch"]:
-        print(f"网络请求: {request.method} {request.url}")
-
-def log_network_responses(response):
-    """记录网络响应"""
-    if response.request.resource_type in ["xhr", "fetch"]:
-        print(f"网络响应: {response.status} {response.url}")
-
 def take_screenshot(page, name):
     """截图并保存"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"test_screenshot_{name}_{timestamp}.png"
-    page.screenshot(path=filename, full_page=True)
+    filename = save_screenshot(page, "test_comments_functionality", name)
     print(f"截图已保存: {filename}")
 
 def main():
@@ -44,23 +49,28 @@ def main():
         "success": False
     }
 
+    recorder = LatencyRecorder()
+    # trace、HAR 和性能汇总都写到这个目录，API 请求的耗时/大小/状态码从 HAR 中提取
+    run_dir = new_run_dir()
+    page_metrics = None
+    first_comment_ms = None
+
     with sync_playwright() as p:
         browser = p.chromium.launch(
-            headless=False,  # 设置为 False 以观察测试过程
-            slow_mo=1000     # 操作间隔1秒，便于观察
+            headless=False  # 设置为 False 以观察测试过程
         )
 
         context = browser.new_context(
             viewport={"width": 1920, "height": 1080},
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+            **context_options(run_dir)
         )
+        start_tracing(context)
 
         page = context.new_page()
 
         # 设置事件监听器
         page.on("console", log_console_messages)
-        page.on("request", log_network_requests)
-        page.on("response", log_network_responses)
 
         try:
             print("=" * 60)
@@ -69,28 +79,25 @@ def main():
 
             # 步骤1: 访问首页并检查页面加载
             print("\n步骤1: 访问首页 http://localhost:3000")
-            start_time = time.time()
 
-            response = page.goto("http://localhost:3000", wait_until="domcontentloaded")
-            load_time = time.time() - start_time
+            # 等待首屏 comments.ajax 返回，而不是等待 networkidle
+            with recorder.step("访问首页") as timing:
+                response, comments_response = goto_and_wait_for_comments(page, "http://localhost:3000")
+            first_comment_ms = wait_for_first_comment(page)
 
             results["steps"].append({
                 "step": 1,
                 "name": "访问首页",
                 "status": "success" if response.status == 200 else "error",
                 "response_status": response.status,
-                "load_time": f"{load_time:.2f}s"
+                "comments_status": comments_response.status,
+                "load_time": f"{timing['latency_ms'] / 1000:.2f}s",
+                "first_comment_ms": first_comment_ms
             })
 
             print(f"页面响应状态: {response.status}")
-            print(f"页面加载时间: {load_time:.2f}秒")
-
-            # 等待页面完全加载
-            try:
-                page.wait_for_load_state("networkidle", timeout=10000)
-                print("✓ 页面完全加载完成")
-            except:
-                print("⚠ 页面可能仍在加载中...")
+            print(f"评论接口状态: {comments_response.status}")
+            print(f"页面加载时间: {timing['latency_ms'] / 1000:.2f}秒")
 
             # 检查页面标题
             title = page.title()
@@ -109,9 +116,6 @@ def main():
             # 步骤2: 定位评论区域
             print("\n步骤2: 定位评论区域")
 
-            # 等待一段时间让页面完全渲染
-            page.wait_for_timeout(3000)
-
             # 检查页面上是否存在评论相关的元素
             comment_selectors = [
                 "textarea[name='comment']",
@@ -301,12 +305,14 @@ def main():
                 # 记录提交前的评论数量
                 comments_before = len(page.locator(".comment, [class*='comment']").all())
 
-                # 点击提交按钮
+                # 点击提交按钮，等待 make-comment.ajax 返回后再等待列表节点变化
                 print("正在提交评论...")
-                submit_button.click()
+                with recorder.step("提交评论"):
+                    submit_response = wait_for_api(page, MAKE_COMMENT_API, submit_button.click)
+                print(f"提交接口状态: {submit_response.status}")
 
-                # 等待提交处理
-                page.wait_for_timeout(3000)
+                with recorder.step("等待新评论渲染"):
+                    wait_for_count_change(page, ".comment, [class*='comment']", comments_before)
 
                 # 检查是否有新评论出现
                 comments_after = len(page.locator(".comment, [class*='comment']").all())
@@ -419,6 +425,21 @@ def main():
             take_screenshot(page, "error_state")
 
         finally:
+            results["latency"] = recorder.summary()
+
+            try:
+                page_metrics = collect_page_metrics(page)
+                page_metrics["first_comment_ms"] = first_comment_ms
+            except Exception as e:
+                results["warnings"].append(f"无法读取页面性能指标: {str(e)}")
+
+            # 先停止 trace 并关闭 context，HAR 才会写出
+            stop_tracing(context, run_dir)
+            context.close()
+            summary = write_summary(run_dir, page_metrics, results["latency"], url="http://localhost:3000")
+            results["perf"] = {"run_dir": run_dir, "page": summary["page"], "api": summary["api"]}
+            print(f"性能时间线已保存到: {run_dir}")
+
             # 保存测试结果
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             results_file = f"test_results_{timestamp}.json"